@@ -1,137 +1,56 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Blueprint, Flask, Response, current_app, render_template, request, jsonify, send_file
+import argparse
 import os
-import re
-import PyPDF2
+from functools import lru_cache
+from config import Config
 from database.db_connection import Database
-from services.contract_analyzer import ContractAnalyzer
-from services.supplier_selector import SupplierSelector
+from services.admission import get_llm_admission
+from services.analysis_request import analysis_response, error_response, parse_analyze_request, run_analysis
+from services.bulk_export import FILTER_NAMES, ExportError
+from services.chunked_upload import UploadError
 from services.data_parser import GosZakupParser
+from services.law_updater import LawCorpusUpdater
+from services.law_snapshot import ensure_snapshot
+from services.runtime import ServiceRegistry, preload_shared_state
+from utils.file_utils import FileProcessor
+from utils.http_cache import compress_response, corpus_data_version, http_cached, supplier_data_version
+from utils.profiling import list_profiles, profile_path, profile_summary, profiled
+
+bp = Blueprint('main', __name__)
+bp.after_request(compress_response)
+
+# справочники не зависят от данных в БД: кэшируются браузером на HTTP_STATIC_MAX_AGE
+STATIC_CACHE = f'public, max-age={Config.HTTP_STATIC_MAX_AGE}'
+# данные меняются: клиент хранит ответ, но перед использованием сверяет ETag
+REVALIDATE_CACHE = 'no-cache'
+
+
+def create_app(initialize=True):
+    """Фабрика приложения.
+
+    Под pre-fork сервером (gunicorn с preload_app) вызывается один раз в мастере:
+    здесь загружается общее состояние (БД, корпус законов, mmap-снимок), а клиенты
+    GigaChat, HTTP-сессии и подключения создаются в каждом воркере после fork.
+    """
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
+    app.config['UPLOAD_FOLDER'] = Config.UPLOAD_FOLDER
+    app.config['ALLOWED_EXTENSIONS'] = Config.ALLOWED_EXTENSIONS
+
+    os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+    os.makedirs('data', exist_ok=True)
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key-here'
-app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'doc', 'docx'}
-
-try:
-    contract_analyzer = ContractAnalyzer()
-    supplier_selector = SupplierSelector()
-    AI_AVAILABLE = True
-    print("✅ Система инициализирована успешно")
-except Exception as e:
-    print(f"❌ Ошибка инициализации: {e}")
-    AI_AVAILABLE = False
-    contract_analyzer = None
-    supplier_selector = None
-
-
-class FileProcessor:
-    @staticmethod
-    def extract_text_from_file(file_path, filename):
-        """Извлекает текст из файла"""
-        file_ext = os.path.splitext(filename)[1].lower()
-
-        if file_ext == '.pdf':
-            return FileProcessor._extract_from_pdf(file_path)
-        elif file_ext in ['.doc', '.docx']:
-            return FileProcessor._extract_from_docx_stub(file_path, filename)
-        else:
-            raise ValueError(f"Неподдерживаемый формат: {file_ext}")
-
-    @staticmethod
-    def _extract_from_pdf(file_path):
-        """Извлекает текст из PDF"""
-        try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
-                return text
-        except Exception as e:
-            raise Exception(f"Ошибка чтения PDF: {str(e)}")
-
-    @staticmethod
-    def _extract_from_docx_stub(file_path, filename):
-        try:
-            from docx import Document
-            doc = Document(file_path)
-            text = ""
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text += paragraph.text + "\n"
-            return text
-        except ImportError:
-            return f"[ВНИМАНИЕ] Файл {filename} загружен. Для полной поддержки DOCX установите: pip install python-docx"
-        except Exception as e:
-            return f"[ОШИБКА] Не удалось прочитать DOCX файл: {str(e)}"
-
-
-class LawParser:
-    def __init__(self):
-        self.db = Database()
-
-    def parse_law_pdf(self, file_path, law_type):
-        print(f"📖 Парсим {law_type}...")
-
-        if not os.path.exists(file_path):
-            print(f"❌ Файл не найден: {file_path}")
-            return 0
-
-        try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                full_text = ""
-                for page in pdf_reader.pages:
-                    full_text += page.extract_text()
-
-                articles_count = self._extract_articles_simple(full_text, law_type)
-                return articles_count
-
-        except Exception as e:
-            print(f"❌ Ошибка парсинга {law_type}: {e}")
-            return 0
-
-    def _extract_articles_simple(self, text, law_type):
-        articles_count = 0
-
-        patterns = [
-            r'Статья\s+(\d+(?:\.\d+)*)\.?\s*(.*?)(?=Статья\s+\d+|$)',
-            r'СТАТЬЯ\s+(\d+(?:\.\d+)*)\.?\s*(.*?)(?=СТАТЬЯ\s+\d+|$)',
-            r'ст\.\s*(\d+(?:\.\d+)*)\.?\s*(.*?)(?=ст\.\s*\d+|$)',
-        ]
-
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.DOTALL | re.IGNORECASE)
-            for match in matches:
-                article_number = match.group(1).strip()
-                article_content = match.group(2).strip()
-
-                if len(article_content) > 30 and len(article_content) < 5000:
-                    self._save_article(law_type, article_number, article_content[:2000])
-                    articles_count += 1
-
-        return articles_count
-
-    def _save_article(self, law_type, article_number, content):
-        """Сохраняет статью в базу данных"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-
-        try:
-            title_match = re.split(r'[.!?]', content)
-            title = title_match[0].strip() if title_match else content[:100]
-
-            cursor.execute('''
-                INSERT OR REPLACE INTO law_articles (law_type, article_number, title, content)
-                VALUES (?, ?, ?, ?)
-            ''', (law_type, article_number, title, content))
-
-            conn.commit()
-        except Exception as e:
-            print(f"❌ Ошибка сохранения статьи {article_number}: {e}")
-        finally:
-            cursor.close()
-            conn.close()
+    if initialize:
+        initialize_system()
+        preload_shared_state()
+
+    app.extensions['services'] = ServiceRegistry()
+    app.register_blueprint(bp)
+    return app
+
+
+def services():
+    return current_app.extensions['services']
 
 
 def initialize_system():
@@ -150,11 +69,12 @@ def initialize_system():
 
     if existing_articles > 0:
         print(f"✅ В базе уже есть {existing_articles} статей")
+        ensure_snapshot(db)
         return existing_articles
 
     # Загружаем законы если их нет
     print("📚 Загружаем законы...")
-    parser = LawParser()
+    updater = LawCorpusUpdater(db)
 
     law_files = {
         '44_fz': 'data/44fz_.pdf',
@@ -164,7 +84,11 @@ def initialize_system():
     total_articles = 0
     for law_type, file_path in law_files.items():
         if os.path.exists(file_path):
-            articles_count = parser.parse_law_pdf(file_path, law_type)
+            try:
+                articles_count = updater.update_from_pdf(file_path, law_type)['added']
+            except Exception as e:
+                print(f"❌ Ошибка парсинга {law_type}: {e}")
+                articles_count = 0
             total_articles += articles_count
             if articles_count > 0:
                 print(f"✅ {law_type}: {articles_count} статей")
@@ -172,85 +96,272 @@ def initialize_system():
             print(f"⚠️ Файл не найден: {file_path}")
 
     print(f"✅ Загружено всего: {total_articles} статей")
+    ensure_snapshot(db)
     return total_articles
 
 
-def allowed_file(filename):
-    return '.' in filename and \
-        filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
-
-
-@app.route('/')
+@bp.route('/')
 def index():
-    return render_template('index.html', AI_AVAILABLE=AI_AVAILABLE)
+    return render_template('index.html', AI_AVAILABLE=services().warm_up())
 
 
-@app.route('/analyze', methods=['POST'])
+@bp.route('/analyze', methods=['POST'])
+@profiled('analyze')
 def analyze_contract():
-    if not AI_AVAILABLE:
+    if not services().warm_up():
         return jsonify({'error': 'Система недоступна. Проверьте настройки.'}), 500
 
-    if 'contract_file' not in request.files:
-        return jsonify({'error': 'Файл не загружен'}), 400
+    try:
+        # заполненная очередь — отказ до чтения тела запроса: файл не принимается впустую
+        get_llm_admission().check_capacity()
+        params = request.form if request.form else (request.get_json(silent=True) or {})
+        file = request.files.get('contract_file')
+        analyze_request = parse_analyze_request(params, file.filename if file else None)
+
+        if analyze_request['upload_id']:
+            # файл загружен по частям: текст уже извлечен в фоне
+            filename, contract_text = services().chunked_uploads.contract_text(analyze_request['upload_id'])
+            priority = len(contract_text)
+        else:
+            filename = file.filename
+            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+            file.save(file_path)
+            try:
+                priority = os.path.getsize(file_path)
+                contract_text = FileProcessor.extract_text_from_file(file_path, filename)
+            finally:
+                os.remove(file_path)
 
-    file = request.files['contract_file']
-    law_type = request.form.get('law_type', '44_fz')
+        # поставщики подбираются, пока модель анализирует контракт
+        prefetch = services().supplier_prefetch.start(contract_text) if analyze_request['suppliers'] else None
+        result = run_analysis(services().contract_analyzer, contract_text, analyze_request['law_types'], filename,
+                              priority=priority, user=request.headers.get('X-User') or request.remote_addr)
+    except Exception as e:
+        status, payload, headers = error_response(e)
+        return jsonify(payload), status, headers
 
-    if file.filename == '':
-        return jsonify({'error': 'Файл не выбран'}), 400
+    return jsonify(analysis_response(analyze_request['law_types'], filename, result,
+                                     services().supplier_prefetch.collect(prefetch)))
 
-    if file and allowed_file(file.filename):
-        filename = file.filename
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
 
-        try:
-            contract_text = FileProcessor.extract_text_from_file(file_path, filename)
-            result = contract_analyzer.analyze_contract(contract_text, law_type, filename)
-            os.remove(file_path)
+def upload_error_response(error):
+    response = jsonify({'error': str(error)})
+    response.status_code = error.status_code
+    if error.retry_after:
+        response.headers['Retry-After'] = str(error.retry_after)
+    return response
 
-            return jsonify({
-                'status': 'success',
-                'law_type': law_type,
-                'filename': filename,
-                'analysis': result
-            })
 
-        except Exception as e:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            return jsonify({'error': f'Ошибка анализа: {str(e)}'}), 500
+@bp.route('/api/uploads', methods=['POST'])
+def create_upload():
+    """Начало загрузки по частям: {filename, size, sha256?, chunk_size?}.
+
+    Если файл с таким sha256 уже есть на сервере, ответ содержит proof {offset, length, nonce}:
+    SHA-256 от nonce и этого фрагмента файла отправляется в /api/uploads/<id>/proof вместо частей.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        upload = services().chunked_uploads.init(
+            data.get('filename'), data.get('size'),
+            sha256=data.get('sha256'), chunk_size=data.get('chunk_size')
+        )
+    except UploadError as e:
+        return upload_error_response(e)
+    return jsonify(upload), 201
+
+
+@bp.route('/api/uploads/<upload_id>/proof', methods=['POST'])
+def prove_upload(upload_id):
+    """Подтверждение владения файлом: {sha256} фрагмента proof; при несовпадении — обычная передача частей"""
+    data = request.get_json(silent=True) or {}
+    try:
+        upload = services().chunked_uploads.prove(upload_id, data.get('sha256'))
+    except UploadError as e:
+        return upload_error_response(e)
+    return jsonify(upload), 200 if upload['deduplicated'] else 409
+
 
-    return jsonify({'error': 'Неверный формат файла'}), 400
+@bp.route('/api/uploads/<upload_id>')
+def get_upload(upload_id):
+    """Состояние загрузки: какие части получены (для возобновления) и готов ли текст"""
+    try:
+        return jsonify(services().chunked_uploads.status(upload_id))
+    except UploadError as e:
+        return upload_error_response(e)
+
+
+@bp.route('/api/uploads/<upload_id>/parts/<int:index>', methods=['PUT'])
+def upload_part(upload_id, index):
+    """Часть файла в теле запроса, SHA-256 части — в заголовке X-Chunk-SHA256"""
+    try:
+        result = services().chunked_uploads.save_part(
+            upload_id, index,
+            iter(lambda: request.stream.read(1024 * 1024), b''),
+            request.headers.get('X-Chunk-SHA256')
+        )
+    except UploadError as e:
+        return upload_error_response(e)
+    return jsonify(result)
+
+
+@bp.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    """Сборка файла из частей; текст извлекается в фоне, готовность — в text_status"""
+    try:
+        upload = services().chunked_uploads.complete(upload_id)
+    except UploadError as e:
+        return upload_error_response(e)
+    return jsonify(upload), 200 if upload['text_status'] == 'ready' else 202
 
 
-@app.route('/status')
+@bp.route('/status')
+@http_cached(REVALIDATE_CACHE)
 def system_status():
     """Статус системы"""
+    corpus_version = Database().get_corpus_version()
+    articles_44, articles_223 = count_articles(corpus_version)
+
+    return jsonify({
+        'status': 'running',
+        'system_available': services().warm_up(),
+        'articles_44_fz': articles_44,
+        'articles_223_fz': articles_223,
+        'total_articles': articles_44 + articles_223,
+        'corpus_version': corpus_version,
+        'llm_queue': get_llm_admission().stats(),
+        'llm_screen_queue': get_llm_admission('screen').stats()
+    })
+
+
+@lru_cache(maxsize=4)
+def count_articles(corpus_version):
+    """Число статей по законам; пересчитывается только при смене версии корпуса"""
     conn = Database().get_connection()
     cursor = conn.cursor()
 
-    cursor.execute("SELECT COUNT(*) FROM law_articles WHERE law_type = '44_fz'")
-    articles_44 = cursor.fetchone()[0]
+    try:
+        cursor.execute("SELECT COUNT(*) FROM law_articles WHERE law_type = '44_fz'")
+        articles_44 = cursor.fetchone()[0]
 
-    cursor.execute("SELECT COUNT(*) FROM law_articles WHERE law_type = '223_fz'")
-    articles_223 = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM law_articles WHERE law_type = '223_fz'")
+        articles_223 = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+        conn.close()
 
-    cursor.close()
-    conn.close()
+    return articles_44, articles_223
+
+
+@bp.route('/api/analyses')
+def list_analyses():
+    """История анализов с фильтрами и keyset-пагинацией (?before_id=...)"""
+    try:
+        page = services().analysis_history.list_analyses(
+            law_type=request.args.get('law_type'),
+            status=request.args.get('status'),
+            article=request.args.get('article'),
+            date_from=request.args.get('date_from'),
+            date_to=request.args.get('date_to'),
+            before_id=request.args.get('before_id', type=int),
+            limit=request.args.get('limit', 50, type=int)
+        )
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Дата должна быть в формате YYYY-MM-DD'}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'Ошибка чтения истории: {str(e)}'}), 500
+
+    return jsonify({'status': 'success', **page})
+
+
+@bp.route('/api/analyses/<int:analysis_id>')
+def get_analysis(analysis_id):
+    """Полный результат анализа; ?include_text=1 добавляет исходный текст контракта"""
+    include_text = request.args.get('include_text', '0') in ('1', 'true', 'yes')
+    analysis = services().analysis_history.get_analysis(analysis_id, include_text=include_text)
+
+    if not analysis:
+        return jsonify({'status': 'error', 'message': 'Анализ не найден'}), 404
+
+    return jsonify({'status': 'success', 'analysis': analysis})
+
+
+@bp.route('/api/analytics/articles')
+def analytics_articles():
+    """Самые часто нарушаемые статьи (?law_type=44_fz&month=2025-03&limit=20)"""
+    articles = services().compliance_analytics.top_articles(
+        law_type=request.args.get('law_type'),
+        month=request.args.get('month'),
+        limit=request.args.get('limit', 20, type=int)
+    )
+    return jsonify({'status': 'success', 'articles': articles})
+
+
+@bp.route('/api/analytics/statuses')
+def analytics_statuses():
+    """Распределение статусов соответствия (?law_type=...&month=YYYY-MM)"""
+    statuses = services().compliance_analytics.status_distribution(
+        law_type=request.args.get('law_type'),
+        month=request.args.get('month')
+    )
+    return jsonify({'status': 'success', 'statuses': statuses})
 
+
+@bp.route('/api/analytics/monthly')
+def analytics_monthly():
+    """Помесячная динамика анализов или замечаний по статье (?article=34&months=12)"""
+    trend = services().compliance_analytics.monthly_trend(
+        law_type=request.args.get('law_type'),
+        article=request.args.get('article'),
+        months=request.args.get('months', 12, type=int)
+    )
+    return jsonify({'status': 'success', 'months': trend})
+
+
+@bp.route('/api/usage')
+def llm_usage():
+    """Расход токенов GigaChat по дням, законам и моделям и остаток дневных лимитов (?days=30&law_type=...)"""
+    usage = services().llm_usage
     return jsonify({
-        'status': 'running',
-        'system_available': AI_AVAILABLE,
-        'articles_44_fz': articles_44,
-        'articles_223_fz': articles_223,
-        'total_articles': articles_44 + articles_223
+        'status': 'success',
+        'days': usage.daily(
+            days=request.args.get('days', 30, type=int),
+            law_type=request.args.get('law_type'),
+            model=request.args.get('model')
+        ),
+        'budgets': usage.budget_status()
     })
 
 
-@app.route('/suppliers', methods=['POST'])
+@bp.route('/api/export/<dataset>')
+def export_dataset(dataset):
+    """Потоковая выгрузка suppliers, analyses или issues (?format=parquet|arrow|csv и фильтры)"""
+    exporter = services().bulk_exporter
+    filters = {name: request.args.get(name) for name in FILTER_NAMES}
+    try:
+        export = exporter.prepare(dataset, request.args.get('format'), filters)
+    except ExportError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    return Response(exporter.stream(export), mimetype=export['mimetype'],
+                    headers={'Content-Disposition': f'attachment; filename="{export["filename"]}"'})
+
+
+@bp.route('/api/law-versions')
+@http_cached(REVALIDATE_CACHE, corpus_data_version)
+def list_law_versions():
+    """История обновлений корпуса законов"""
+    versions = LawCorpusUpdater().list_versions(
+        law_type=request.args.get('law_type'),
+        limit=request.args.get('limit', 50, type=int)
+    )
+    return jsonify({'status': 'success', 'versions': versions})
+
+
+@bp.route('/suppliers', methods=['POST'])
+@profiled('suppliers')
 def get_suppliers():
     """Подбор поставщиков по способу закупки и категории (поддерживает пустые значения)"""
+    supplier_selector = services().supplier_selector
     if not supplier_selector:
         return jsonify({'status': 'error', 'message': 'Система подбора поставщиков недоступна'}), 500
 
@@ -270,39 +381,47 @@ def get_suppliers():
         'suppliers': top_suppliers
     })
 
-@app.route('/api/purchase-methods')
+@bp.route('/api/purchase-methods')
+@http_cached(STATIC_CACHE)
 def get_purchase_methods():
+    supplier_selector = services().supplier_selector
     if not supplier_selector:
         return jsonify([])
     methods = supplier_selector.get_all_purchase_methods()
     return jsonify(methods)
 
 
-@app.route('/api/categories')
+@bp.route('/api/categories')
+@http_cached(STATIC_CACHE)
 def get_categories():
+    supplier_selector = services().supplier_selector
     if not supplier_selector:
         return jsonify([])
     categories = supplier_selector.get_all_categories()
     return jsonify(categories)
 
 
-@app.route('/api/search-categories/<query>')
+@bp.route('/api/search-categories/<query>')
+@http_cached(STATIC_CACHE)
 def search_categories(query):
+    supplier_selector = services().supplier_selector
     if not supplier_selector:
         return jsonify([])
     categories = supplier_selector.search_categories(query)
     return jsonify(categories)
 
 
-@app.route('/api/search-purchase-methods/<query>')
+@bp.route('/api/search-purchase-methods/<query>')
+@http_cached(STATIC_CACHE)
 def search_purchase_methods(query):
+    supplier_selector = services().supplier_selector
     if not supplier_selector:
         return jsonify([])
     methods = supplier_selector.search_purchase_methods(query)
     return jsonify(methods)
 
 
-@app.route('/api/update-suppliers', methods=['POST'])
+@bp.route('/api/update-suppliers', methods=['POST'])
 def update_suppliers():
     """Обновляет данные поставщиков с сайта goszakup.gov.kz"""
     try:
@@ -327,22 +446,117 @@ def update_suppliers():
         }), 500
 
 
-@app.route('/api/suppliers-stats')
+@bp.route('/api/suppliers-stats')
+@http_cached(REVALIDATE_CACHE, supplier_data_version)
 def get_suppliers_stats():
     """Возвращает статистику по поставщикам в базе"""
+    supplier_selector = services().supplier_selector
     if not supplier_selector:
         return jsonify({})
     stats = supplier_selector.get_suppliers_stats()
     return jsonify(stats)
 
 
+@bp.route('/api/suppliers/search')
+@http_cached(REVALIDATE_CACHE, supplier_data_version)
+def search_suppliers():
+    """Поиск поставщика по БИН/ИИН или по похожему названию"""
+    query = request.args.get('bin') or request.args.get('q', '')
+    if len(query.strip()) < 2:
+        return jsonify({'error': 'Укажите параметр q (не короче 2 символов) или bin'}), 400
+
+    limit = request.args.get('limit', 10, type=int)
+    return jsonify({'items': services().supplier_search.search(query, limit=limit)})
+
+
+@bp.route('/api/suppliers/<int:supplier_id>/history')
+def get_supplier_history(supplier_id):
+    """Динамика числа контрактов, суммы и места поставщика по датам парсинга"""
+    try:
+        history = services().supplier_history.history(
+            supplier_id,
+            purchase_method=request.args.get('purchase_method'),
+            category=request.args.get('category'),
+            date_from=request.args.get('date_from'),
+            date_to=request.args.get('date_to')
+        )
+    except ValueError:
+        return jsonify({'error': 'Дата должна быть в формате YYYY-MM-DD'}), 400
+
+    if history is None:
+        return jsonify({'error': 'Поставщик не найден'}), 404
+    return jsonify(history)
+
+
+@bp.route('/debug/profiles')
+def debug_profiles():
+    """Последние профили запросов"""
+    if not Config.PROFILING_ENABLED:
+        return jsonify({'error': 'Профилирование отключено'}), 404
+
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({'profiles': list_profiles(limit)})
+
+
+@bp.route('/debug/profiles/<profile_id>')
+def debug_profile(profile_id):
+    """Файл профиля (pstats) или текстовая сводка при ?format=text"""
+    if not Config.PROFILING_ENABLED:
+        return jsonify({'error': 'Профилирование отключено'}), 404
+
+    if request.args.get('format') == 'text':
+        summary = profile_summary(profile_id)
+        if summary is None:
+            return jsonify({'error': 'Профиль не найден'}), 404
+        return summary, 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
+    path = profile_path(profile_id)
+    if path is None:
+        return jsonify({'error': 'Профиль не найден'}), 404
+    return send_file(os.path.abspath(path), as_attachment=True)
+
+
+def run_production(app):
+    """Запуск под gunicorn: preload приложения в мастере, воркеры и потоки из Config"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit("Для production-режима установите gunicorn: pip install gunicorn")
+
+    class ContractExpertApplication(BaseApplication):
+        def load_config(self):
+            for key, value in production_options().items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    ContractExpertApplication().run()
+
+
+def production_options():
+    return {
+        'bind': f"{Config.WEB_HOST}:{Config.WEB_PORT}",
+        'workers': Config.WEB_WORKERS,
+        'threads': Config.WEB_THREADS,
+        'worker_class': 'gthread',
+        'timeout': Config.WEB_TIMEOUT,
+        'preload_app': True,
+    }
+
+
 if __name__ == '__main__':
-    os.makedirs('uploads', exist_ok=True)
-    os.makedirs('data', exist_ok=True)
+    arg_parser = argparse.ArgumentParser(description='Контрактный эксперт')
+    arg_parser.add_argument('--production', action='store_true',
+                            help='многопроцессный запуск под gunicorn (WEB_WORKERS/WEB_THREADS)')
+    args = arg_parser.parse_args()
 
-    initialize_system()
+    app = create_app()
 
     print("🚀 Сервер запущен!")
-    print("🔍 Интерфейс: http://localhost:5000/")
+    print(f"🔍 Интерфейс: http://localhost:{Config.WEB_PORT}/")
 
-    app.run(debug=True, host='0.0.0.0', port=5000, use_reloader=False)
\ No newline at end of file
+    if args.production:
+        run_production(app)
+    else:
+        app.run(debug=True, host=Config.WEB_HOST, port=Config.WEB_PORT, use_reloader=False)
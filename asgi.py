@@ -0,0 +1,276 @@
+# uvicorn asgi:app --workers 4   или   python asgi.py
+#
+# /analyze и /suppliers обрабатываются асинхронно: ожидание GigaChat и goszakup.gov.kz
+# не занимает поток, и один процесс держит сотни одновременных запросов к ним.
+# Части загрузки (/api/uploads/<id>/parts/<n>) принимаются без потока: медленный клиент
+# не занимает воркер. Остальные маршруты передаются Flask-приложению в пуле потоков.
+import asyncio
+import json
+import logging
+import os
+import re
+import tempfile
+from email.parser import BytesParser
+from email.policy import HTTP
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+
+from app import create_app
+from config import Config
+from database.postgres import close_pool
+from services.admission import AdmissionRejected, get_llm_admission
+from services.analysis_request import analysis_response, arun_analysis, error_response, parse_analyze_request
+from services.chunked_upload import UploadError
+from utils.file_utils import FileProcessor
+
+logger = logging.getLogger(__name__)
+
+flask_app = create_app()
+registry = flask_app.extensions['services']
+wsgi_app = WSGIMiddleware(flask_app, workers=Config.WEB_THREADS)
+
+
+class RequestTooLarge(Exception):
+    pass
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+
+    handler, params = resolve_route(scope.get('method'), scope.get('path'))
+    if handler is None:
+        await wsgi_app(scope, receive, send)
+        return
+
+    try:
+        await handler(scope, receive, send, *params)
+    except UploadError as e:
+        await send_json(send, e.status_code, {'error': str(e)},
+                        headers=[(b'retry-after', str(e.retry_after).encode())] if e.retry_after else ())
+    except ClientDisconnected:
+        return
+    except RequestTooLarge:
+        await send_json(send, 413, {'error': 'Превышен допустимый размер запроса'})
+    except Exception as e:
+        logger.error(f"❌ Ошибка обработки {scope['path']}: {e}")
+        await send_json(send, 500, {'error': f'Внутренняя ошибка: {str(e)}'})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await registry.aclose()
+            await asyncio.to_thread(close_pool)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def analyze_contract(scope, receive, send):
+    if not await asyncio.to_thread(registry.warm_up):
+        await send_json(send, 500, {'error': 'Система недоступна. Проверьте настройки.'})
+        return
+
+    try:
+        # заполненная очередь — отказ до чтения тела: файл до ASGI_MAX_UPLOAD не принимается в память впустую
+        get_llm_admission().check_capacity()
+    except AdmissionRejected as e:
+        await send_error(send, e)
+        return
+
+    body = await read_body(receive, Config.ASGI_MAX_UPLOAD)
+    fields, files = await asyncio.to_thread(parse_multipart, header(scope, b'content-type'), body)
+    filename, content = files.get('contract_file', (None, b''))
+
+    try:
+        analyze_request = parse_analyze_request(fields, filename)
+
+        if analyze_request['upload_id']:
+            # файл загружен по частям: текст уже извлечен в фоне
+            filename, contract_text = await asyncio.to_thread(registry.chunked_uploads.contract_text,
+                                                              analyze_request['upload_id'])
+            priority = len(contract_text)
+        else:
+            contract_text = await asyncio.to_thread(extract_upload, filename, content)
+            priority = len(content)
+
+        # поставщики подбираются, пока модель анализирует контракт
+        prefetch = await start_supplier_prefetch(contract_text) if analyze_request['suppliers'] else None
+        result = await arun_analysis(
+            registry.contract_analyzer, contract_text, analyze_request['law_types'], filename,
+            priority=priority,
+            user=header(scope, b'x-user').decode('latin-1') or (scope.get('client') or [None])[0]
+        )
+    except Exception as e:
+        await send_error(send, e)
+        return
+
+    await send_json(send, 200, analysis_response(analyze_request['law_types'], filename, result,
+                                                 await registry.supplier_prefetch.acollect(prefetch)))
+
+
+async def send_error(send, error):
+    """Ошибка /analyze: статус, тело и заголовки (Retry-After) из error_response"""
+    status, payload, headers = error_response(error)
+    await send_json(send, status, payload,
+                    headers=[(name.lower().encode(), value.encode()) for name, value in headers.items()])
+
+
+async def start_supplier_prefetch(contract_text):
+    supplier_prefetch = await asyncio.to_thread(lambda: registry.supplier_prefetch)
+    return await supplier_prefetch.astart(contract_text)
+
+
+async def upload_part(scope, receive, send, upload_id, index):
+    """Часть файла загрузки: тело читается без потока, запись на диск — в пуле потоков"""
+    body = await read_body(receive, Config.UPLOAD_MAX_CHUNK)
+    result = await asyncio.to_thread(registry.chunked_uploads.save_part, upload_id, int(index), [body],
+                                     header(scope, b'x-chunk-sha256').decode('latin-1'))
+    await send_json(send, 200, result)
+
+
+async def get_suppliers(scope, receive, send):
+    """Подбор поставщиков по способу закупки и категории (поддерживает пустые значения)"""
+    supplier_selector = await asyncio.to_thread(lambda: registry.supplier_selector)
+    if not supplier_selector:
+        await send_json(send, 500, {'status': 'error', 'message': 'Система подбора поставщиков недоступна'})
+        return
+
+    try:
+        data = json.loads(await read_body(receive, 1024 * 1024) or b'{}')
+    except ValueError:
+        await send_json(send, 400, {'status': 'error', 'message': 'Некорректный JSON'})
+        return
+
+    purchase_method = data.get('purchase_method', '').strip()
+    category = data.get('category', '').strip()
+    limit = data.get('limit', 50)
+
+    if not purchase_method and not category:
+        top_suppliers = await asyncio.to_thread(supplier_selector.get_filtered_suppliers, limit=limit)
+    else:
+        top_suppliers = await supplier_selector.aget_top_suppliers(purchase_method, category, limit)
+
+    await send_json(send, 200, {
+        'status': 'success',
+        'count': len(top_suppliers),
+        'suppliers': top_suppliers
+    })
+
+
+ASYNC_ROUTES = {
+    ('POST', '/analyze'): analyze_contract,
+    ('POST', '/suppliers'): get_suppliers,
+}
+
+ASYNC_PATTERN_ROUTES = [
+    ('PUT', re.compile(r'^/api/uploads/([^/]+)/parts/(\d+)$'), upload_part),
+]
+
+
+def resolve_route(method, path):
+    handler = ASYNC_ROUTES.get((method, path))
+    if handler is not None:
+        return handler, ()
+    for route_method, pattern, handler in ASYNC_PATTERN_ROUTES:
+        match = pattern.match(path or '')
+        if route_method == method and match:
+            return handler, match.groups()
+    return None, ()
+
+
+async def read_body(receive, max_size: int) -> bytes:
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ClientDisconnected()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > max_size:
+            raise RequestTooLarge()
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def parse_multipart(content_type: bytes, body: bytes):
+    """multipart/form-data → (поля, файлы {имя: (имя файла, содержимое)})"""
+    fields, files = {}, {}
+    if not content_type.startswith(b'multipart/form-data'):
+        if content_type.startswith(b'application/json'):
+            data = json.loads(body or b'{}')
+            fields = {key: str(value) for key, value in data.items()} if isinstance(data, dict) else {}
+        elif content_type.startswith(b'application/x-www-form-urlencoded'):
+            fields = {key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()}
+        return fields, files
+
+    message = BytesParser(policy=HTTP).parsebytes(b'Content-Type: ' + content_type + b'\r\n\r\n' + body)
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        if not name:
+            continue
+        filename = part.get_filename()
+        payload = part.get_payload(decode=True) or b''
+        if filename is None:
+            fields[name] = payload.decode('utf-8', errors='replace')
+        else:
+            # браузеры передают имя файла в UTF-8 без кодирования
+            files[name] = (filename.encode('utf-8', 'surrogateescape').decode('utf-8', errors='replace'), payload)
+    return fields, files
+
+
+def write_upload(filename: str, content: bytes) -> str:
+    os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+    descriptor, path = tempfile.mkstemp(dir=Config.UPLOAD_FOLDER, suffix='.' + filename.rsplit('.', 1)[1].lower())
+    with os.fdopen(descriptor, 'wb') as file:
+        file.write(content)
+    return path
+
+
+def extract_upload(filename: str, content: bytes) -> str:
+    """Текст загруженного файла; одновременно может загружаться несколько файлов с одинаковым именем"""
+    file_path = write_upload(filename, content)
+    try:
+        return FileProcessor.extract_text_from_file(file_path, filename)
+    finally:
+        os.remove(file_path)
+
+
+def header(scope, name: bytes) -> bytes:
+    for key, value in scope.get('headers', []):
+        if key == name:
+            return value
+    return b''
+
+
+async def send_json(send, status: int, payload, headers=()):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode()), *headers]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Для ASGI-режима установите uvicorn: pip install uvicorn")
+
+    print(f"🚀 ASGI-сервер: http://localhost:{Config.WEB_PORT}/")
+    uvicorn.run('asgi:app', host=Config.WEB_HOST, port=Config.WEB_PORT,
+                workers=Config.ASGI_WORKERS, timeout_keep_alive=Config.WEB_TIMEOUT)
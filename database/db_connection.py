@@ -2,23 +2,59 @@ import sqlite3
 import os
 from config import Config
 
+DIALECTS = ('sqlite', 'postgresql')
+
 
 class Database:
     def __init__(self):
+        self.dialect = 'postgresql' if Config.DATABASE_TYPE.lower() in ('postgresql', 'postgres') \
+            else Config.DATABASE_TYPE.lower()
+        if self.dialect not in DIALECTS:
+            raise ValueError(f"Неизвестный DATABASE_TYPE: {Config.DATABASE_TYPE} (допустимо: sqlite, postgresql)")
         self.db_path = Config.SQLITE_DATABASE
 
     def get_connection(self):
 
+        if self.dialect == 'postgresql':
+            from database.postgres import get_connection
+            return get_connection()
+
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
 
+    @staticmethod
+    def is_postgresql(cursor) -> bool:
+        return getattr(cursor, 'dialect', 'sqlite') == 'postgresql'
+
+    @staticmethod
+    def stream_cursor(conn, name='stream'):
+        """Курсор для больших выборок: в PostgreSQL серверный, строки приходят пачками.
+
+        В SQLite обычный курсор и так читает строки по мере обхода; открытое чтение не мешает
+        записи других соединений только в режиме WAL (SQLITE_JOURNAL_MODE, включается в init_db).
+        """
+        if getattr(conn, 'dialect', 'sqlite') == 'postgresql':
+            return conn.cursor(name)
+        return conn.cursor()
+
+    @staticmethod
+    def errors():
+        """Исключения драйвера текущего бэкенда (для except)"""
+        try:
+            import psycopg
+            return sqlite3.Error, psycopg.Error
+        except ImportError:
+            return sqlite3.Error,
+
     def init_db(self):
 
         conn = self.get_connection()
         cursor = conn.cursor()
 
         try:
+            if self.dialect == 'sqlite' and Config.SQLITE_JOURNAL_MODE:
+                cursor.execute(f"PRAGMA journal_mode={Config.SQLITE_JOURNAL_MODE}")
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS law_articles (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -31,6 +67,39 @@ class Database:
                     UNIQUE(law_type, article_number)
                 )
             ''')
+            self._ensure_columns(cursor, 'law_articles', {
+                'content_hash': 'TEXT',
+                'corpus_version': 'INTEGER'
+            })
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS law_corpus_versions (
+                    version INTEGER PRIMARY KEY AUTOINCREMENT,
+                    law_type TEXT NOT NULL,
+                    edition TEXT,
+                    source_file TEXT,
+                    effective_date TEXT,
+                    articles_added INTEGER DEFAULT 0,
+                    articles_changed INTEGER DEFAULT 0,
+                    articles_removed INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS law_article_versions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    law_type TEXT NOT NULL,
+                    article_number TEXT NOT NULL,
+                    title TEXT,
+                    content TEXT,
+                    content_hash TEXT NOT NULL,
+                    valid_from_version INTEGER NOT NULL,
+                    valid_to_version INTEGER,
+                    effective_from TEXT,
+                    effective_to TEXT
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_law_article_versions_article ON law_article_versions(law_type, article_number, valid_from_version)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_law_article_versions_range ON law_article_versions(law_type, valid_from_version, valid_to_version)')
 
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS contract_analysis (
@@ -43,20 +112,93 @@ class Database:
                     analyzed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            self._ensure_columns(cursor, 'contract_analysis', {
+                'filename': 'TEXT',
+                'contract_blob': 'BLOB',
+                'text_codec': 'TEXT',
+                'text_length': 'INTEGER',
+                'issues_count': 'INTEGER DEFAULT 0',
+                'corpus_version': 'INTEGER',
+                'llm_calls': 'INTEGER DEFAULT 0',
+                'prompt_tokens': 'INTEGER DEFAULT 0',
+                'completion_tokens': 'INTEGER DEFAULT 0',
+                'cached_tokens': 'INTEGER DEFAULT 0',
+                'total_tokens': 'INTEGER DEFAULT 0',
+                'llm_cost': 'REAL DEFAULT 0'
+            })
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS suppliers (
+                CREATE TABLE IF NOT EXISTS analysis_issues (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    category TEXT NOT NULL,
-                    purchase_method TEXT NOT NULL,
-                    rating REAL NOT NULL,
-                    contracts_count INTEGER NOT NULL,
-                    total_sum REAL NOT NULL
+                    analysis_id INTEGER NOT NULL REFERENCES contract_analysis(id) ON DELETE CASCADE,
+                    position INTEGER NOT NULL,
+                    article TEXT,
+                    article_number TEXT,
+                    issue TEXT,
+                    recommendation TEXT,
+                    status TEXT,
+                    law_type TEXT,
+                    analyzed_at TIMESTAMP
                 )
             ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_contract_analysis_date ON contract_analysis(analyzed_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_contract_analysis_law ON contract_analysis(law_type, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_contract_analysis_status ON contract_analysis(compliance_result, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_issues_analysis ON analysis_issues(analysis_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_issues_article ON analysis_issues(article_number, analyzed_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_issues_status ON analysis_issues(status, analyzed_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_issues_law ON analysis_issues(law_type, analyzed_at)')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS analytics_article_totals (
+                    law_type TEXT NOT NULL,
+                    article_number TEXT NOT NULL,
+                    issues_count INTEGER NOT NULL DEFAULT 0,
+                    last_seen TIMESTAMP,
+                    PRIMARY KEY (law_type, article_number)
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS analytics_article_monthly (
+                    law_type TEXT NOT NULL,
+                    month TEXT NOT NULL,
+                    article_number TEXT NOT NULL,
+                    issues_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (law_type, month, article_number)
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS analytics_status_monthly (
+                    law_type TEXT NOT NULL,
+                    month TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    analyses_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (law_type, month, status)
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_analytics_article_totals_count ON analytics_article_totals(law_type, issues_count)')
+            # расход токенов GigaChat по дням (UTC), законам и моделям; пополняется при сохранении анализа
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS llm_usage_daily (
+                    day TEXT NOT NULL,
+                    law_type TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    analyses INTEGER NOT NULL DEFAULT 0,
+                    calls INTEGER NOT NULL DEFAULT 0,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    completion_tokens INTEGER NOT NULL DEFAULT 0,
+                    cached_tokens INTEGER NOT NULL DEFAULT 0,
+                    total_tokens INTEGER NOT NULL DEFAULT 0,
+                    cost REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, law_type, model)
+                )
+            ''')
+            self.create_supplier_tables(cursor)
+            self.create_upload_tables(cursor)
+            if self.is_postgresql(cursor):
+                self.create_search_index(cursor)
 
             conn.commit()
-            print("✅ SQLite база данных инициализирована успешно")
+            print(f"✅ База данных ({self.dialect}) инициализирована успешно")
 
         except Exception as e:
             print(f"❌ Ошибка инициализации БД: {e}")
@@ -65,8 +207,275 @@ class Database:
             cursor.close()
             conn.close()
 
+    def get_corpus_version(self):
+        """Текущая версия корпуса законов (0, если обновлений еще не было)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("SELECT COALESCE(MAX(version), 0) FROM law_corpus_versions")
+            return cursor.fetchone()[0]
+        except self.errors():
+            return 0
+        finally:
+            cursor.close()
+            conn.close()
+
+    def get_data_versions(self):
+        """Версии данных для HTTP-кэширования: корпус законов и кэш поставщиков.
+
+        Оба значения читаются по индексам, без просмотра таблиц.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                SELECT version, created_at FROM law_corpus_versions ORDER BY version DESC LIMIT 1
+            ''')
+            corpus = cursor.fetchone()
+            # вставки увеличивают MAX(id), обновления — MAX(last_updated)
+            # по одному агрегату в запросе: так MAX берется из индекса
+            cursor.execute('SELECT MAX(id) FROM suppliers')
+            max_id = cursor.fetchone()[0]
+            cursor.execute('SELECT MAX(last_updated) FROM suppliers')
+            updated = cursor.fetchone()[0]
+            return {
+                'corpus_version': corpus['version'] if corpus else 0,
+                'corpus_updated': corpus['created_at'] if corpus else None,
+                'suppliers_version': f"{max_id or 0}.{updated or ''}",
+                'suppliers_updated': updated
+            }
+        except self.errors():
+            return {'corpus_version': 0, 'corpus_updated': None, 'suppliers_version': '0.', 'suppliers_updated': None}
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def create_supplier_tables(cursor):
+        """Текущий срез поставщиков и история их показателей по датам"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS suppliers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                category TEXT NOT NULL,
+                purchase_method TEXT NOT NULL,
+                rating REAL NOT NULL,
+                contracts_count INTEGER NOT NULL,
+                total_sum REAL NOT NULL,
+                is_real_time BOOLEAN DEFAULT 0,
+                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        Database._ensure_columns(cursor, 'suppliers', {
+            'is_real_time': 'BOOLEAN DEFAULT 0',
+            'last_updated': 'TIMESTAMP',
+            'supplier_id': 'INTEGER',
+            'rank': 'INTEGER'
+        })
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_suppliers_supplier_id ON suppliers(supplier_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_suppliers_last_updated ON suppliers(last_updated)')
+
+        # миграции ранних схем SQLite; база PostgreSQL сразу создается в текущей схеме
+        postgresql = Database.is_postgresql(cursor)
+        if postgresql:
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_suppliers_segment_name ON suppliers(purchase_method, category, name)
+            ''')
+        else:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_suppliers_segment_name'")
+        if not postgresql and cursor.fetchone() is None:
+            # раньше кэш дублировал строки при каждом обновлении: оставляем последнюю
+            cursor.execute('''
+                DELETE FROM suppliers WHERE id NOT IN (
+                    SELECT MAX(id) FROM suppliers GROUP BY purchase_method, category, name
+                )
+            ''')
+            cursor.execute('''
+                CREATE UNIQUE INDEX idx_suppliers_segment_name ON suppliers(purchase_method, category, name)
+            ''')
+
+        # измерение: один поставщик независимо от способа закупки и категории;
+        # ключ — БИН/ИИН, для записей без него — нормализованное название
+        existing = None
+        if not postgresql:
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'supplier_dim'")
+            existing = cursor.fetchone()
+        if existing is not None and 'name_key TEXT NOT NULL UNIQUE' in existing[0]:
+            # у разных БИН может совпадать название: снимаем уникальность name_key
+            cursor.execute('ALTER TABLE supplier_dim RENAME TO supplier_dim_old')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS supplier_dim (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                bin TEXT,
+                name_key TEXT NOT NULL,
+                name TEXT NOT NULL,
+                search_name TEXT,
+                trigram_count INTEGER NOT NULL DEFAULT 0,
+                first_seen INTEGER NOT NULL,
+                last_seen INTEGER NOT NULL
+            )
+        ''')
+
+        if not postgresql:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'supplier_dim_old'")
+        if not postgresql and cursor.fetchone() is not None:
+            cursor.execute('''
+                INSERT INTO supplier_dim (id, name_key, name, first_seen, last_seen)
+                SELECT id, name_key, name, first_seen, last_seen FROM supplier_dim_old
+            ''')
+            cursor.execute('DROP TABLE supplier_dim_old')
+
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_supplier_dim_bin ON supplier_dim(bin) WHERE bin IS NOT NULL')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_supplier_dim_name_key ON supplier_dim(name_key)')
+        # триграммы нормализованных названий для нечеткого поиска
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS supplier_trigrams (
+                trigram TEXT NOT NULL,
+                supplier_id INTEGER NOT NULL,
+                PRIMARY KEY (trigram, supplier_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_supplier_trigrams_supplier ON supplier_trigrams(supplier_id)')
+        Database._backfill_supplier_search(cursor)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS supplier_segments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                purchase_method TEXT NOT NULL,
+                category TEXT NOT NULL,
+                UNIQUE (purchase_method, category)
+            )
+        ''')
+        # факты по датам (YYYYMMDD): пишутся только изменившиеся значения, NULL — без изменений
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS supplier_snapshots (
+                supplier_id INTEGER NOT NULL,
+                segment_id INTEGER NOT NULL,
+                snapshot_date INTEGER NOT NULL,
+                rank INTEGER,
+                contracts_count INTEGER,
+                total_sum REAL,
+                PRIMARY KEY (supplier_id, segment_id, snapshot_date)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_supplier_snapshots_date ON supplier_snapshots(snapshot_date, segment_id)')
+
+    @staticmethod
+    def _backfill_supplier_search(cursor):
+        """Индексирует для поиска поставщиков, добавленных в измерение до появления триграммного индекса"""
+        from services.supplier_search import SupplierSearch  # supplier_search импортирует этот модуль
+
+        cursor.execute('SELECT id, name FROM supplier_dim WHERE search_name IS NULL')
+        rows = cursor.fetchall()
+        for row in rows:
+            SupplierSearch.index(cursor, row['id'], row['name'])
+        if rows:
+            print(f"🔎 Проиндексировано для поиска поставщиков: {len(rows)}")
+
+    @staticmethod
+    def create_upload_tables(cursor):
+        """Загрузки по частям и файлы контрактов, адресуемые по SHA-256 содержимого"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS contract_files (
+                sha256 TEXT PRIMARY KEY,
+                extension TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                text_status TEXT NOT NULL DEFAULT 'pending',
+                text_blob BLOB,
+                text_codec TEXT,
+                text_length INTEGER,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                extracted_at TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS uploads (
+                id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                chunk_size INTEGER NOT NULL,
+                total_parts INTEGER NOT NULL,
+                sha256 TEXT,
+                status TEXT NOT NULL DEFAULT 'uploading',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        Database._ensure_columns(cursor, 'uploads', {
+            'proof_offset': 'INTEGER',
+            'proof_length': 'INTEGER',
+            'proof_nonce': 'TEXT'
+        })
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_uploads_status_updated ON uploads(status, updated_at)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS upload_parts (
+                upload_id TEXT NOT NULL,
+                part_index INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                PRIMARY KEY (upload_id, part_index)
+            ) WITHOUT ROWID
+        ''')
+
+    @staticmethod
+    def create_search_index(cursor):
+        """Полнотекстовый поиск по статьям законов (PostgreSQL): tsvector и GIN-индекс"""
+        cursor.execute(f'''
+            ALTER TABLE law_articles ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('{Config.DATABASE_TEXT_SEARCH_CONFIG}', COALESCE(title, '')), 'A') ||
+                setweight(to_tsvector('{Config.DATABASE_TEXT_SEARCH_CONFIG}', COALESCE(content, '')), 'B')
+            ) STORED
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_law_articles_search ON law_articles USING GIN (search_vector)')
+
+    def search_law_articles(self, law_type, query, limit=5):
+        """Статьи, наиболее релевантные запросу (полнотекстовый индекс PostgreSQL).
+
+        В SQLite поиск выполняет снимок корпуса (LawSnapshot.search): возвращается пустой список.
+        """
+        if self.dialect != 'postgresql' or not (query or '').strip():
+            return []
+
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            # слова запроса объединяются через OR: текст раздела контракта не должен совпадать целиком;
+            # приведение ::tsquery не нормализует лексемы повторно (to_tsquery обрезал бы основы еще раз)
+            cursor.execute(f'''
+                SELECT article_number, title, content, ts_rank_cd(search_vector, q) AS rank
+                FROM law_articles,
+                     CAST(replace(plainto_tsquery('{Config.DATABASE_TEXT_SEARCH_CONFIG}', ?)::text, '&', '|')
+                          AS tsquery) q
+                WHERE law_type = ? AND search_vector @@ q
+                ORDER BY rank DESC
+                LIMIT ?
+            ''', (query, law_type, limit))
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def _ensure_columns(cursor, table, columns):
+        """Добавляет недостающие колонки в существующую таблицу"""
+        if Database.is_postgresql(cursor):
+            for name, definition in columns.items():
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {name} {definition}")
+            return
+
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+
+        for name, definition in columns.items():
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
 
 
 if __name__ == "__main__":
     db = Database()
-    db.init_db()
\ No newline at end of file
+    db.init_db()
@@ -0,0 +1,230 @@
+# PostgreSQL-бэкенд Database (DATABASE_TYPE=postgresql): пул соединений и совместимость с SQL сервисов.
+#
+# Запросы пишутся один раз для обоих бэкендов: плейсхолдеры `?`, upsert через ON CONFLICT, RETURNING.
+# Здесь `?` заменяется на `%s`, DDL (AUTOINCREMENT, BLOB, REAL, WITHOUT ROWID) переводится в типы
+# PostgreSQL, а строки результата доступны по индексу и по имени колонки, как sqlite3.Row.
+import logging
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psycopg
+    from psycopg.types.string import TextLoader
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    psycopg = None
+
+DIALECT = 'postgresql'
+
+DDL_REPLACEMENTS = (
+    (re.compile(r'\bINTEGER PRIMARY KEY AUTOINCREMENT\b', re.IGNORECASE),
+     'INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY'),
+    (re.compile(r'\bBLOB\b', re.IGNORECASE), 'BYTEA'),
+    (re.compile(r'\bREAL\b', re.IGNORECASE), 'DOUBLE PRECISION'),
+    (re.compile(r'\bBOOLEAN DEFAULT 0\b', re.IGNORECASE), 'BOOLEAN DEFAULT FALSE'),
+    # секунды без дробной части: значения совпадают с CURRENT_TIMESTAMP в SQLite
+    (re.compile(r'\bTIMESTAMP\b(?!\s*\()', re.IGNORECASE), 'TIMESTAMP(0)'),
+    (re.compile(r'\)\s*WITHOUT ROWID', re.IGNORECASE), ')'),
+)
+DDL_STATEMENT = re.compile(r'^\s*(?:CREATE\s+TABLE|ALTER\s+TABLE)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def translate(sql: str, has_params: bool) -> str:
+    """SQL в стиле SQLite → PostgreSQL: `?` → `%s` вне строковых литералов, DDL-типы"""
+    if DDL_STATEMENT.match(sql):
+        for pattern, replacement in DDL_REPLACEMENTS:
+            sql = pattern.sub(replacement, sql)
+
+    if not has_params:
+        return sql
+
+    parts = []
+    quote = None
+    for char in sql:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+        elif char == '?':
+            parts.append('%s')
+            continue
+        if char == '%':
+            parts.append('%%')
+            continue
+        parts.append(char)
+    return ''.join(parts)
+
+
+class Row(tuple):
+    """Строка результата с доступом по индексу и по имени колонки (как sqlite3.Row)"""
+
+    def __new__(cls, values, index):
+        row = super().__new__(cls, values)
+        row._index = index
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def keys(self):
+        return list(self._index)
+
+
+def row_factory(cursor):
+    index = {column.name: position for position, column in enumerate(cursor.description or ())}
+    return lambda values: Row(values, index)
+
+
+class PostgresCursor:
+    """Курсор psycopg с плейсхолдерами `?`"""
+
+    dialect = DIALECT
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=None):
+        self._cursor.execute(translate(sql, params is not None), params)
+        return self
+
+    def executemany(self, sql, params_seq):
+        params_seq = list(params_seq)
+        if params_seq:
+            self._cursor.executemany(translate(sql, True), params_seq)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size) if size else self._cursor.fetchmany()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class PostgresConnection:
+    """Соединение из пула; close() возвращает его в пул (незавершенная транзакция откатывается)"""
+
+    dialect = DIALECT
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._streams = 0
+
+    def cursor(self, name: str = None):
+        """name — серверный курсор: строки читаются пачками по DATABASE_STREAM_BATCH"""
+        if name is None:
+            return PostgresCursor(self._conn.cursor())
+
+        self._streams += 1
+        cursor = self._conn.cursor(name=f"{name}_{self._streams}")
+        cursor.itersize = Config.DATABASE_STREAM_BATCH
+        return PostgresCursor(cursor)
+
+    def execute(self, sql, params=None):
+        return self.cursor().execute(sql, params)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        if self._conn is None:
+            return
+        try:
+            # чтение без commit оставляет открытую транзакцию: откатываем до возврата в пул
+            if self._conn.info.transaction_status != psycopg.pq.TransactionStatus.IDLE:
+                self._conn.rollback()
+        finally:
+            self._pool.putconn(self._conn)
+            self._conn = None
+
+
+def _configure(conn):
+    # TIMESTAMP отдается строкой 'YYYY-MM-DD HH:MM:SS', как в SQLite
+    conn.adapters.register_loader('timestamp', TextLoader)
+
+
+_pool: Optional['ConnectionPool'] = None
+_pool_lock = threading.Lock()
+# пулы, унаследованные от родителя при fork: не закрываются, чтобы не разорвать его соединения
+_inherited = []
+
+
+def _after_fork():
+    global _pool, _pool_lock
+    if _pool is not None:
+        _inherited.append(_pool)
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def get_pool() -> 'ConnectionPool':
+    """Пул соединений процесса; создается при первом обращении (в воркере — после fork)"""
+    global _pool
+    if psycopg is None:
+        raise RuntimeError("Для DATABASE_TYPE=postgresql установите драйвер: pip install \"psycopg[binary,pool]\"")
+    if not Config.DATABASE_URL:
+        raise RuntimeError("Для DATABASE_TYPE=postgresql укажите DATABASE_URL")
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    Config.DATABASE_URL,
+                    min_size=Config.DATABASE_POOL_MIN,
+                    max_size=Config.DATABASE_POOL_MAX,
+                    timeout=Config.DATABASE_POOL_TIMEOUT,
+                    kwargs={'row_factory': row_factory, 'options': '-c timezone=UTC'},
+                    configure=_configure,
+                    name='contract-expert',
+                    open=True
+                )
+                logger.info(f"🐘 [{os.getpid()}] Пул PostgreSQL: {Config.DATABASE_POOL_MIN}-"
+                            f"{Config.DATABASE_POOL_MAX} соединений")
+    return _pool
+
+
+def get_connection() -> PostgresConnection:
+    pool = get_pool()
+    return PostgresConnection(pool, pool.getconn())
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
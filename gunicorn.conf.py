@@ -0,0 +1,4 @@
+# gunicorn -c gunicorn.conf.py wsgi:app
+from app import production_options
+
+globals().update(production_options())
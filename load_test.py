@@ -0,0 +1,198 @@
+# Нагрузочный тест async-пути (asgi.py) на локальных заглушках внешних сервисов.
+#
+# 1. Заглушки goszakup.gov.kz и GigaChat API с задержкой ответа:
+#    python load_test.py stand-in --port 8900 --delay 2
+# 2. Приложение, направленное на заглушки:
+#    GOSZAKUP_BASE_URL=http://127.0.0.1:8900 GIGACHAT_BASE_URL=http://127.0.0.1:8900/api/v1 \
+#    GIGACHAT_AUTH_URL=http://127.0.0.1:8900/api/v2/oauth GIGACHAT_CREDENTIALS=dGVzdDp0ZXN0 \
+#    LLM_MAX_CONCURRENT=500 LLM_MAX_QUEUE=1000 ASGI_WORKERS=1 python asgi.py
+# 3. Нагрузка:
+#    python load_test.py run --url http://127.0.0.1:5000 --endpoint suppliers --concurrency 300 --requests 1500
+#    python load_test.py run --url http://127.0.0.1:5000 --endpoint analyze --file contract.docx --concurrency 300
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+from typing import Dict, List
+
+SUPPLIER_ROW = ('<tr><td>{rank}</td><td><a href="#">ТОО «Поставщик {rank}»</a> БИН: {bin}</td>'
+                '<td>{total} млн</td><td>{contracts}</td></tr>')
+
+ANALYSIS_REPLY = {
+    'compliance_status': 'частично соответствует',
+    'summary': 'Ответ заглушки GigaChat',
+    'issues': [{'article': 'Статья 34', 'issue': 'Не указан срок оплаты', 'recommendation': 'Указать срок оплаты'}]
+}
+
+
+class StandInServer:
+    """Минимальный HTTP/1.1 сервер (keep-alive) с ответами goszakup и GigaChat API"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.served = Counter()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                method, path, _ = request_line.split(' ', 2)
+                headers = {}
+                for line in header_lines:
+                    if ':' in line:
+                        key, value = line.split(':', 1)
+                        headers[key.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length:
+                    await reader.readexactly(length)
+
+                status, content_type, body = await self.respond(method, path)
+                writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                             f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, method: str, path: str):
+        if path.startswith('/api/v2/oauth'):
+            self.served['oauth'] += 1
+            token = {'access_token': 'stand-in', 'expires_at': int((time.time() + 1800) * 1000)}
+            return '200 OK', 'application/json', json.dumps(token).encode()
+
+        kind = 'gigachat' if path.startswith('/api/v1/chat/completions') else \
+            'goszakup' if path.startswith('/ru/top/suppliers') else None
+        if kind is None:
+            return '404 Not Found', 'text/plain', b'not found'
+
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        self.served[kind] += 1
+
+        if kind == 'goszakup':
+            rows = ''.join(SUPPLIER_ROW.format(rank=rank, bin=f"{100000000000 + rank}", total=rank * 10,
+                                               contracts=100 - rank) for rank in range(1, 21))
+            page = f'<html><body><table class="table"><tr><th>№</th><th>Поставщик</th></tr>{rows}</table></body></html>'
+            return '200 OK', 'text/html; charset=utf-8', page.encode('utf-8')
+
+        reply = {
+            'choices': [{'message': {'role': 'assistant', 'content': json.dumps(ANALYSIS_REPLY, ensure_ascii=False)},
+                         'index': 0, 'finish_reason': 'stop'}],
+            'created': int(time.time()),
+            'model': 'stand-in',
+            'usage': {'prompt_tokens': 1000, 'completion_tokens': 100, 'total_tokens': 1100,
+                      'precached_prompt_tokens': 0},
+            'object': 'chat.completion'
+        }
+        return '200 OK', 'application/json', json.dumps(reply, ensure_ascii=False).encode('utf-8')
+
+
+async def run_stand_in(host: str, port: int, delay: float):
+    stand_in = StandInServer(delay)
+    server = await asyncio.start_server(stand_in.handle, host, port, backlog=4096)
+    print(f"🧪 Заглушки на http://{host}:{port} (задержка {delay} с)")
+
+    async with server:
+        while True:
+            await asyncio.sleep(5)
+            if stand_in.served:
+                print(f"📊 обслужено: {dict(stand_in.served)}, одновременно сейчас: {stand_in.active}, "
+                      f"пик: {stand_in.peak}")
+
+
+async def run_load(url: str, endpoint: str, concurrency: int, total: int, file_path: str = None,
+                   law_type: str = '44_fz') -> Dict:
+    import httpx
+
+    file_content = None
+    if endpoint == 'analyze':
+        if not file_path:
+            raise SystemExit("Для /analyze укажите --file")
+        with open(file_path, 'rb') as file:
+            file_content = file.read()
+
+    latencies: List[float] = []
+    statuses = Counter()
+    queue = iter(range(total))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=600, limits=limits) as client:
+
+        async def worker():
+            for _ in queue:
+                started = time.perf_counter()
+                try:
+                    if endpoint == 'analyze':
+                        response = await client.post('/analyze', data={'law_type': law_type},
+                                                     files={'contract_file': (file_path.rsplit('/', 1)[-1], file_content)})
+                    else:
+                        response = await client.post('/suppliers', json={'purchase_method': 'Открытый конкурс',
+                                                                         'category': 'Товар', 'limit': 20})
+                    statuses[response.status_code] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(value):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * value))], 3)
+
+    return {
+        'requests': total,
+        'concurrency': concurrency,
+        'statuses': dict(statuses),
+        'elapsed_seconds': round(elapsed, 2),
+        'requests_per_second': round(total / elapsed, 1),
+        'latency_p50': percentile(0.5),
+        'latency_p95': percentile(0.95),
+        'latency_p99': percentile(0.99),
+        'latency_mean': round(statistics.mean(latencies), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест async-пути на локальных заглушках')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    stand_in = commands.add_parser('stand-in', help='Заглушки goszakup.gov.kz и GigaChat API')
+    stand_in.add_argument('--host', default='127.0.0.1')
+    stand_in.add_argument('--port', type=int, default=8900)
+    stand_in.add_argument('--delay', type=float, default=2.0, help='Задержка ответа, с')
+
+    run = commands.add_parser('run', help='Нагрузка на приложение')
+    run.add_argument('--url', default='http://127.0.0.1:5000')
+    run.add_argument('--endpoint', choices=['suppliers', 'analyze'], default='suppliers')
+    run.add_argument('--concurrency', type=int, default=200)
+    run.add_argument('--requests', type=int, default=1000)
+    run.add_argument('--file', help='Файл контракта для /analyze')
+    run.add_argument('--law', default='44_fz', choices=['44_fz', '223_fz'])
+
+    args = parser.parse_args()
+    if args.command == 'stand-in':
+        try:
+            asyncio.run(run_stand_in(args.host, args.port, args.delay))
+        except KeyboardInterrupt:
+            pass
+    else:
+        result = asyncio.run(run_load(args.url, args.endpoint, args.concurrency, args.requests,
+                                      args.file, args.law))
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Запрос не допущен к LLM: очередь переполнена или ожидание истекло"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Ограничение параллельных вызовов LLM с ограниченной приоритетной очередью.
+
+    Приоритет: сначала пользователи с меньшим числом запросов в работе,
+    затем меньшие файлы. Лимиты действуют в пределах одного процесса.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._by_user = Counter()
+        self._avg_service_time = 30.0
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    @contextmanager
+    def slot(self, priority: int = 0, user: Optional[str] = None):
+        """Занимает слот LLM на время блока with"""
+        self._acquire(priority, user)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started, user)
+
+    @asynccontextmanager
+    async def aslot(self, priority: int = 0, user: Optional[str] = None):
+        """Слот LLM для async-обработчиков: свободный слот занимается без ожидания,
+        ожидание в очереди (не длиннее max_queue) идет в потоке и не блокирует цикл событий
+        """
+        if not self._try_admit(user):
+            loop = asyncio.get_running_loop()
+            waiter = loop.run_in_executor(None, self._acquire, priority, user)
+            try:
+                await asyncio.shield(waiter)
+            except asyncio.CancelledError:
+                # запрос отменен, а поток все равно дождется слота: сразу освобождаем его
+                waiter.add_done_callback(
+                    lambda future: future.exception() is None and self._release(0.0, user))
+                raise
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started, user)
+
+    def check_capacity(self):
+        """Быстрый отказ до приема файла, если очередь уже заполнена"""
+        with self._cond:
+            if self._active >= self.max_concurrent and len(self._waiting) >= self.max_queue:
+                self._rejected += 1
+                raise AdmissionRejected("Сервис перегружен, повторите запрос позже", self._retry_after())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'active': self._active,
+                'queued': len(self._waiting),
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'admitted': self._admitted,
+                'rejected': self._rejected,
+                'timed_out': self._timed_out,
+                'avg_service_seconds': round(self._avg_service_time, 1)
+            }
+
+    def _try_admit(self, user: Optional[str]) -> bool:
+        with self._cond:
+            if self._active < self.max_concurrent and not self._waiting:
+                self._admit(user)
+                return True
+            return False
+
+    def _acquire(self, priority: int, user: Optional[str]):
+        with self._cond:
+            if self._active < self.max_concurrent and not self._waiting:
+                self._admit(user)
+                return
+
+            if len(self._waiting) >= self.max_queue:
+                self._rejected += 1
+                raise AdmissionRejected("Очередь запросов к LLM заполнена", self._retry_after())
+
+            entry = ((self._by_user[user] if user else 0, priority), next(self._sequence))
+            heapq.heappush(self._waiting, entry)
+            if user:
+                self._by_user[user] += 1
+            deadline = time.monotonic() + self.queue_timeout
+
+            while True:
+                if self._active < self.max_concurrent and self._waiting[0] is entry:
+                    heapq.heappop(self._waiting)
+                    self._admit(None)
+                    self._cond.notify_all()
+                    return
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._timed_out += 1
+                    if user:
+                        self._by_user[user] -= 1
+                        if self._by_user[user] <= 0:
+                            del self._by_user[user]
+                    self._cond.notify_all()
+                    raise AdmissionRejected("Превышено время ожидания в очереди к LLM", self._retry_after())
+
+                self._cond.wait(remaining)
+
+    def _admit(self, user: Optional[str]):
+        self._active += 1
+        self._admitted += 1
+        if user:
+            self._by_user[user] += 1
+
+    def _release(self, duration: float, user: Optional[str]):
+        with self._cond:
+            self._active -= 1
+            if user:
+                self._by_user[user] -= 1
+                if self._by_user[user] <= 0:
+                    del self._by_user[user]
+            self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * duration
+            self._cond.notify_all()
+
+    def _retry_after(self) -> int:
+        waves = (len(self._waiting) + self._active) / self.max_concurrent
+        return max(1, math.ceil(waves * self._avg_service_time))
+
+
+_controllers: Dict[str, AdmissionController] = {}
+_controller_lock = threading.Lock()
+
+
+def get_llm_admission(tier: str = 'full') -> AdmissionController:
+    """Контроллер допуска к LLM текущего процесса для уровня модели (full или screen)"""
+    controller = _controllers.get(tier)
+    if controller is None:
+        with _controller_lock:
+            controller = _controllers.get(tier)
+            if controller is None:
+                if tier == 'screen':
+                    controller = AdmissionController(
+                        Config.LLM_SCREEN_MAX_CONCURRENT,
+                        Config.LLM_SCREEN_MAX_QUEUE,
+                        Config.LLM_QUEUE_TIMEOUT
+                    )
+                else:
+                    controller = AdmissionController(
+                        Config.LLM_MAX_CONCURRENT,
+                        Config.LLM_MAX_QUEUE,
+                        Config.LLM_QUEUE_TIMEOUT
+                    )
+                _controllers[tier] = controller
+    return controller
+
+
+def set_llm_admission(tier: str, controller: AdmissionController):
+    """Задает контроллер уровня модели для текущего процесса (пакетная проверка — свои лимиты и очередь)"""
+    with _controller_lock:
+        _controllers[tier] = controller
@@ -0,0 +1,250 @@
+import ast
+import json
+import logging
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from database.db_connection import Database
+from services.article_resolver import ArticleResolver
+from services.compliance_analytics import ComplianceAnalytics
+from services.llm_usage import LlmUsage
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisHistory:
+    """Хранилище истории анализов: сжатый текст контракта и нормализованные замечания"""
+
+    TEXT_CODEC = 'zlib'
+    COMPRESSION_LEVEL = 6
+    MAX_PAGE_SIZE = 200
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or Database()
+
+    def save(self, contract_text: str, law_type: str, analysis_result: Dict[str, Any], filename: str) -> Optional[int]:
+        """Сохраняет результат анализа и возвращает его id"""
+        issues = [{key: value for key, value in issue.items() if key != 'references'}
+                  for issue in analysis_result.get('issues', []) if isinstance(issue, dict)]
+        status = analysis_result.get('compliance_status', 'не определен')
+        usage = analysis_result.get('usage') or {}
+        analyzed_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        text = contract_text or ''
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                INSERT INTO contract_analysis
+                (filename, contract_blob, text_codec, text_length, law_type, compliance_result,
+                 issues_count, recommendations, corpus_version, analyzed_at,
+                 llm_calls, prompt_tokens, completion_tokens, cached_tokens, total_tokens, llm_cost)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                RETURNING id
+            ''', (
+                filename,
+                zlib.compress(text.encode('utf-8'), self.COMPRESSION_LEVEL),
+                self.TEXT_CODEC,
+                len(text),
+                law_type,
+                status,
+                len(issues),
+                analysis_result.get('summary', ''),
+                analysis_result.get('corpus_version'),
+                analyzed_at,
+                usage.get('calls', 0),
+                usage.get('prompt_tokens', 0),
+                usage.get('completion_tokens', 0),
+                usage.get('cached_tokens', 0),
+                usage.get('total_tokens', 0),
+                usage.get('cost', 0)
+            ))
+            analysis_id = cursor.fetchone()[0]
+
+            article_numbers = [self._article_number(issue.get('article')) for issue in issues]
+
+            cursor.executemany('''
+                INSERT INTO analysis_issues
+                (analysis_id, position, article, article_number, issue, recommendation, status, law_type, analyzed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (
+                    analysis_id,
+                    position,
+                    issue.get('article'),
+                    article_numbers[position],
+                    issue.get('issue'),
+                    issue.get('recommendation'),
+                    status,
+                    law_type,
+                    analyzed_at
+                )
+                for position, issue in enumerate(issues)
+            ])
+
+            ComplianceAnalytics.record(cursor, law_type, status, article_numbers, analyzed_at)
+            LlmUsage.record(cursor, law_type, usage, analyzed_at)
+
+            conn.commit()
+            return analysis_id
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка сохранения анализа: {e}")
+            conn.rollback()
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+
+    def list_analyses(self, law_type: str = None, status: str = None, article: str = None,
+                      date_from: str = None, date_to: str = None,
+                      before_id: int = None, limit: int = 50) -> Dict[str, Any]:
+        """Постраничный список анализов (keyset-пагинация по id, от новых к старым)"""
+        limit = max(1, min(int(limit), self.MAX_PAGE_SIZE))
+        conditions = []
+        params = []
+
+        if law_type:
+            conditions.append('a.law_type = ?')
+            params.append(law_type)
+        if status:
+            conditions.append('a.compliance_result = ?')
+            params.append(status)
+        if article:
+            conditions.append('a.id IN (SELECT analysis_id FROM analysis_issues WHERE article_number = ?)')
+            params.append(self._article_number(article) or article)
+        if date_from:
+            conditions.append('a.analyzed_at >= ?')
+            params.append(self._date_bound(date_from))
+        if date_to:
+            conditions.append('a.analyzed_at < ?')
+            params.append(self._date_bound(date_to, inclusive_end=True))
+        if before_id:
+            conditions.append('a.id < ?')
+            params.append(int(before_id))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(f'''
+                SELECT a.id, a.filename, a.law_type, a.compliance_result, a.issues_count,
+                       a.recommendations, a.text_length, a.analyzed_at
+                FROM contract_analysis a
+                {where}
+                ORDER BY a.id DESC
+                LIMIT ?
+            ''', params + [limit + 1])
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+        items = [{
+            'id': row['id'],
+            'filename': row['filename'],
+            'law_type': row['law_type'],
+            'compliance_status': row['compliance_result'],
+            'issues_count': row['issues_count'] or 0,
+            'summary': row['recommendations'],
+            'text_length': row['text_length'],
+            'analyzed_at': row['analyzed_at']
+        } for row in rows[:limit]]
+
+        return {
+            'items': items,
+            'next_before_id': items[-1]['id'] if len(rows) > limit else None
+        }
+
+    def get_analysis(self, analysis_id: int, include_text: bool = False) -> Optional[Dict[str, Any]]:
+        """Возвращает анализ с замечаниями и, по запросу, полным текстом контракта"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                SELECT id, filename, law_type, compliance_result, issues_found, recommendations,
+                       contract_text, contract_blob, text_codec, text_length, corpus_version, analyzed_at,
+                       llm_calls, prompt_tokens, completion_tokens, cached_tokens, total_tokens, llm_cost
+                FROM contract_analysis
+                WHERE id = ?
+            ''', (analysis_id,))
+            row = cursor.fetchone()
+
+            if not row:
+                return None
+
+            cursor.execute('''
+                SELECT article, issue, recommendation
+                FROM analysis_issues
+                WHERE analysis_id = ?
+                ORDER BY position
+            ''', (analysis_id,))
+            issues = [dict(issue) for issue in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+
+        result = {
+            'id': row['id'],
+            'filename': row['filename'],
+            'law_type': row['law_type'],
+            'compliance_status': row['compliance_result'],
+            'summary': row['recommendations'],
+            'issues': issues or self._parse_legacy_issues(row['issues_found']),
+            'text_length': row['text_length'],
+            'corpus_version': row['corpus_version'],
+            'analyzed_at': row['analyzed_at'],
+            'usage': {
+                'calls': row['llm_calls'] or 0,
+                'prompt_tokens': row['prompt_tokens'] or 0,
+                'completion_tokens': row['completion_tokens'] or 0,
+                'cached_tokens': row['cached_tokens'] or 0,
+                'total_tokens': row['total_tokens'] or 0,
+                'cost': row['llm_cost'] or 0
+            }
+        }
+
+        if include_text:
+            result['contract_text'] = self._decode_text(row)
+
+        return result
+
+    def _decode_text(self, row) -> str:
+        """Распаковывает текст контракта (старые записи хранят обрезанный текст как есть)"""
+        if row['contract_blob'] is None:
+            return row['contract_text'] or ''
+        if row['text_codec'] != self.TEXT_CODEC:
+            raise ValueError(f"Неизвестный формат сжатия: {row['text_codec']}")
+        return zlib.decompress(row['contract_blob']).decode('utf-8')
+
+    @staticmethod
+    def _date_bound(value: str, inclusive_end: bool = False) -> str:
+        """YYYY-MM-DD → граница для сравнения с analyzed_at; date_to включает весь день"""
+        day = date.fromisoformat(value)
+        if inclusive_end:
+            day += timedelta(days=1)
+        return f"{day.isoformat()} 00:00:00"
+
+    @staticmethod
+    def _parse_legacy_issues(raw: Optional[str]) -> List[Dict[str, Any]]:
+        """Разбирает issues_found старых записей (JSON или repr списка); новые хранят замечания в analysis_issues"""
+        if not raw:
+            return []
+        for loader in (json.loads, ast.literal_eval):
+            try:
+                issues = loader(raw)
+                if isinstance(issues, list):
+                    return issues
+            except (ValueError, SyntaxError):
+                continue
+        return []
+
+    @staticmethod
+    def _article_number(article: Optional[str]) -> Optional[str]:
+        """Извлекает номер статьи из строки вида 'Статья 34, часть 2'"""
+        return ArticleResolver.primary_article(article)
@@ -0,0 +1,91 @@
+# Шаги /analyze, не зависящие от веб-фреймворка: проверка параметров, запуск анализа, ответ и ошибки.
+# Используются обработчиками Flask (app.py) и ASGI (asgi.py), поэтому пути не расходятся.
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from services.admission import AdmissionRejected
+from services.chunked_upload import UploadError
+
+
+class AnalyzeRequestError(Exception):
+    """Некорректный запрос /analyze: текст для клиента и HTTP-статус"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_law_types(value: str) -> List[str]:
+    """law_type запроса → список законов: 'all' или через запятую ('44_fz,223_fz') — проверка по нескольким"""
+    if value == 'all':
+        return list(Config.LAW_TYPES)
+    law_types = list(dict.fromkeys(part.strip() for part in value.split(',') if part.strip()))
+    if len(law_types) <= 1:
+        return law_types or [value]
+
+    unknown = [law_type for law_type in law_types if law_type not in Config.LAW_TYPES]
+    if unknown:
+        raise AnalyzeRequestError(f"Неизвестный тип закона: {', '.join(unknown)}")
+    return law_types
+
+
+def parse_analyze_request(fields, filename: Optional[str]) -> Dict[str, Any]:
+    """Поля формы или JSON /analyze; filename — имя переданного файла (None — файл не передан)"""
+    request = {
+        'upload_id': fields.get('upload_id'),
+        'law_types': parse_law_types(fields.get('law_type', '44_fz')),
+        'suppliers': str(fields.get('suppliers', 'true')).lower() != 'false'
+    }
+    if request['upload_id']:
+        return request
+
+    if filename is None:
+        raise AnalyzeRequestError('Файл не загружен')
+    if filename == '':
+        raise AnalyzeRequestError('Файл не выбран')
+    if '.' not in filename or filename.rsplit('.', 1)[1].lower() not in Config.ALLOWED_EXTENSIONS:
+        raise AnalyzeRequestError('Неверный формат файла')
+    return request
+
+
+def run_analysis(contract_analyzer, contract_text: str, law_types: List[str], filename: str,
+                 priority: int = 0, user: Optional[str] = None) -> Dict[str, Any]:
+    """Анализ по одному закону или по нескольким за один проход"""
+    if len(law_types) > 1:
+        return contract_analyzer.analyze_laws(contract_text, law_types, filename, priority=priority, user=user)
+    return contract_analyzer.analyze_contract(contract_text, law_types[0], filename, priority=priority, user=user)
+
+
+async def arun_analysis(contract_analyzer, contract_text: str, law_types: List[str], filename: str,
+                        priority: int = 0, user: Optional[str] = None) -> Dict[str, Any]:
+    """run_analysis для async-обработчиков"""
+    if len(law_types) > 1:
+        return await contract_analyzer.aanalyze_laws(contract_text, law_types, filename,
+                                                     priority=priority, user=user)
+    return await contract_analyzer.aanalyze_contract(contract_text, law_types[0], filename,
+                                                     priority=priority, user=user)
+
+
+def analysis_response(law_types: List[str], filename: str, result: Dict[str, Any],
+                      suppliers: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    response = {
+        'status': 'success',
+        'law_type': ','.join(law_types),
+        'filename': filename,
+        'analysis': result
+    }
+    if suppliers is not None:
+        response['suppliers'] = suppliers
+    return response
+
+
+def error_response(error: Exception) -> Tuple[int, Dict[str, Any], Dict[str, str]]:
+    """Ошибка /analyze → (HTTP-статус, тело ответа, заголовки)"""
+    if isinstance(error, AdmissionRejected):
+        return 429, {'error': str(error), 'retry_after': error.retry_after}, {'Retry-After': str(error.retry_after)}
+    if isinstance(error, UploadError):
+        return error.status_code, {'error': str(error)}, \
+            {'Retry-After': str(error.retry_after)} if error.retry_after else {}
+    if isinstance(error, AnalyzeRequestError):
+        return error.status_code, {'error': str(error)}, {}
+    return 500, {'error': f'Ошибка анализа: {str(error)}'}, {}
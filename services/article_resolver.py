@@ -0,0 +1,162 @@
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from database.db_connection import Database
+from services.law_snapshot import get_snapshot
+
+logger = logging.getLogger(__name__)
+
+NUMBER = r'(\d+(?:\.\d+)*)'
+
+REFERENCE_PATTERN = re.compile(
+    rf'(?<![а-яё])(?P<kind>стать[а-яё]*|ст\.?|част[а-яё]*|ч\.|пункт[а-яё]*|пп?\.|подпункт[а-яё]*)\s*{NUMBER}',
+    re.IGNORECASE
+)
+BARE_NUMBER_PATTERN = re.compile(rf'^\s*{NUMBER}')
+
+
+class ArticleResolver:
+    """Связывает ссылки на статьи/части/пункты в замечаниях с текстом закона"""
+
+    EXCERPT_LENGTH = 700
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or Database()
+
+    @staticmethod
+    def parse_references(text: Optional[str]) -> List[Dict[str, Optional[str]]]:
+        """Разбирает строку вида 'ч. 2 ст. 34' или 'Статья 34, часть 13.1, пункт 3'"""
+        if not text:
+            return []
+
+        references = []
+        pending = {'part': None, 'point': None}
+
+        for match in REFERENCE_PATTERN.finditer(text):
+            kind = match.group('kind').lower()
+            number = match.group(2)
+
+            if kind.startswith('ст'):
+                references.append({'article': number, 'part': pending['part'], 'point': pending['point']})
+                pending = {'part': None, 'point': None}
+                continue
+
+            key = 'part' if kind.startswith('ч') else 'point'
+            if references and references[-1][key] is None and pending['part'] is None and pending['point'] is None:
+                references[-1][key] = number
+            else:
+                pending[key] = number
+
+        if not references:
+            bare = BARE_NUMBER_PATTERN.match(text)
+            if bare:
+                references.append({'article': bare.group(1), 'part': pending['part'], 'point': pending['point']})
+
+        return references
+
+    @classmethod
+    def primary_article(cls, text: Optional[str]) -> Optional[str]:
+        """Номер первой упомянутой статьи"""
+        references = cls.parse_references(text)
+        return references[0]['article'] if references else None
+
+    def resolve(self, issues: List[Dict[str, Any]], law_type: str) -> List[Dict[str, Any]]:
+        """Добавляет к каждому замечанию 'references' с выдержками из закона (один запрос к БД)"""
+        parsed = [self.parse_references(issue.get('article')) if isinstance(issue, dict) else []
+                  for issue in issues]
+        numbers = sorted({reference['article'] for references in parsed for reference in references})
+
+        if not numbers:
+            return issues
+
+        articles = self._fetch_articles(law_type, numbers)
+
+        for issue, references in zip(issues, parsed):
+            if not references:
+                continue
+            issue['references'] = [self._attach_excerpt(reference, articles.get(reference['article']))
+                                   for reference in references]
+
+        return issues
+
+    def _fetch_articles(self, law_type: str, numbers: List[str]) -> Dict[str, Dict[str, str]]:
+        """Загружает все нужные статьи одним запросом в словарь номер → статья"""
+        snapshot = get_snapshot()
+        if snapshot is not None and law_type in snapshot.law_types():
+            return snapshot.get_articles(law_type, numbers)
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            placeholders = ', '.join('?' for _ in numbers)
+            cursor.execute(f'''
+                SELECT article_number, title, content
+                FROM law_articles
+                WHERE law_type = ? AND article_number IN ({placeholders})
+            ''', [law_type] + numbers)
+            return {row['article_number']: dict(row) for row in cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"❌ Ошибка загрузки статей для ссылок: {e}")
+            return {}
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _attach_excerpt(self, reference: Dict[str, Optional[str]], article: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        resolved = dict(reference)
+
+        if not article:
+            resolved['found'] = False
+            return resolved
+
+        content = re.sub(r'[ \t\xa0]+', ' ', article['content'] or '')
+        excerpt, scope = self.extract_excerpt(content, reference.get('part'), reference.get('point'))
+
+        resolved.update({
+            'found': True,
+            'title': article['title'] or self._title_from_content(content),
+            'excerpt': excerpt,
+            'excerpt_scope': scope
+        })
+        return resolved
+
+    @classmethod
+    def extract_excerpt(cls, content: str, part: Optional[str], point: Optional[str]):
+        """Вырезает из статьи текст части/пункта; если их нет в тексте — начало статьи"""
+        scope = 'article'
+        excerpt = content
+
+        if part:
+            section = cls._slice_numbered(excerpt, rf'{re.escape(part)}\.', r'\d+(?:\.\d+)*\.')
+            if section is not None:
+                excerpt, scope = section, 'part'
+
+        if point:
+            section = cls._slice_numbered(excerpt, rf'{re.escape(point)}\)', r'\d+(?:\.\d+)*\)')
+            if section is not None:
+                excerpt, scope = section, 'point'
+
+        excerpt = excerpt.strip(' \n.') if scope == 'article' else excerpt.strip()
+        if len(excerpt) > cls.EXCERPT_LENGTH:
+            excerpt = excerpt[:cls.EXCERPT_LENGTH].rsplit(' ', 1)[0] + '…'
+
+        return excerpt, scope
+
+    @staticmethod
+    def _slice_numbered(text: str, marker: str, next_marker: str) -> Optional[str]:
+        """Текст от строки, начинающейся с marker, до следующей нумерованной строки"""
+        start = re.search(rf'(?:^|\n)\s*{marker}\s', text)
+        if not start:
+            return None
+
+        body_start = start.end()
+        end = re.search(rf'\n\s*{next_marker}\s', text[body_start:])
+        body_end = body_start + end.start() if end else len(text)
+        return text[start.start():body_end]
+
+    @staticmethod
+    def _title_from_content(content: str) -> str:
+        first_line = content.strip().split('\n', 1)[0]
+        return first_line.strip(' .')[:200]
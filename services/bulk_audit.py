@@ -0,0 +1,233 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+from config import Config
+from database.db_connection import Database
+from services.admission import AdmissionController, set_llm_admission
+from utils.file_utils import extract_text, extraction_pool
+
+logger = logging.getLogger(__name__)
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_contracts(directory: str) -> Iterator[str]:
+    """Файлы контрактов допустимых форматов во всех подкаталогах, в стабильном порядке"""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.rsplit('.', 1)[-1].lower() in Config.ALLOWED_EXTENSIONS:
+                yield os.path.join(root, name)
+
+
+class BulkAudit:
+    """Пакетная проверка архива контрактов с возобновлением после остановки.
+
+    Текст извлекается в пуле процессов, анализ идет в пуле потоков; число
+    одновременных обращений к GigaChat ограничивает контроллер допуска
+    с лимитами пакетного режима (очередь без отказов).
+    Результаты дописываются в JSONL, а хэши готовых файлов — в файл
+    контрольной точки, поэтому повторный запуск пропускает уже проверенное.
+    """
+
+    # в пакетном режиме запросы ждут своей очереди, а не получают отказ
+    QUEUE_SIZE = 1 << 20
+    QUEUE_TIMEOUT = 24 * 3600
+
+    def __init__(self, law_type: str, output_path: str, workers: int, extract_workers: int,
+                 checkpoint_path: str = None, llm_concurrency: int = None, screen_concurrency: int = None):
+        self.law_type = law_type
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+        self.workers = max(1, workers)
+        self.extract_workers = max(1, extract_workers)
+        self.llm_concurrency = llm_concurrency or Config.LLM_MAX_CONCURRENT
+        self.screen_concurrency = screen_concurrency or Config.LLM_SCREEN_MAX_CONCURRENT
+        self.stats = {'processed': 0, 'skipped': 0, 'errors': 0}
+
+    def load_checkpoint(self) -> Set[str]:
+        done = set()
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as file:
+                for line in file:
+                    key = line.split('\t', 1)[0].strip()
+                    if key:
+                        done.add(key)
+        except FileNotFoundError:
+            pass
+        return done
+
+    def admission_controllers(self) -> Dict[str, AdmissionController]:
+        """Контроллеры допуска обоих уровней моделей: каскад ставит в очередь быстрой модели
+        до workers × разделов запросов одновременно"""
+        return {
+            'full': AdmissionController(self.llm_concurrency, self.QUEUE_SIZE, self.QUEUE_TIMEOUT),
+            'screen': AdmissionController(self.screen_concurrency, self.QUEUE_SIZE, self.QUEUE_TIMEOUT)
+        }
+
+    def checkpoint_key(self, sha256: str) -> str:
+        return f"{sha256}:{self.law_type}"
+
+    def run(self, directory: str) -> Dict[str, Any]:
+        from services.contract_analyzer import ContractAnalyzer
+
+        done = self.load_checkpoint()
+        pending: List[Tuple[str, str]] = []
+        for path in find_contracts(directory):
+            sha256 = file_hash(path)
+            if self.checkpoint_key(sha256) in done:
+                self.stats['skipped'] += 1
+            else:
+                pending.append((path, sha256))
+
+        logger.info(f"📂 Найдено к проверке: {len(pending)}, пропущено по контрольной точке: {self.stats['skipped']}")
+        if not pending:
+            return self.stats
+
+        for tier, controller in self.admission_controllers().items():
+            set_llm_admission(tier, controller)
+        analyzer = ContractAnalyzer()
+        started = time.monotonic()
+
+        with open(self.output_path, 'a', encoding='utf-8') as output, \
+                open(self.checkpoint_path, 'a', encoding='utf-8') as checkpoint, \
+                extraction_pool(self.extract_workers) as extract_pool, \
+                ThreadPoolExecutor(max_workers=self.workers) as analyze_pool:
+
+            queue = iter(pending)
+            extracting = {}
+            analyzing = {}
+
+            def refill():
+                # извлеченные тексты не копятся в памяти быстрее, чем идет анализ
+                while len(extracting) + len(analyzing) < self.workers * 2:
+                    item = next(queue, None)
+                    if item is None:
+                        return
+                    extracting[extract_pool.submit(extract_text, item[0])] = item
+
+            try:
+                refill()
+                while extracting or analyzing:
+                    finished, _ = wait(list(extracting) + list(analyzing), return_when=FIRST_COMPLETED)
+
+                    for future in finished:
+                        if future in extracting:
+                            path, sha256 = extracting.pop(future)
+                            try:
+                                text = future.result()
+                            except Exception as e:
+                                self._write(output, checkpoint, path, sha256, error=f"Ошибка извлечения текста: {e}")
+                                continue
+                            analyzing[analyze_pool.submit(self._analyze, analyzer, path, text)] = (path, sha256)
+                        else:
+                            path, sha256 = analyzing.pop(future)
+                            try:
+                                result, elapsed = future.result()
+                            except Exception as e:
+                                self._write(output, checkpoint, path, sha256, error=f"Ошибка анализа: {e}")
+                                continue
+                            self._write(output, checkpoint, path, sha256, result=result, elapsed=elapsed)
+
+                    refill()
+            except KeyboardInterrupt:
+                for future in list(extracting) + list(analyzing):
+                    future.cancel()
+                raise
+
+        elapsed = time.monotonic() - started
+        self.stats['elapsed_seconds'] = round(elapsed, 1)
+        self.stats['files_per_minute'] = round(self.stats['processed'] * 60 / elapsed, 1) if elapsed else None
+        return self.stats
+
+    def _analyze(self, analyzer, path: str, text: str):
+        started = time.monotonic()
+        result = analyzer.analyze_contract(text, self.law_type, os.path.basename(path))
+        return result, time.monotonic() - started
+
+    def _write(self, output, checkpoint, path: str, sha256: str, result: Dict[str, Any] = None,
+               elapsed: float = None, error: str = None):
+        """Пишет строку результата; контрольная точка — только для успешно проверенных файлов"""
+        failed = error is not None or result.get('compliance_status') in ('ошибка', 'ошибка анализа')
+        record = {
+            'path': path,
+            'sha256': sha256,
+            'law_type': self.law_type,
+            'status': 'error' if failed else 'ok'
+        }
+        if error is not None:
+            record['error'] = error
+        else:
+            record.update({
+                'analysis_id': result.get('analysis_id'),
+                'compliance_status': result.get('compliance_status'),
+                'issues_count': len(result.get('issues', [])),
+                'elapsed_seconds': round(elapsed, 2),
+                'analysis': result
+            })
+
+        output.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        output.flush()
+
+        if failed:
+            self.stats['errors'] += 1
+            logger.warning(f"⚠️ {path}: {error or result.get('summary')}")
+            return
+
+        checkpoint.write(f"{self.checkpoint_key(sha256)}\t{path}\n")
+        checkpoint.flush()
+        self.stats['processed'] += 1
+        logger.info(f"✅ {path}: {record['compliance_status']}, замечаний {record['issues_count']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Пакетная проверка каталога контрактов (PDF/DOCX)')
+    parser.add_argument('directory', help='Каталог с контрактами')
+    parser.add_argument('--law', default='44_fz', choices=['44_fz', '223_fz'], help='Тип закона')
+    parser.add_argument('--output', default='audit_results.jsonl', help='Файл результатов JSONL')
+    parser.add_argument('--checkpoint', help='Файл контрольной точки (по умолчанию <output>.checkpoint)')
+    parser.add_argument('--llm-concurrency', type=int, default=Config.LLM_MAX_CONCURRENT,
+                        help='Одновременных обращений к GigaChat')
+    parser.add_argument('--screen-concurrency', type=int, default=Config.LLM_SCREEN_MAX_CONCURRENT,
+                        help='Одновременных обращений к быстрой модели каскада')
+    parser.add_argument('--workers', type=int, help='Потоков анализа (по умолчанию 2 × llm-concurrency)')
+    parser.add_argument('--extract-workers', type=int, default=os.cpu_count() or 1,
+                        help='Процессов извлечения текста')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    Database().init_db()
+
+    if not os.path.isdir(args.directory):
+        print(f"❌ Каталог не найден: {args.directory}")
+        sys.exit(1)
+
+    audit = BulkAudit(args.law, args.output, args.workers or args.llm_concurrency * 2,
+                      args.extract_workers, args.checkpoint,
+                      llm_concurrency=args.llm_concurrency, screen_concurrency=args.screen_concurrency)
+    try:
+        stats = audit.run(args.directory)
+    except KeyboardInterrupt:
+        print("⏹️ Остановлено, при повторном запуске проверка продолжится с контрольной точки")
+        sys.exit(130)
+
+    print(f"✅ Проверено: {stats['processed']}, пропущено: {stats['skipped']}, ошибок: {stats['errors']}")
+    if stats.get('files_per_minute') is not None:
+        print(f"⏱️ {stats['elapsed_seconds']} с, {stats['files_per_minute']} файлов/мин")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+import argparse
+import csv
+import io
+import logging
+import os
+import sys
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import Config
+from database.db_connection import Database
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# наборы данных: колонки (имя, тип, выражение SQL) и фильтры (параметр → условие)
+DATASETS = {
+    'suppliers': {
+        'source': 'suppliers s LEFT JOIN supplier_dim d ON d.id = s.supplier_id',
+        'order': 's.id',
+        'columns': (
+            ('id', 'int', 's.id'),
+            ('supplier_id', 'int', 's.supplier_id'),
+            ('bin', 'string', 'd.bin'),
+            ('name', 'string', 's.name'),
+            ('purchase_method', 'string', 's.purchase_method'),
+            ('category', 'string', 's.category'),
+            ('rank', 'int', 's.rank'),
+            ('rating', 'float', 's.rating'),
+            ('contracts_count', 'int', 's.contracts_count'),
+            ('total_sum', 'float', 's.total_sum'),
+            ('is_real_time', 'bool', 's.is_real_time'),
+            ('last_updated', 'timestamp', 's.last_updated'),
+        ),
+        'filters': {
+            'purchase_method': 's.purchase_method = ?',
+            'category': 's.category = ?',
+            'date_from': 's.last_updated >= ?',
+            'date_to': 's.last_updated < ?',
+        },
+    },
+    'analyses': {
+        'source': 'contract_analysis a',
+        'order': 'a.id',
+        'columns': (
+            ('id', 'int', 'a.id'),
+            ('filename', 'string', 'a.filename'),
+            ('law_type', 'string', 'a.law_type'),
+            ('compliance_status', 'string', 'a.compliance_result'),
+            ('issues_count', 'int', 'a.issues_count'),
+            ('summary', 'string', 'a.recommendations'),
+            ('text_length', 'int', 'a.text_length'),
+            ('corpus_version', 'int', 'a.corpus_version'),
+            ('llm_calls', 'int', 'a.llm_calls'),
+            ('prompt_tokens', 'int', 'a.prompt_tokens'),
+            ('completion_tokens', 'int', 'a.completion_tokens'),
+            ('cached_tokens', 'int', 'a.cached_tokens'),
+            ('total_tokens', 'int', 'a.total_tokens'),
+            ('llm_cost', 'float', 'a.llm_cost'),
+            ('analyzed_at', 'timestamp', 'a.analyzed_at'),
+        ),
+        'filters': {
+            'law_type': 'a.law_type = ?',
+            'status': 'a.compliance_result = ?',
+            'date_from': 'a.analyzed_at >= ?',
+            'date_to': 'a.analyzed_at < ?',
+        },
+    },
+    # замечания анализов по одному в строке: удобнее для сводных таблиц, чем JSON в contract_analysis
+    'issues': {
+        'source': 'analysis_issues i',
+        'order': 'i.analysis_id, i.position',
+        'columns': (
+            ('analysis_id', 'int', 'i.analysis_id'),
+            ('position', 'int', 'i.position'),
+            ('law_type', 'string', 'i.law_type'),
+            ('compliance_status', 'string', 'i.status'),
+            ('article', 'string', 'i.article'),
+            ('article_number', 'string', 'i.article_number'),
+            ('issue', 'string', 'i.issue'),
+            ('recommendation', 'string', 'i.recommendation'),
+            ('analyzed_at', 'timestamp', 'i.analyzed_at'),
+        ),
+        'filters': {
+            'law_type': 'i.law_type = ?',
+            'status': 'i.status = ?',
+            'date_from': 'i.analyzed_at >= ?',
+            'date_to': 'i.analyzed_at < ?',
+        },
+    },
+}
+
+FORMATS = {
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+    'csv': ('csv', 'text/csv'),
+}
+
+FILTER_NAMES = ('purchase_method', 'category', 'law_type', 'status', 'date_from', 'date_to')
+
+
+class ExportError(Exception):
+    """Неверные параметры выгрузки (HTTP 400)"""
+
+
+def _convert(values, kind: str):
+    """Значения колонки к типу выгрузки: SQLite отдает BOOLEAN числом, TIMESTAMP в обоих бэкендах — строкой (UTC)"""
+    if kind == 'bool':
+        return [None if value is None else bool(value) for value in values]
+    if kind == 'timestamp':
+        return [datetime.fromisoformat(value) if isinstance(value, str) else value for value in values]
+    return values
+
+
+class _Sink:
+    """Файлоподобный буфер: писатель pyarrow пишет в него, генератор забирает байты после каждой пачки"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _ArrowEncoder:
+    """Пачка строк → группа строк Parquet или record batch Arrow IPC (файловый формат)"""
+
+    def __init__(self, columns, fmt: str):
+        self.columns = columns
+        types = {
+            'int': pa.int64(),
+            'float': pa.float64(),
+            'bool': pa.bool_(),
+            'string': pa.string(),
+            'timestamp': pa.timestamp('ms', tz='UTC'),
+        }
+        self.schema = pa.schema([(name, types[kind]) for name, kind, _ in columns])
+        self._sink = _Sink()
+        self._file = pa.PythonFile(self._sink, mode='w')
+        if fmt == 'parquet':
+            self._writer = pq.ParquetWriter(self._file, self.schema, compression=Config.EXPORT_PARQUET_COMPRESSION)
+        else:
+            self._writer = pa.ipc.new_file(self._file, self.schema)
+
+    def encode(self, rows: List[tuple]) -> bytes:
+        arrays = [pa.array(_convert(values, kind), type=field.type)
+                  for values, (_, kind, _), field in zip(zip(*rows), self.columns, self.schema)]
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        # футер Parquet/Arrow с метаданными пишется при закрытии
+        self._writer.close()
+        return self._sink.drain()
+
+
+class _CsvEncoder:
+    def __init__(self, columns):
+        self.columns = columns
+        self._header = [name for name, _, _ in columns]
+        self._bools = any(kind == 'bool' for _, kind, _ in columns)
+
+    def encode(self, rows: List[tuple]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if self._header:
+            writer.writerow(self._header)
+            self._header = None
+        if self._bools and rows:
+            rows = zip(*[_convert(values, kind) if kind == 'bool' else values
+                         for values, (_, kind, _) in zip(zip(*rows), self.columns)])
+        # TIMESTAMP уже строка 'YYYY-MM-DD HH:MM:SS'
+        writer.writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+
+    def finish(self) -> bytes:
+        # пустая выгрузка: только заголовок
+        return self.encode([]) if self._header else b''
+
+
+class BulkExporter:
+    """Потоковая выгрузка поставщиков и истории анализов в Parquet, Arrow IPC или CSV.
+
+    Строки читаются курсором БД пачками по EXPORT_BATCH_ROWS (в PostgreSQL — серверным),
+    каждая пачка сразу кодируется и отдается: память не зависит от размера выгрузки.
+    """
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or Database()
+
+    @staticmethod
+    def formats() -> List[str]:
+        """Доступные форматы: Parquet и Arrow требуют pyarrow"""
+        return list(FORMATS) if pa is not None else ['csv']
+
+    def prepare(self, dataset: str, fmt: str = None, filters: Dict[str, str] = None) -> Dict[str, Any]:
+        """Проверяет параметры до начала передачи: ошибки возвращаются ответом 400, а не обрывом потока"""
+        spec = DATASETS.get(dataset)
+        if spec is None:
+            raise ExportError(f"Неизвестный набор данных: {dataset} (доступны: {', '.join(DATASETS)})")
+
+        fmt = (fmt or self.formats()[0]).lower()
+        if fmt not in FORMATS:
+            raise ExportError(f"Неизвестный формат: {fmt} (доступны: {', '.join(FORMATS)})")
+        if fmt not in self.formats():
+            raise ExportError(f"Формат {fmt} недоступен: установите pyarrow (pip install pyarrow) или укажите format=csv")
+
+        conditions = []
+        params = []
+        for name, value in (filters or {}).items():
+            if value in (None, ''):
+                continue
+            if name not in spec['filters']:
+                raise ExportError(f"Фильтр {name} не поддерживается для набора {dataset}")
+            if name in ('date_from', 'date_to'):
+                value = self._date_bound(value, inclusive_end=name == 'date_to')
+            conditions.append(spec['filters'][name])
+            params.append(value)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        extension, mimetype = FORMATS[fmt]
+        return {
+            'dataset': dataset,
+            'format': fmt,
+            'filename': f"{dataset}_{date.today():%Y%m%d}.{extension}",
+            'mimetype': mimetype,
+            'columns': spec['columns'],
+            'sql': f"SELECT {', '.join(expression for _, _, expression in spec['columns'])} "
+                   f"FROM {spec['source']} {where} ORDER BY {spec['order']}",
+            'params': params,
+        }
+
+    def stream(self, export: Dict[str, Any], stats: Dict[str, int] = None) -> Iterator[bytes]:
+        """Байты файла по мере чтения пачек; stats['rows'] — число выгруженных строк"""
+        stats = stats if stats is not None else {}
+        stats['rows'] = 0
+        columns = export['columns']
+        encoder = _CsvEncoder(columns) if export['format'] == 'csv' else _ArrowEncoder(columns, export['format'])
+
+        conn = self.db.get_connection()
+        cursor = Database.stream_cursor(conn, f"export_{export['dataset']}")
+
+        try:
+            cursor.execute(export['sql'], export['params'])
+            while True:
+                rows = cursor.fetchmany(Config.EXPORT_BATCH_ROWS)
+                if not rows:
+                    break
+                stats['rows'] += len(rows)
+                chunk = encoder.encode(rows)
+                if chunk:
+                    yield chunk
+            yield encoder.finish()
+            logger.info(f"📤 Выгрузка {export['dataset']} ({export['format']}): {stats['rows']} строк")
+        finally:
+            cursor.close()
+            conn.close()
+
+    def export_to_file(self, export: Dict[str, Any], path: str) -> int:
+        """Пишет выгрузку в файл (через временный файл) и возвращает число строк"""
+        stats = {}
+        temp_path = f"{path}.part"
+        try:
+            with open(temp_path, 'wb') as f:
+                for chunk in self.stream(export, stats):
+                    f.write(chunk)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return stats['rows']
+
+    @staticmethod
+    def _date_bound(value: str, inclusive_end: bool) -> str:
+        """YYYY-MM-DD → граница для сравнения с TIMESTAMP; date_to включает весь день"""
+        try:
+            day = date.fromisoformat(value)
+        except ValueError:
+            raise ExportError('Дата должна быть в формате YYYY-MM-DD')
+        if inclusive_end:
+            day += timedelta(days=1)
+        return f"{day.isoformat()} 00:00:00"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Выгрузка поставщиков и истории анализов (Parquet, Arrow IPC, CSV)')
+    parser.add_argument('dataset', choices=list(DATASETS), help='Набор данных')
+    parser.add_argument('--format', choices=list(FORMATS),
+                        help='Формат файла (по умолчанию parquet, без pyarrow — csv)')
+    parser.add_argument('--output', help='Файл результата (по умолчанию <набор>_<дата>.<формат>)')
+    parser.add_argument('--purchase-method', help='Способ закупки (suppliers)')
+    parser.add_argument('--category', help='Категория (suppliers)')
+    parser.add_argument('--law-type', choices=['44_fz', '223_fz'], help='Тип закона (analyses, issues)')
+    parser.add_argument('--status', help='Статус соответствия (analyses, issues)')
+    parser.add_argument('--date-from', help='С даты, YYYY-MM-DD')
+    parser.add_argument('--date-to', help='По дату включительно, YYYY-MM-DD')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    Database().init_db()
+
+    exporter = BulkExporter()
+    try:
+        export = exporter.prepare(args.dataset, args.format,
+                                  {name: getattr(args, name) for name in FILTER_NAMES})
+    except ExportError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    path = args.output or export['filename']
+    rows = exporter.export_to_file(export, path)
+    print(f"✅ Выгружено строк: {rows} → {path} ({os.path.getsize(path) / 1024 / 1024:.1f} МБ)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,514 @@
+import hashlib
+import logging
+import math
+import os
+import re
+import secrets
+import shutil
+import threading
+import uuid
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from config import Config
+from database.db_connection import Database
+from utils.file_utils import extract_text, extraction_pool
+
+logger = logging.getLogger(__name__)
+
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    """Ошибка загрузки по частям с HTTP-статусом для ответа"""
+
+    def __init__(self, message: str, status_code: int = 400, retry_after: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def _extraction_pool() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = extraction_pool(Config.UPLOAD_EXTRACT_WORKERS)
+        return _executor
+
+
+def _reset_pool_after_fork():
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+
+class ChunkedUploads:
+    """Загрузка больших файлов частями с возобновлением.
+
+    Каждая часть проверяется по SHA-256 и хранится отдельным файлом, поэтому
+    после обрыва клиент запрашивает статус и досылает только недостающие части.
+    Собранные файлы лежат в хранилище по SHA-256 содержимого: повторная загрузка
+    того же файла не нужна, а текст извлекается один раз в фоне сразу после сборки.
+    Знать SHA-256 недостаточно: клиент подтверждает, что файл у него есть, хэшем
+    фрагмента, который выбирает сервер, вместе с одноразовым nonce.
+    """
+
+    TEXT_CODEC = 'zlib'
+    COMPRESSION_LEVEL = 6
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or Database()
+        self.parts_dir = os.path.join(Config.UPLOAD_FOLDER, 'parts')
+        self.store_dir = os.path.join(Config.UPLOAD_FOLDER, 'store')
+        os.makedirs(self.parts_dir, exist_ok=True)
+        os.makedirs(self.store_dir, exist_ok=True)
+        self._ensure_tables()
+
+    def _ensure_tables(self):
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            Database.create_upload_tables(cursor)
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def init(self, filename: str, size: int, sha256: str = None, chunk_size: int = None) -> Dict[str, Any]:
+        """Создает загрузку; если файл с таким SHA-256 уже есть, вместо передачи частей
+        выдается задание proof: SHA-256 от nonce и фрагмента файла (offset, length) для prove()
+        """
+        filename = os.path.basename(filename or '')
+        extension = self._extension(filename)
+        if extension not in Config.ALLOWED_EXTENSIONS:
+            raise UploadError('Неверный формат файла')
+        if not isinstance(size, int) or size <= 0:
+            raise UploadError('Размер файла должен быть положительным целым числом')
+        if size > Config.UPLOAD_MAX_SIZE:
+            raise UploadError(f'Файл больше {Config.UPLOAD_MAX_SIZE // (1024 * 1024)} МБ', 413)
+        if sha256 is not None:
+            sha256 = str(sha256).lower()
+            if not SHA256_PATTERN.match(sha256):
+                raise UploadError('sha256 должен содержать 64 шестнадцатеричных символа')
+
+        chunk_size = min(max(int(chunk_size or Config.UPLOAD_CHUNK_SIZE), Config.UPLOAD_MIN_CHUNK),
+                         Config.UPLOAD_MAX_CHUNK)
+        total_parts = math.ceil(size / chunk_size)
+        upload_id = uuid.uuid4().hex
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            self._purge_stale(cursor)
+
+            known = None
+            if sha256 is not None:
+                cursor.execute('SELECT size FROM contract_files WHERE sha256 = ?', (sha256,))
+                known = cursor.fetchone()
+            known_file = known is not None and known['size'] == size and \
+                os.path.exists(self._store_path(sha256, extension))
+            proof_offset = proof_length = proof_nonce = None
+            if known_file:
+                proof_length = min(size, Config.UPLOAD_PROOF_BYTES)
+                proof_offset = secrets.randbelow(size - proof_length + 1)
+                # без nonce для файла меньше фрагмента ответом был бы известный всем SHA-256 файла
+                proof_nonce = secrets.token_hex(16)
+
+            cursor.execute('''
+                INSERT INTO uploads (id, filename, size, chunk_size, total_parts, sha256, status,
+                                     proof_offset, proof_length, proof_nonce)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (upload_id, filename, size, chunk_size, total_parts, sha256,
+                  'verifying' if known_file else 'uploading', proof_offset, proof_length, proof_nonce))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+        os.makedirs(os.path.join(self.parts_dir, upload_id), exist_ok=True)
+        result = self.status(upload_id)
+        result['deduplicated'] = False
+        return result
+
+    def prove(self, upload_id: str, checksum: str) -> Dict[str, Any]:
+        """Проверяет SHA-256(nonce + байты фрагмента): при совпадении загрузка завершена без передачи файла.
+
+        Попытка одна: при несовпадении загрузка продолжается обычной передачей частей.
+        """
+        upload = self._get_upload(upload_id)
+        if upload['status'] != 'verifying':
+            raise UploadError('Для загрузки не требуется подтверждение', 409)
+
+        checksum = (checksum or '').lower()
+        if not SHA256_PATTERN.match(checksum):
+            raise UploadError('sha256 должен содержать 64 шестнадцатеричных символа')
+
+        extension = self._extension(upload['filename'])
+        digest = hashlib.sha256(upload['proof_nonce'].encode('ascii'))
+        try:
+            with open(self._store_path(upload['sha256'], extension), 'rb') as file:
+                file.seek(upload['proof_offset'])
+                digest.update(file.read(upload['proof_length']))
+            proven = secrets.compare_digest(digest.hexdigest(), checksum)
+        except OSError:
+            proven = False
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                UPDATE uploads SET status = ?, proof_offset = NULL, proof_length = NULL, proof_nonce = NULL,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status = 'verifying'
+            ''', ('complete' if proven else 'uploading', upload_id))
+            conn.commit()
+            if cursor.rowcount == 0:
+                raise UploadError('Для загрузки не требуется подтверждение', 409)
+        finally:
+            cursor.close()
+            conn.close()
+
+        if proven:
+            logger.info(f"♻️ Файл {upload['filename']} уже загружен ранее ({upload['sha256'][:12]}), передача не нужна")
+            self._discard_parts(upload_id)
+            self.start_extraction(upload['sha256'], extension)
+        else:
+            logger.warning(f"⚠️ Загрузка {upload_id}: фрагмент не совпал, файл нужно передать целиком")
+
+        result = self.status(upload_id)
+        result['deduplicated'] = proven
+        return result
+
+    def save_part(self, upload_id: str, index: int, chunks: Iterable[bytes], checksum: str) -> Dict[str, Any]:
+        """Принимает часть; повторная отправка той же части перезаписывает ее"""
+        upload = self._get_upload(upload_id)
+        if upload['status'] not in ('uploading', 'verifying'):
+            raise UploadError('Загрузка уже завершена', 409)
+        if not 0 <= index < upload['total_parts']:
+            raise UploadError(f"Номер части должен быть от 0 до {upload['total_parts'] - 1}")
+
+        checksum = (checksum or '').lower()
+        if not SHA256_PATTERN.match(checksum):
+            raise UploadError('Укажите SHA-256 части в заголовке X-Chunk-SHA256')
+
+        expected_size = upload['chunk_size'] if index < upload['total_parts'] - 1 else \
+            upload['size'] - upload['chunk_size'] * (upload['total_parts'] - 1)
+
+        part_path = self._part_path(upload_id, index)
+        os.makedirs(os.path.dirname(part_path), exist_ok=True)
+        temp_path = f"{part_path}.{uuid.uuid4().hex[:8]}.tmp"
+        digest = hashlib.sha256()
+        received = 0
+
+        try:
+            with open(temp_path, 'wb') as file:
+                for chunk in chunks:
+                    received += len(chunk)
+                    if received > expected_size:
+                        raise UploadError(f'Часть {index} больше ожидаемых {expected_size} байт')
+                    digest.update(chunk)
+                    file.write(chunk)
+
+            if received != expected_size:
+                raise UploadError(f'Часть {index}: получено {received} байт из {expected_size}')
+            if digest.hexdigest() != checksum:
+                raise UploadError(f'Контрольная сумма части {index} не совпадает')
+
+            os.replace(temp_path, part_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                INSERT INTO upload_parts (upload_id, part_index, size, sha256) VALUES (?, ?, ?, ?)
+                ON CONFLICT(upload_id, part_index) DO UPDATE SET size = excluded.size, sha256 = excluded.sha256
+            ''', (upload_id, index, received, checksum))
+            cursor.execute('UPDATE uploads SET updated_at = CURRENT_TIMESTAMP WHERE id = ?', (upload_id,))
+            cursor.execute('SELECT COUNT(*) FROM upload_parts WHERE upload_id = ?', (upload_id,))
+            received_parts = cursor.fetchone()[0]
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+        return {'index': index, 'size': received, 'received_parts': received_parts,
+                'total_parts': upload['total_parts']}
+
+    def complete(self, upload_id: str) -> Dict[str, Any]:
+        """Собирает файл из частей, проверяет SHA-256 целиком и запускает извлечение текста"""
+        upload = self._get_upload(upload_id)
+        if upload['status'] == 'complete':
+            return self.status(upload_id)
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('SELECT part_index FROM upload_parts WHERE upload_id = ? ORDER BY part_index', (upload_id,))
+            received = {row[0] for row in cursor.fetchall()}
+            missing = [index for index in range(upload['total_parts']) if index not in received]
+            if missing:
+                raise UploadError(f"Не загружены части: {', '.join(map(str, missing[:20]))}"
+                                  f"{' …' if len(missing) > 20 else ''}", 409)
+
+            # одновременный второй вызов complete не начнет сборку повторно
+            cursor.execute('''
+                UPDATE uploads SET status = 'assembling', proof_offset = NULL, proof_length = NULL, proof_nonce = NULL
+                WHERE id = ? AND status IN ('uploading', 'verifying')
+            ''', (upload_id,))
+            conn.commit()
+            if cursor.rowcount == 0:
+                raise UploadError('Файл уже собирается', 409)
+        finally:
+            cursor.close()
+            conn.close()
+
+        extension = self._extension(upload['filename'])
+        try:
+            sha256 = self._assemble(upload_id, upload['total_parts'], extension)
+        except Exception as e:
+            self._set_status(upload_id, 'uploading')
+            logger.error(f"❌ Ошибка сборки загрузки {upload_id}: {e}")
+            raise UploadError(f'Ошибка сборки файла: {e}', 500)
+
+        if upload['sha256'] and upload['sha256'] != sha256:
+            self._set_status(upload_id, 'failed')
+            self._discard_parts(upload_id)
+            raise UploadError('SHA-256 собранного файла не совпадает с заявленным, загрузите файл заново')
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                INSERT INTO contract_files (sha256, extension, size) VALUES (?, ?, ?)
+                ON CONFLICT(sha256) DO NOTHING
+            ''', (sha256, extension, upload['size']))
+            cursor.execute('''
+                UPDATE uploads SET status = 'complete', sha256 = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+            ''', (sha256, upload_id))
+            cursor.execute('DELETE FROM upload_parts WHERE upload_id = ?', (upload_id,))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+        self._discard_parts(upload_id)
+        logger.info(f"📦 Загрузка {upload['filename']} собрана ({upload['size']} байт, {sha256[:12]})")
+        self.start_extraction(sha256, extension)
+        return self.status(upload_id)
+
+    def status(self, upload_id: str) -> Dict[str, Any]:
+        """Состояние загрузки: полученные части (для возобновления) и готовность текста"""
+        upload = self._get_upload(upload_id)
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('SELECT part_index FROM upload_parts WHERE upload_id = ? ORDER BY part_index', (upload_id,))
+            received = [row[0] for row in cursor.fetchall()]
+            text_status = None
+            if upload['status'] == 'complete':
+                cursor.execute('SELECT text_status, error FROM contract_files WHERE sha256 = ?', (upload['sha256'],))
+                file_row = cursor.fetchone()
+                text_status = file_row['text_status'] if file_row else 'pending'
+        finally:
+            cursor.close()
+            conn.close()
+
+        result = {
+            'upload_id': upload['id'],
+            'filename': upload['filename'],
+            'size': upload['size'],
+            'chunk_size': upload['chunk_size'],
+            'total_parts': upload['total_parts'],
+            'received_parts': received if upload['status'] != 'complete' else list(range(upload['total_parts'])),
+            'status': upload['status'],
+            'sha256': upload['sha256'],
+            'text_status': text_status
+        }
+        if upload['status'] == 'verifying':
+            result['proof'] = {'offset': upload['proof_offset'], 'length': upload['proof_length'],
+                               'nonce': upload['proof_nonce']}
+        return result
+
+    def contract_text(self, upload_id: str) -> Tuple[str, str]:
+        """Имя файла и извлеченный текст завершенной загрузки"""
+        upload = self._get_upload(upload_id)
+        if upload['status'] != 'complete':
+            raise UploadError('Загрузка не завершена', 409)
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                SELECT extension, text_status, text_blob, text_codec, error FROM contract_files WHERE sha256 = ?
+            ''', (upload['sha256'],))
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+
+        if row is None:
+            raise UploadError('Файл загрузки не найден', 404)
+        if row['text_status'] == 'error':
+            raise UploadError(f"Не удалось извлечь текст: {row['error']}", 422)
+        if row['text_status'] != 'ready':
+            # извлечение могло не начаться, если процесс перезапускался
+            self.start_extraction(upload['sha256'], row['extension'])
+            raise UploadError('Текст еще извлекается, повторите запрос позже', 409, retry_after=5)
+
+        if row['text_codec'] != self.TEXT_CODEC:
+            raise UploadError(f"Неизвестный формат сжатия: {row['text_codec']}", 500)
+        return upload['filename'], zlib.decompress(row['text_blob']).decode('utf-8')
+
+    def start_extraction(self, sha256: str, extension: str):
+        """Ставит извлечение текста в пул процессов, если оно еще не выполнено и не идет"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            # зависшее извлечение (процесс перезапущен) повторяется по таймауту
+            cursor.execute('''
+                UPDATE contract_files SET text_status = 'extracting', extracted_at = CURRENT_TIMESTAMP
+                WHERE sha256 = ? AND (
+                    text_status = 'pending' OR
+                    (text_status = 'extracting' AND extracted_at < ?)
+                )
+            ''', (sha256, self._utc_before(seconds=Config.UPLOAD_EXTRACT_TIMEOUT)))
+            conn.commit()
+            started = cursor.rowcount > 0
+        finally:
+            cursor.close()
+            conn.close()
+
+        if not started:
+            return
+
+        future = _extraction_pool().submit(extract_text, self._store_path(sha256, extension))
+        future.add_done_callback(lambda done: self._store_text(sha256, done))
+
+    def _store_text(self, sha256: str, future):
+        try:
+            text = future.result()
+            values = ('ready', zlib.compress(text.encode('utf-8'), self.COMPRESSION_LEVEL), self.TEXT_CODEC,
+                      len(text), None)
+            logger.info(f"📄 Текст {sha256[:12]} извлечен: {len(text)} символов")
+        except Exception as e:
+            values = ('error', None, None, None, str(e))
+            logger.error(f"❌ Ошибка извлечения текста {sha256[:12]}: {e}")
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                UPDATE contract_files SET text_status = ?, text_blob = ?, text_codec = ?, text_length = ?, error = ?,
+                    extracted_at = CURRENT_TIMESTAMP
+                WHERE sha256 = ?
+            ''', (*values, sha256))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _assemble(self, upload_id: str, total_parts: int, extension: str) -> str:
+        """Склеивает части во временный файл хранилища и возвращает SHA-256 содержимого"""
+        digest = hashlib.sha256()
+        temp_path = os.path.join(self.store_dir, f"{upload_id}.tmp")
+
+        try:
+            with open(temp_path, 'wb') as target:
+                for index in range(total_parts):
+                    with open(self._part_path(upload_id, index), 'rb') as part:
+                        for block in iter(lambda: part.read(1024 * 1024), b''):
+                            digest.update(block)
+                            target.write(block)
+
+            sha256 = digest.hexdigest()
+            store_path = self._store_path(sha256, extension)
+            if os.path.exists(store_path):
+                os.remove(temp_path)
+            else:
+                os.replace(temp_path, store_path)
+            return sha256
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _purge_stale(self, cursor):
+        """Удаляет незавершенные загрузки, не обновлявшиеся UPLOAD_STALE_HOURS"""
+        cursor.execute('''
+            SELECT id FROM uploads
+            WHERE status IN ('uploading', 'verifying', 'failed')
+              AND updated_at < ?
+        ''', (self._utc_before(hours=Config.UPLOAD_STALE_HOURS),))
+        stale = [row[0] for row in cursor.fetchall()]
+        for upload_id in stale:
+            self._discard_parts(upload_id)
+            cursor.execute('DELETE FROM upload_parts WHERE upload_id = ?', (upload_id,))
+            cursor.execute('DELETE FROM uploads WHERE id = ?', (upload_id,))
+        if stale:
+            logger.info(f"🧹 Удалено незавершенных загрузок: {len(stale)}")
+
+    def _get_upload(self, upload_id: str):
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('SELECT * FROM uploads WHERE id = ?', (upload_id,))
+            upload = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+
+        if upload is None:
+            raise UploadError('Загрузка не найдена', 404)
+        return upload
+
+    def _set_status(self, upload_id: str, status: str):
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('UPDATE uploads SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+                           (status, upload_id))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _discard_parts(self, upload_id: str):
+        shutil.rmtree(os.path.join(self.parts_dir, upload_id), ignore_errors=True)
+
+    def _part_path(self, upload_id: str, index: int) -> str:
+        return os.path.join(self.parts_dir, upload_id, f"{index:06d}.part")
+
+    def _store_path(self, sha256: str, extension: str) -> str:
+        return os.path.join(self.store_dir, f"{sha256}.{extension}")
+
+    @staticmethod
+    def _utc_before(**delta) -> str:
+        """Момент в прошлом в формате CURRENT_TIMESTAMP (UTC) — для сравнения в SQLite и PostgreSQL"""
+        return (datetime.utcnow() - timedelta(**delta)).strftime('%Y-%m-%d %H:%M:%S')
+
+    @staticmethod
+    def _extension(filename: str) -> str:
+        return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
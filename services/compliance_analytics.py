@@ -0,0 +1,199 @@
+import logging
+import sys
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from database.db_connection import Database
+
+logger = logging.getLogger(__name__)
+
+
+class ComplianceAnalytics:
+    """Сводная аналитика по замечаниям, обновляемая инкрементально при сохранении анализа"""
+
+    MAX_LIMIT = 100
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or Database()
+
+    @staticmethod
+    def record(cursor, law_type: str, status: str, article_numbers: List[Optional[str]], analyzed_at: str):
+        """Учитывает один анализ в сводных таблицах (в транзакции вызывающего кода)"""
+        month = analyzed_at[:7]
+
+        cursor.execute('''
+            INSERT INTO analytics_status_monthly (law_type, month, status, analyses_count)
+            VALUES (?, ?, ?, 1)
+            ON CONFLICT(law_type, month, status) DO UPDATE SET
+                analyses_count = analytics_status_monthly.analyses_count + 1
+        ''', (law_type, month, status))
+
+        counts = Counter(number for number in article_numbers if number)
+        if not counts:
+            return
+
+        cursor.executemany('''
+            INSERT INTO analytics_article_monthly (law_type, month, article_number, issues_count)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(law_type, month, article_number) DO UPDATE SET
+                issues_count = analytics_article_monthly.issues_count + excluded.issues_count
+        ''', [(law_type, month, number, count) for number, count in counts.items()])
+
+        cursor.executemany('''
+            INSERT INTO analytics_article_totals (law_type, article_number, issues_count, last_seen)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(law_type, article_number) DO UPDATE SET
+                issues_count = analytics_article_totals.issues_count + excluded.issues_count,
+                last_seen = CASE WHEN analytics_article_totals.last_seen >= excluded.last_seen
+                                 THEN analytics_article_totals.last_seen ELSE excluded.last_seen END
+        ''', [(law_type, number, count, analyzed_at) for number, count in counts.items()])
+
+    def top_articles(self, law_type: str = None, month: str = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Статьи с наибольшим числом замечаний (за всё время или за месяц YYYY-MM)"""
+        limit = max(1, min(int(limit), self.MAX_LIMIT))
+
+        if month:
+            sql = '''
+                SELECT law_type, article_number, issues_count
+                FROM analytics_article_monthly
+                WHERE month = ?{law_filter}
+                ORDER BY issues_count DESC
+                LIMIT ?
+            '''
+            params = [month]
+        else:
+            sql = '''
+                SELECT law_type, article_number, issues_count, last_seen
+                FROM analytics_article_totals
+                WHERE 1 = 1{law_filter}
+                ORDER BY issues_count DESC
+                LIMIT ?
+            '''
+            params = []
+
+        if law_type:
+            sql = sql.format(law_filter=' AND law_type = ?')
+            params.append(law_type)
+        else:
+            sql = sql.format(law_filter='')
+
+        return self._fetch(sql, params + [limit])
+
+    def status_distribution(self, law_type: str = None, month: str = None) -> List[Dict[str, Any]]:
+        """Распределение статусов соответствия"""
+        conditions = []
+        params = []
+
+        if law_type:
+            conditions.append('law_type = ?')
+            params.append(law_type)
+        if month:
+            conditions.append('month = ?')
+            params.append(month)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        return self._fetch(f'''
+            SELECT status, SUM(analyses_count) AS analyses_count
+            FROM analytics_status_monthly
+            {where}
+            GROUP BY status
+            ORDER BY analyses_count DESC
+        ''', params)
+
+    def monthly_trend(self, law_type: str = None, article: str = None, months: int = 12) -> List[Dict[str, Any]]:
+        """Помесячная динамика: число анализов или замечаний по конкретной статье"""
+        months = max(1, min(int(months), 120))
+        params = []
+
+        if article:
+            table, value = 'analytics_article_monthly', 'issues_count'
+            conditions = ['article_number = ?']
+            params.append(article)
+        else:
+            table, value = 'analytics_status_monthly', 'analyses_count'
+            conditions = []
+
+        if law_type:
+            conditions.append('law_type = ?')
+            params.append(law_type)
+
+        today = date.today()
+        first = today.year * 12 + today.month - 1 - months
+        conditions.append('month > ?')
+        params.append(f"{first // 12:04d}-{first % 12 + 1:02d}")
+
+        return self._fetch(f'''
+            SELECT law_type, month, SUM({value}) AS count
+            FROM {table}
+            WHERE {' AND '.join(conditions)}
+            GROUP BY law_type, month
+            ORDER BY month, law_type
+        ''', params)
+
+    def rebuild(self) -> int:
+        """Пересчитывает сводные таблицы по всей истории (однократная миграция)"""
+        from services.analysis_history import AnalysisHistory  # analysis_history импортирует этот модуль
+
+        conn = self.db.get_connection()
+        read_cursor = Database.stream_cursor(conn, 'analytics_rebuild')
+        cursor = conn.cursor()
+        processed = 0
+
+        try:
+            cursor.execute('DELETE FROM analytics_article_totals')
+            cursor.execute('DELETE FROM analytics_article_monthly')
+            cursor.execute('DELETE FROM analytics_status_monthly')
+
+            read_cursor.execute('''
+                SELECT id, law_type, compliance_result, issues_found, analyzed_at
+                FROM contract_analysis
+                ORDER BY id
+            ''')
+
+            for row in read_cursor:
+                if row['issues_found'] is None:
+                    cursor.execute('SELECT article_number FROM analysis_issues WHERE analysis_id = ? ORDER BY position',
+                                   (row['id'],))
+                    numbers = [issue['article_number'] for issue in cursor.fetchall()]
+                else:
+                    issues = AnalysisHistory._parse_legacy_issues(row['issues_found'])
+                    numbers = [AnalysisHistory._article_number(issue.get('article'))
+                               for issue in issues if isinstance(issue, dict)]
+                self.record(cursor, row['law_type'] or 'unknown', row['compliance_result'] or 'не определен',
+                            numbers, str(row['analyzed_at']))
+                processed += 1
+
+            conn.commit()
+            logger.info(f"📊 Аналитика пересчитана: {processed} анализов")
+            return processed
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка пересчета аналитики: {e}")
+            conn.rollback()
+            raise
+        finally:
+            read_cursor.close()
+            cursor.close()
+            conn.close()
+
+    def _fetch(self, sql: str, params: List[Any]) -> List[Dict[str, Any]]:
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(sql, params)
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ['rebuild']:
+        print("Использование: python -m services.compliance_analytics rebuild")
+        sys.exit(1)
+
+    Database().init_db()
+    print(f"✅ Пересчитано анализов: {ComplianceAnalytics().rebuild()}")
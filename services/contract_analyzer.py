@@ -1,7 +1,19 @@
+from config import Config
 from database.db_connection import Database
+from services.admission import AdmissionRejected, get_llm_admission
+from services.analysis_history import AnalysisHistory
+from services.article_resolver import ArticleResolver
 from services.gigachat_service import GigaChatService
+from services.law_corpus_cache import format_article, format_law_header, get_corpus_cache
+from services.llm_usage import LlmUsage
+from services.model_cascade import STATUS_SEVERITY, ModelCascade
+from services.rule_engine import RuleEngine
 from utils.file_utils import FileProcessor
+from utils.text_cleaner import clean_contract_text
+import asyncio
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -9,8 +21,15 @@ logger = logging.getLogger(__name__)
 class ContractAnalyzer:
     def __init__(self):
         self.db = Database()
+        self.history = AnalysisHistory(self.db)
+        self.usage = LlmUsage(self.db)
+        self.article_resolver = ArticleResolver(self.db)
+        self.rule_engine = RuleEngine()
+        self.corpus_cache = get_corpus_cache()
+        self.admission = get_llm_admission()
         try:
             self.gigachat = GigaChatService()
+            self.cascade = ModelCascade(self.gigachat) if Config.CASCADE_ENABLED else None
             self.gigachat_available = True
         except Exception as e:
             logger.error(f"❌ GigaChat недоступен: {e}")
@@ -19,36 +38,115 @@ class ContractAnalyzer:
     def extract_text_from_contract(self, file_path, filename):
         return FileProcessor.extract_text_from_file(file_path, filename)
 
-    def get_law_articles(self, law_type):
+    def get_law_articles(self, law_type, corpus_version=None):
+        """Текст закона для промпта из кэша корпуса (перечитывается при смене версии)"""
+        return self.corpus_cache.formatted(law_type, corpus_version) or self.format_law_articles(law_type, [])
 
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+    @staticmethod
+    def format_law_articles(law_type, articles):
+        """Текст закона для промпта; строки вида (номер, заголовок, содержание)"""
+        return format_law_header(law_type) + "".join(format_article(*article) for article in articles)
 
-        cursor.execute('''
-            SELECT article_number, title, content
-            FROM law_articles 
-            WHERE law_type = ?
-            ORDER BY CAST(article_number AS FLOAT)
-        ''', (law_type,))
+    def analyze_contract(self, contract_text, law_type, filename, priority=0, user=None):
 
-        articles = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        context = self._prepare_analysis(contract_text, law_type)
+        return self._analyze_prepared(contract_text, law_type, filename, context, priority, user)
 
-        formatted_articles = f"ФЕДЕРАЛЬНЫЙ ЗАКОН {law_type.upper()}\n\n"
+    def analyze_laws(self, contract_text, law_types, filename, priority=0, user=None):
+        """Проверка по нескольким законам за один проход.
 
-        for article in articles:
-            formatted_articles += f"СТАТЬЯ {article[0]}\n"
-            formatted_articles += f"Заголовок: {article[1]}\n"
-            formatted_articles += f"Содержание: {article[2]}\n"
-            formatted_articles += "---\n\n"
+        Текст очищается один раз, статьи и правила берутся для каждого закона,
+        обращения к модели по законам идут параллельно; каждый анализ сохраняется в истории.
+        Ошибка по одному закону попадает в его раздел laws, а не в ответ целиком.
+        """
+        started = time.perf_counter()
+        prompt = self._prepare_prompt_text(contract_text)
+        contexts = {law_type: self._prepare_analysis(contract_text, law_type, prompt) for law_type in law_types}
 
-        return formatted_articles
+        with ThreadPoolExecutor(max_workers=len(law_types), thread_name_prefix='multi-law') as pool:
+            futures = {law_type: pool.submit(self._analyze_prepared, contract_text, law_type, filename,
+                                             contexts[law_type], priority, user)
+                       for law_type in law_types}
+            outcomes = {}
+            for law_type, future in futures.items():
+                try:
+                    outcomes[law_type] = future.result()
+                except Exception as e:
+                    outcomes[law_type] = e
 
-    def analyze_contract(self, contract_text, law_type, filename):
+        return self._combine_laws(self._law_results(outcomes), started)
 
-        if not self.gigachat_available:
-            return {
+    def _analyze_prepared(self, contract_text, law_type, filename, context, priority, user):
+        if 'error' in context:
+            return context['error']
+
+        prescreen = context['prescreen']
+        if Config.RULE_ENGINE_SKIP_LLM:
+            analysis_result = self._rules_only_result(prescreen)
+        elif self.cascade is not None:
+            analysis_result = self.cascade.analyze(context['prompt_text'], law_type, context['law_articles'],
+                                                   skip_areas=prescreen['covered_areas'],
+                                                   priority=priority, user=user)
+            self._merge_prescreen(analysis_result, prescreen)
+        else:
+            with self.admission.slot(priority=priority, user=user):
+                analysis_result = self.gigachat.analyze_contract(context['prompt_text'], context['law_articles'],
+                                                                 law_type, skip_areas=prescreen['covered_areas'])
+            self._merge_prescreen(analysis_result, prescreen)
+
+        return self._finish_analysis(contract_text, law_type, filename, analysis_result, context)
+
+    async def aanalyze_contract(self, contract_text, law_type, filename, priority=0, user=None):
+        """analyze_contract для async-обработчиков: ожидание GigaChat не занимает поток.
+
+        Работа с БД и CPU-этапы (правила, очистка текста) идут в пуле потоков;
+        каскад моделей остается синхронным и целиком выполняется в потоке.
+        """
+        context = await asyncio.to_thread(self._prepare_analysis, contract_text, law_type)
+        return await self._aanalyze_prepared(contract_text, law_type, filename, context, priority, user)
+
+    async def aanalyze_laws(self, contract_text, law_types, filename, priority=0, user=None):
+        """analyze_laws для async-обработчиков: законы проверяются параллельно в цикле событий"""
+        started = time.perf_counter()
+        prompt = await asyncio.to_thread(self._prepare_prompt_text, contract_text)
+        contexts = await asyncio.gather(*(asyncio.to_thread(self._prepare_analysis, contract_text, law_type, prompt)
+                                          for law_type in law_types))
+        outcomes = await asyncio.gather(*(self._aanalyze_prepared(contract_text, law_type, filename,
+                                                                  context, priority, user)
+                                          for law_type, context in zip(law_types, contexts)),
+                                        return_exceptions=True)
+        return self._combine_laws(self._law_results(dict(zip(law_types, outcomes))), started)
+
+    async def _aanalyze_prepared(self, contract_text, law_type, filename, context, priority, user):
+        if 'error' in context:
+            return context['error']
+
+        prescreen = context['prescreen']
+        if Config.RULE_ENGINE_SKIP_LLM:
+            analysis_result = self._rules_only_result(prescreen)
+        elif self.cascade is not None:
+            analysis_result = await asyncio.to_thread(
+                self.cascade.analyze, context['prompt_text'], law_type, context['law_articles'],
+                skip_areas=prescreen['covered_areas'], priority=priority, user=user)
+            self._merge_prescreen(analysis_result, prescreen)
+        else:
+            async with self.admission.aslot(priority=priority, user=user):
+                analysis_result = await self.gigachat.aanalyze_contract(
+                    context['prompt_text'], context['law_articles'], law_type,
+                    skip_areas=prescreen['covered_areas'])
+            self._merge_prescreen(analysis_result, prescreen)
+
+        return await asyncio.to_thread(self._finish_analysis, contract_text, law_type, filename,
+                                       analysis_result, context)
+
+    def _prepare_analysis(self, contract_text, law_type, prompt=None):
+        """Все, что нужно до вызова LLM; при невозможности анализа — готовый ответ в 'error'.
+
+        prompt — уже очищенный текст (prompt_text, cleaning), общий для нескольких законов.
+        """
+
+        if not self.gigachat_available and not Config.RULE_ENGINE_SKIP_LLM:
+            return {'error': {
                 "compliance_status": "ошибка",
                 "issues": [{
                     "article": "системная ошибка",
@@ -56,46 +154,126 @@ class ContractAnalyzer:
                     "recommendation": "Проверьте настройки системы"
                 }],
                 "summary": "GigaChat не подключен"
-            }
+            }}
 
 
-        law_articles = self.get_law_articles(law_type)
+        corpus_version = self.db.get_corpus_version()
+        law_articles = self.get_law_articles(law_type, corpus_version)
 
         if len(law_articles) < 50:
-            return {
+            return {'error': {
                 "compliance_status": "ошибка",
                 "issues": [],
                 "summary": f"Недостаточно статей в базе данных для {law_type}"
-            }
+            }}
+
+
+        if not Config.RULE_ENGINE_SKIP_LLM:
+            # исчерпанный дневной лимит — отказ (429) до обращения к модели
+            self.usage.check_budget(('full', 'screen') if self.cascade is not None else ('full',))
+
+        prescreen = self.rule_engine.check(contract_text, law_type)
+        logger.info(f"📏 Правила: {len(prescreen['issues'])} замечаний за {prescreen['elapsed_ms']} мс")
+
+        # правила проверяют полный текст, в LLM уходит очищенный
+        prompt_text, cleaning = prompt or self._prepare_prompt_text(contract_text)
 
+        return {
+            'corpus_version': corpus_version,
+            'law_articles': law_articles,
+            'prescreen': prescreen,
+            'prompt_text': prompt_text,
+            'cleaning': cleaning
+        }
 
-        analysis_result = self.gigachat.analyze_contract(contract_text, law_articles, law_type)
+    def _finish_analysis(self, contract_text, law_type, filename, analysis_result, context):
+        self.article_resolver.resolve(analysis_result.get('issues', []), law_type)
+        analysis_result['corpus_version'] = context['corpus_version']
+        analysis_result['usage'] = LlmUsage.summarize(analysis_result.pop('llm_calls', []))
+        if context['cleaning'] is not None:
+            analysis_result['text_cleaning'] = context['cleaning']
 
 
         self._save_analysis_result(contract_text, law_type, analysis_result, filename)
 
         return analysis_result
 
-    def _save_analysis_result(self, contract_text, law_type, analysis_result, filename):
+    @staticmethod
+    def _law_results(outcomes):
+        """Результаты по законам: исключение закона → раздел со статусом 'ошибка'.
 
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+        Если не удался ни один закон, ничего не сохранено — исключение пробрасывается (429/500 клиенту).
+        """
+        errors = {law_type: outcome for law_type, outcome in outcomes.items() if isinstance(outcome, BaseException)}
+        for error in errors.values():
+            if not isinstance(error, Exception) or len(errors) == len(outcomes):
+                raise error
 
-        try:
-            cursor.execute('''
-                INSERT INTO contract_analysis 
-                (contract_text, law_type, compliance_result, issues_found, recommendations)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                f"[{filename}] {contract_text[:500]}",
-                law_type,
-                analysis_result.get('compliance_status', 'не определен'),
-                str(analysis_result.get('issues', [])),
-                analysis_result.get('summary', '')[:500]
-            ))
-            conn.commit()
-        except Exception as e:
-            logger.error(f"❌ Ошибка сохранения анализа: {e}")
-        finally:
-            cursor.close()
-            conn.close()
\ No newline at end of file
+        results = dict(outcomes)
+        for law_type, error in errors.items():
+            logger.error(f"❌ Анализ по {law_type} не выполнен: {error}")
+            results[law_type] = {
+                "compliance_status": "ошибка",
+                "issues": [],
+                "summary": f"Анализ не выполнен: {error}"
+            }
+            if isinstance(error, AdmissionRejected):
+                results[law_type]['retry_after'] = error.retry_after
+        return results
+
+    @staticmethod
+    def _combine_laws(results, started):
+        """Общий результат по нескольким законам: худший статус, заключения и разделы по законам"""
+        statuses = [result.get('compliance_status') for result in results.values()]
+        if all(status in STATUS_SEVERITY for status in statuses):
+            compliance_status = STATUS_SEVERITY[max(STATUS_SEVERITY.index(status) for status in statuses)]
+        else:
+            compliance_status = "требует ручной проверки"
+
+        elapsed = round(time.perf_counter() - started, 2)
+        logger.info(f"⚖️ Проверка по {', '.join(results)} за {elapsed} с")
+        return {
+            "compliance_status": compliance_status,
+            "summary": " ".join(f"{law_type.upper()}: {result.get('summary', '')}"
+                                for law_type, result in results.items()),
+            "issues_count": sum(len(result.get('issues', [])) for result in results.values()),
+            "laws": results,
+            "usage": LlmUsage.combine([result['usage'] for result in results.values() if 'usage' in result]),
+            "elapsed_seconds": elapsed
+        }
+
+    @staticmethod
+    def _prepare_prompt_text(contract_text):
+        if not Config.TEXT_CLEANER_ENABLED:
+            return contract_text, None
+
+        cleaned, cleaning = clean_contract_text(contract_text)
+        logger.info(f"🧹 Очистка текста: -{cleaning['chars_saved']} символов, "
+                    f"~-{cleaning['tokens_saved']} токенов")
+        return cleaned, cleaning
+
+    @staticmethod
+    def _merge_prescreen(analysis_result, prescreen):
+        """Добавляет замечания правил к ответу модели"""
+        analysis_result['issues'] = prescreen['issues'] + analysis_result.get('issues', [])
+        analysis_result['prescreen'] = {'checks': prescreen['checks'], 'elapsed_ms': prescreen['elapsed_ms']}
+
+        if prescreen['issues'] and analysis_result.get('compliance_status') == 'соответствует':
+            analysis_result['compliance_status'] = 'частично соответствует'
+
+    @staticmethod
+    def _rules_only_result(prescreen):
+        issues = prescreen['issues']
+        return {
+            "compliance_status": "частично соответствует" if issues else "соответствует",
+            "issues": issues,
+            "summary": f"Автоматическая проверка по правилам: {len(issues)} замечаний "
+                       f"из {len(prescreen['checks'])} проверок",
+            "prescreen": {'checks': prescreen['checks'], 'elapsed_ms': prescreen['elapsed_ms']}
+        }
+
+    def _save_analysis_result(self, contract_text, law_type, analysis_result, filename):
+
+        analysis_id = self.history.save(contract_text, law_type, analysis_result, filename)
+        if analysis_id is not None:
+            analysis_result['analysis_id'] = analysis_id
@@ -1,7 +1,9 @@
 # services/data_parser.py
+import asyncio
 import requests
 from bs4 import BeautifulSoup
 import logging
+from config import Config
 from database.db_connection import Database
 import time
 import random
@@ -15,15 +17,17 @@ logger = logging.getLogger(__name__)
 class GosZakupParser:
     def __init__(self):
         self.db = Database()
-        self.base_url = "https://www.goszakup.gov.kz"
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.base_url = Config.GOSZAKUP_BASE_URL.rstrip('/')
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
             'Accept-Language': 'ru-RU,ru;q=0.9,en;q=0.8',
             'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
-        })
+        }
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self._async_client = None
 
     def parse_real_time_suppliers(self, purchase_method: str, category: str, limit: int = 20) -> List[Dict]:
         """Парсит актуальных поставщиков в реальном времени с сайта - ОБНОВЛЕННАЯ ВЕРСИЯ"""
@@ -41,56 +45,101 @@ class GosZakupParser:
                 logger.error(f"❌ Ошибка HTTP: {response.status_code}")
                 return []
 
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            with open('debug_table.html', 'w', encoding='utf-8') as f:
-                f.write(soup.prettify())
-            logger.info("💾 Сохранен отладочный HTML в debug_table.html")
-
-            suppliers_table = soup.find('table', class_='table')
-            if not suppliers_table:
-                logger.warning("⚠️ Таблица поставщиков не найдена на странице")
-                all_tables = soup.find_all('table')
-                logger.info(f"📊 Найдено таблиц на странице: {len(all_tables)}")
-                for i, table in enumerate(all_tables):
-                    logger.info(f"📋 Таблица {i}: {len(table.find_all('tr'))} строк")
+            return self._parse_page(response.content, purchase_method, category, limit)
 
-                if all_tables:
-                    suppliers_table = all_tables[0]
-                else:
-                    return []
-
-            rows = suppliers_table.find_all('tr')
-            logger.info(f"📊 Найдено строк в таблице: {len(rows)}")
-
-            if rows:
-                first_row = rows[0]
-                headers = first_row.find_all('th')
-                logger.info(f"📝 Заголовки таблицы: {[h.get_text(strip=True) for h in headers]}")
+        except requests.RequestException as e:
+            logger.error(f"❌ Ошибка сети: {e}")
+            return []
+        except Exception as e:
+            logger.error(f"❌ Неожиданная ошибка при парсинге: {e}")
+            return []
 
-                if len(rows) > 1:
-                    sample_row = rows[1]
-                    cells = sample_row.find_all('td')
-                    logger.info(f"🔍 Пример данных строки: {[cell.get_text(strip=True) for cell in cells]}")
+    async def aparse_real_time_suppliers(self, purchase_method: str, category: str, limit: int = 20) -> List[Dict]:
+        """parse_real_time_suppliers для async-обработчиков: запрос через общий пул соединений,
+        разбор HTML — в потоке, чтобы не блокировать цикл событий
+        """
+        import httpx
 
-            suppliers = self._parse_suppliers_table(suppliers_table, purchase_method, category, limit)
-            logger.info(f"✅ Спаршено {len(suppliers)} актуальных поставщиков")
+        try:
+            logger.info(f"🔍 Парсим актуальных поставщиков для {purchase_method} / {category} (async)")
 
-            for i, supplier in enumerate(suppliers):
-                logger.info(f"🏢 Поставщик {i + 1}: {supplier['name']}")
+            url = self._build_url(purchase_method, category)
+            response = await self.async_client().get(url)
+            response.raise_for_status()
 
-            return suppliers
+            return await asyncio.to_thread(self._parse_page, response.content, purchase_method, category, limit)
 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"❌ Ошибка сети: {e}")
             return []
         except Exception as e:
             logger.error(f"❌ Неожиданная ошибка при парсинге: {e}")
             return []
 
+    def async_client(self):
+        """httpx.AsyncClient с пулом соединений; создается в цикле событий, который его использует"""
+        import httpx
+
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=30,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=Config.ASYNC_HTTP_MAX_CONNECTIONS,
+                                    max_keepalive_connections=Config.ASYNC_HTTP_MAX_KEEPALIVE)
+            )
+        return self._async_client
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def _parse_page(self, content: bytes, purchase_method: str, category: str, limit: int) -> List[Dict]:
+        """Разбор страницы рейтинга поставщиков"""
+        soup = BeautifulSoup(content, 'html.parser')
+
+        with open('debug_table.html', 'w', encoding='utf-8') as f:
+            f.write(soup.prettify())
+        logger.info("💾 Сохранен отладочный HTML в debug_table.html")
+
+        suppliers_table = soup.find('table', class_='table')
+        if not suppliers_table:
+            logger.warning("⚠️ Таблица поставщиков не найдена на странице")
+            all_tables = soup.find_all('table')
+            logger.info(f"📊 Найдено таблиц на странице: {len(all_tables)}")
+            for i, table in enumerate(all_tables):
+                logger.info(f"📋 Таблица {i}: {len(table.find_all('tr'))} строк")
+
+            if all_tables:
+                suppliers_table = all_tables[0]
+            else:
+                return []
+
+        rows = suppliers_table.find_all('tr')
+        logger.info(f"📊 Найдено строк в таблице: {len(rows)}")
+
+        if rows:
+            first_row = rows[0]
+            headers = first_row.find_all('th')
+            logger.info(f"📝 Заголовки таблицы: {[h.get_text(strip=True) for h in headers]}")
+
+            if len(rows) > 1:
+                sample_row = rows[1]
+                cells = sample_row.find_all('td')
+                logger.info(f"🔍 Пример данных строки: {[cell.get_text(strip=True) for cell in cells]}")
+
+        suppliers = self._parse_suppliers_table(suppliers_table, purchase_method, category, limit)
+        logger.info(f"✅ Спаршено {len(suppliers)} актуальных поставщиков")
+
+        for i, supplier in enumerate(suppliers):
+            logger.info(f"🏢 Поставщик {i + 1}: {supplier['name']}")
+
+        return suppliers
+
     def _build_url(self, purchase_method: str, category: str) -> str:
         """Строит URL в зависимости от способа закупки и категории"""
-        base_url = "https://www.goszakup.gov.kz/ru/top/suppliers"
+        base_url = f"{self.base_url}/ru/top/suppliers"
 
         if purchase_method == "Из одного источника путем прямого заключения договора":
             if category == "Товар":
@@ -166,6 +215,7 @@ class GosZakupParser:
 
             return {
                 'name': name,
+                'bin': self._extract_supplier_bin(cols),
                 'contracts_count': contracts_count,
                 'total_sum': total_sum,
                 'rating': rating,
@@ -208,6 +258,14 @@ class GosZakupParser:
             logger.warning(f"⚠️ Ошибка расширенного извлечения названия: {e}")
             return None
 
+    def _extract_supplier_bin(self, cols):
+        """БИН/ИИН поставщика (12 цифр) из ячеек с названием"""
+        for cell in cols[:2]:
+            match = re.search(r'(?:БИН|ИИН)\s*:?\s*(\d{12})', cell.get_text(' ', strip=True), flags=re.IGNORECASE)
+            if match:
+                return match.group(1)
+        return None
+
     def _is_valid_supplier_name(self, name: str) -> bool:
         """Проверяет, что извлеченный текст похож на название компании"""
         if not name or len(name) < 2:
@@ -228,7 +286,7 @@ class GosZakupParser:
 
     def _clean_supplier_name(self, name: str) -> str:
         """Очищает название поставщика"""
-        # FOR БИН ИНН/ ЕСЛИ удалить может сломаться решение неизвестно
+        # БИН/ИИН сохраняется отдельным полем (_extract_supplier_bin)
         clean_name = re.sub(r'БИН:\s*\d+', '', name, flags=re.IGNORECASE)
         clean_name = re.sub(r'ИИН:\s*\d+', '', clean_name, flags=re.IGNORECASE)
 
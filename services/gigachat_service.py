@@ -1,13 +1,20 @@
 import os
 import json
 import re
-from typing import Dict, Any
+from typing import Dict, Any, List
 import logging
 
+from config import Config
+
 logger = logging.getLogger(__name__)
 
 
 class GigaChatService:
+    @staticmethod
+    def model_tiers() -> Dict[str, str]:
+        """Уровни моделей: full — основная, screen — быстрая для первичной проверки разделов"""
+        return {'full': Config.GIGACHAT_MODEL, 'screen': Config.GIGACHAT_SCREEN_MODEL}
+
     def __init__(self):
         try:
             credentials = os.getenv("GIGACHAT_CREDENTIALS")
@@ -17,27 +24,28 @@ class GigaChatService:
 
             from langchain_gigachat.chat_models import GigaChat
             from langchain_core.prompts import ChatPromptTemplate
-            from langchain_core.output_parsers import StrOutputParser
-
-            self.model = GigaChat(
-                model="GigaChat-2-Max",
-                verify_ssl_certs=False,
-                credentials=credentials,
-                timeout=120
-            )
-            self.parser = StrOutputParser()
+
+            # адреса API переопределяются для локальных заглушек (нагрузочный тест)
+            endpoints = {key: value for key, value in (('base_url', Config.GIGACHAT_BASE_URL),
+                                                       ('auth_url', Config.GIGACHAT_AUTH_URL)) if value}
+            self.models = {
+                tier: GigaChat(
+                    model=name,
+                    verify_ssl_certs=False,
+                    credentials=credentials,
+                    timeout=120,
+                    **endpoints
+                )
+                for tier, name in self.model_tiers().items()
+            }
+            self.model = self.models['full']
             logger.info("✅ GigaChat initialized successfully")
 
         except Exception as e:
             logger.error(f"❌ Failed to initialize GigaChat: {e}")
             raise
 
-    def analyze_contract(self, contract_text: str, law_articles: str, law_type: str) -> Dict[str, Any]:
-
-        logger.info(f"🔧 Starting GigaChat analysis for {law_type}")
-
-
-        prompt_template = """
+    ANALYSIS_PROMPT = """
         Ты — помощник по анализу документов.
         Твоя задача — провести сравнение двух текстов и выделить расхождения по смыслу.
         
@@ -48,7 +56,7 @@ class GigaChatService:
         1. Где контракт противоречит положениям первого текста.
         2. Где формулировки могут вызвать неопределённость.
         3. Дай краткие предложения по уточнению или исправлению текста.
-        
+        {skip_note}
         Формат ответа (строго в JSON, без пояснений, без лишнего текста):
         {{
           "compliance_status": "соответствует|частично соответствует|не соответствует",
@@ -71,34 +79,151 @@ class GigaChatService:
         Ответь строго в JSON без комментариев.
         """
 
+    SCREEN_PROMPT = """
+        Ты — помощник по первичной проверке договоров на соответствие {law_type}.
+        Оцени фрагмент договора и определи, есть ли в нем вероятные нарушения закона.
+
+        Формат ответа (строго в JSON, без пояснений):
+        {{
+          "risk": число от 0 до 1 — вероятность существенного нарушения,
+          "topics": "ключевые темы фрагмента через запятую",
+          "issues": [
+            {{
+              "article": "номер статьи (если применимо)",
+              "issue": "очевидное несущественное замечание",
+              "recommendation": "предложение по улучшению"
+            }}
+          ]
+        }}
+
+        ФРАГМЕНТ ДОГОВОРА:
+        {section_text}
+        """
+
+    def analyze_contract(self, contract_text: str, law_articles: str, law_type: str,
+                         skip_areas: List[str] = None, model_tier: str = 'full') -> Dict[str, Any]:
+
+        logger.info(f"🔧 Starting GigaChat analysis for {law_type} ({model_tier})")
 
         try:
-            from langchain_core.prompts import ChatPromptTemplate
-            from langchain_core.output_parsers import StrOutputParser
+            message = self._chain(self.ANALYSIS_PROMPT, model_tier).invoke(
+                self._analysis_inputs(contract_text, law_articles, law_type, skip_areas))
+            return self._analysis_result(message, model_tier)
+
+        except Exception as e:
+            return self._analysis_error(e)
+
+    async def aanalyze_contract(self, contract_text: str, law_articles: str, law_type: str,
+                                skip_areas: List[str] = None, model_tier: str = 'full') -> Dict[str, Any]:
+        """analyze_contract для async-обработчиков: ожидание ответа не занимает поток"""
+
+        logger.info(f"🔧 Starting async GigaChat analysis for {law_type} ({model_tier})")
+
+        try:
+            message = await self._chain(self.ANALYSIS_PROMPT, model_tier).ainvoke(
+                self._analysis_inputs(contract_text, law_articles, law_type, skip_areas))
+            return self._analysis_result(message, model_tier)
 
-            prompt = ChatPromptTemplate.from_template(prompt_template)
-            chain = prompt | self.model | self.parser
+        except Exception as e:
+            return self._analysis_error(e)
+
+    def screen_section(self, section_text: str, law_type: str) -> Dict[str, Any]:
+        """Быстрая оценка раздела контракта: риск нарушения от 0 до 1 и темы раздела"""
 
-            response = chain.invoke({
+        try:
+            message = self._chain(self.SCREEN_PROMPT, 'screen').invoke({
                 "law_type": law_type.upper(),
-                "law_articles": law_articles[:8000],  # Увеличил лимит
-                "contract_text": contract_text[:6000]  # Увеличил лимит
+                "section_text": section_text
             })
-
-            logger.info(f"🔧 GigaChat raw response: {response[:200]}...")
-            return self._parse_response(response)
+            result = self._parse_screen_response(message.content)
+            result['llm_calls'] = [self._call_usage(message, 'screen')]
+            return result
 
         except Exception as e:
-            logger.error(f"❌ GigaChat analysis error: {e}")
-            return {
-                "compliance_status": "ошибка анализа",
-                "issues": [{
-                    "article": "системная ошибка",
-                    "issue": f"Ошибка при анализе: {str(e)}",
-                    "recommendation": "Повторите попытку или проверьте подключение"
-                }],
-                "summary": f"Ошибка анализа: {str(e)}"
-            }
+            # при сбое быстрой модели раздел безопаснее передать основной
+            logger.error(f"❌ GigaChat screening error: {e}")
+            return {"risk": 1.0, "topics": "", "issues": [], "llm_calls": [], "failed": True}
+
+    def _chain(self, prompt_template: str, model_tier: str):
+        from langchain_core.prompts import ChatPromptTemplate
+
+        # без StrOutputParser: в ответе модели (AIMessage) остается usage_metadata с числом токенов
+        prompt = ChatPromptTemplate.from_template(prompt_template)
+        return prompt | self.models[model_tier]
+
+    def _analysis_inputs(self, contract_text: str, law_articles: str, law_type: str,
+                         skip_areas: List[str] = None) -> Dict[str, str]:
+        return {
+            "law_type": law_type.upper(),
+            "law_articles": law_articles[:8000],  # Увеличил лимит
+            "contract_text": contract_text[:6000],  # Увеличил лимит
+            "skip_note": self._skip_note(skip_areas)
+        }
+
+    def _analysis_result(self, message, model_tier: str) -> Dict[str, Any]:
+        response = message.content
+        logger.info(f"🔧 GigaChat raw response: {response[:200]}...")
+        result = self._parse_response(response)
+        for issue in result['issues']:
+            issue['model_tier'] = model_tier
+        result['llm_calls'] = [self._call_usage(message, model_tier)]
+        return result
+
+    def _call_usage(self, message, model_tier: str) -> Dict[str, Any]:
+        """Токены одного вызова из usage_metadata ответа; cached_tokens — часть промпта из кэша GigaChat"""
+        usage = getattr(message, 'usage_metadata', None) or {}
+        prompt_tokens = usage.get('input_tokens') or 0
+        completion_tokens = usage.get('output_tokens') or 0
+        call = {
+            'model': self.model_tiers()[model_tier],
+            'tier': model_tier,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'cached_tokens': (usage.get('input_token_details') or {}).get('cache_read') or 0,
+            'total_tokens': usage.get('total_tokens') or prompt_tokens + completion_tokens
+        }
+        logger.info(f"🪙 {call['model']}: {call['prompt_tokens']} + {call['completion_tokens']} токенов")
+        return call
+
+    @staticmethod
+    def _analysis_error(error: Exception) -> Dict[str, Any]:
+        logger.error(f"❌ GigaChat analysis error: {error}")
+        return {
+            "compliance_status": "ошибка анализа",
+            "issues": [{
+                "article": "системная ошибка",
+                "issue": f"Ошибка при анализе: {str(error)}",
+                "recommendation": "Повторите попытку или проверьте подключение"
+            }],
+            "summary": f"Ошибка анализа: {str(error)}"
+        }
+
+    @staticmethod
+    def _parse_screen_response(response: str) -> Dict[str, Any]:
+        start = response.find('{')
+        end = response.rfind('}') + 1
+
+        try:
+            parsed = json.loads(response[start:end]) if start != -1 and end != 0 else {}
+            risk = float(parsed.get('risk', 1.0))
+        except (ValueError, TypeError, AttributeError):
+            logger.warning("⚠️ Некорректный ответ быстрой модели, раздел будет передан основной")
+            return {"risk": 1.0, "topics": "", "issues": []}
+
+        issues = parsed.get('issues')
+        return {
+            "risk": min(max(risk, 0.0), 1.0),
+            "topics": str(parsed.get('topics') or ''),
+            "issues": [issue for issue in issues if isinstance(issue, dict)] if isinstance(issues, list) else []
+        }
+
+    @staticmethod
+    def _skip_note(skip_areas: List[str] = None) -> str:
+        """Области, уже проверенные правилами: модель их не анализирует"""
+        if not skip_areas:
+            return ""
+        areas = "; ".join(skip_areas)
+        return f"\n        Не проверяй и не включай в ответ следующие аспекты, они уже проверены автоматически: {areas}.\n"
 
     def _parse_response(self, response: str) -> Dict[str, Any]:
 
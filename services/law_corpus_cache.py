@@ -0,0 +1,191 @@
+import logging
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from database.db_connection import Database
+from services.law_snapshot import LawSnapshot, get_snapshot
+
+logger = logging.getLogger(__name__)
+
+NUMBER_PART = re.compile(r'\d+|[^\W\d_]+')
+
+
+def article_sort_key(number: Optional[str]) -> Tuple:
+    """Иерархический ключ номера статьи: 34 < 34.1 < 34.2 < 34.10 < 35 < 35а.
+
+    CAST(... AS FLOAT) считает 34.1 и 34.10 одним числом, а 34.10 ставит перед 34.2.
+    """
+    return tuple((0, int(part), '') if part.isdigit() else (1, 0, part.lower())
+                 for part in NUMBER_PART.findall(number or ''))
+
+
+def format_article(number: str, title: Optional[str], content: Optional[str]) -> str:
+    """Фрагмент промпта для одной статьи"""
+    return (f"СТАТЬЯ {number}\n"
+            f"Заголовок: {title}\n"
+            f"Содержание: {content}\n"
+            "---\n\n")
+
+
+def format_law_header(law_type: str) -> str:
+    return f"ФЕДЕРАЛЬНЫЙ ЗАКОН {law_type.upper()}\n\n"
+
+
+class LawCorpus:
+    """Статьи одного закона в одной версии корпуса: отсортированы, фрагменты промпта готовы.
+
+    Копия в памяти процесса — только когда снимка этой версии нет и статьи читаются из БД.
+    """
+
+    __slots__ = ('law_type', 'corpus_version', 'articles', 'fragments', 'formatted', '_index')
+
+    def __init__(self, law_type: str, corpus_version: int, rows: Iterable[Tuple[str, str, str]]):
+        self.law_type = law_type
+        self.corpus_version = corpus_version
+        self.articles = tuple(sorted(rows, key=lambda row: article_sort_key(row[0])))
+        self.fragments = tuple(format_article(*article) for article in self.articles)
+        self.formatted = format_law_header(law_type) + ''.join(self.fragments)
+        self._index = {article[0]: position for position, article in enumerate(self.articles)}
+
+    def __len__(self):
+        return len(self.articles)
+
+    def get_articles(self, numbers: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """Статьи по номерам: номер → {article_number, title, content}"""
+        found = {}
+        for number in numbers:
+            position = self._index.get(number)
+            if position is not None:
+                article_number, title, content = self.articles[position]
+                found[number] = {'article_number': article_number, 'title': title, 'content': content}
+        return found
+
+    def render(self, numbers: Iterable[str]) -> str:
+        """Текст закона только из выбранных статей, в порядке корпуса"""
+        positions = sorted(self._index[number] for number in set(numbers) if number in self._index)
+        return format_law_header(self.law_type) + ''.join(self.fragments[position] for position in positions)
+
+
+class SnapshotCorpus:
+    """Закон из снимка корпуса той же версии: текст для промпта читается срезами mmap.
+
+    Страницы снимка общие для всех воркеров, поэтому копия статей и готового текста в процессе не хранится;
+    строка formatted создается на время запроса.
+    """
+
+    __slots__ = ('law_type', 'corpus_version', 'snapshot')
+
+    def __init__(self, law_type: str, snapshot: LawSnapshot):
+        self.law_type = law_type
+        self.corpus_version = snapshot.corpus_version
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return self.snapshot.count(self.law_type)
+
+    @property
+    def formatted(self) -> str:
+        return self.snapshot.formatted(self.law_type)
+
+    def get_articles(self, numbers: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        return self.snapshot.get_articles(self.law_type, list(numbers))
+
+    def render(self, numbers: Iterable[str]) -> str:
+        return self.snapshot.render(self.law_type, numbers)
+
+
+class LawCorpusCache:
+    """Корпус законов процесса.
+
+    Если снимок той же версии открыт, закон читается из него (SnapshotCorpus), иначе статьи
+    загружаются из БД один раз на версию корпуса (LawCorpus); новая версия в law_corpus_versions
+    или замена файла снимка заменяет закэшированный корпус.
+    """
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or Database()
+        self._corpora: Dict[str, Union[LawCorpus, SnapshotCorpus]] = {}
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # корпус, загруженный в мастере, остается общим; сбрасывается только блокировка
+        self._lock = threading.Lock()
+
+    def get(self, law_type: str, corpus_version: int = None) -> Optional[Union[LawCorpus, SnapshotCorpus]]:
+        """Корпус закона текущей версии; None, если статей в базе нет"""
+        if corpus_version is None:
+            corpus_version = self.db.get_corpus_version()
+
+        snapshot = get_snapshot()
+        corpus = self._corpora.get(law_type)
+        if self._is_current(corpus, corpus_version, snapshot):
+            return corpus
+
+        with self._lock:
+            corpus = self._corpora.get(law_type)
+            if self._is_current(corpus, corpus_version, snapshot):
+                return corpus
+
+            if snapshot is not None and snapshot.corpus_version == corpus_version and snapshot.count(law_type):
+                corpus = SnapshotCorpus(law_type, snapshot)
+                self._corpora[law_type] = corpus
+                logger.info(f"📦 Корпус {law_type} v{corpus_version} читается из снимка: {len(corpus)} статей")
+                return corpus
+
+            rows = self._load(law_type)
+            if not rows:
+                return None
+            corpus = LawCorpus(law_type, corpus_version, rows)
+            self._corpora[law_type] = corpus
+            logger.info(f"📚 Корпус {law_type} v{corpus_version} загружен в память: {len(corpus)} статей, "
+                        f"{len(corpus.formatted)} символов")
+            return corpus
+
+    @staticmethod
+    def _is_current(corpus, corpus_version: int, snapshot: Optional[LawSnapshot]) -> bool:
+        if corpus is None or corpus.corpus_version != corpus_version:
+            return False
+        # корпус из замененного файла снимка читается заново из нового
+        return not isinstance(corpus, SnapshotCorpus) or corpus.snapshot is snapshot
+
+    def formatted(self, law_type: str, corpus_version: int = None) -> Optional[str]:
+        corpus = self.get(law_type, corpus_version)
+        return corpus.formatted if corpus is not None else None
+
+    def warm(self, law_types: Iterable[str] = ('44_fz', '223_fz')):
+        """Загружает корпуса заранее (в мастер-процессе перед fork)"""
+        corpus_version = self.db.get_corpus_version()
+        for law_type in law_types:
+            self.get(law_type, corpus_version)
+
+    def _load(self, law_type: str) -> List[Tuple[str, str, str]]:
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                SELECT article_number, title, content
+                FROM law_articles
+                WHERE law_type = ?
+            ''', (law_type,))
+            return [(row[0], row[1], row[2]) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+
+
+_cache: Optional[LawCorpusCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_corpus_cache() -> LawCorpusCache:
+    """Кэш корпуса текущего процесса"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LawCorpusCache()
+    return _cache
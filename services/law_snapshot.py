@@ -0,0 +1,359 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from config import Config
+from database.db_connection import Database
+from utils import text_normalizer
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'LAWSNAP1'
+PREAMBLE = struct.Struct('<8sI')
+# number_off, number_len, title_off, title_len, content_off, content_len
+ARTICLE_RECORD = struct.Struct('<6I')
+
+
+class LawSnapshotCompiler:
+    """Упаковывает корпус законов в неизменяемый бинарный снимок для mmap"""
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or Database()
+
+    def compile(self, path: str = None) -> str:
+        """Собирает снимок и атомарно заменяет им файл по пути path"""
+        from services.law_corpus_cache import format_article, format_law_header
+
+        path = path or Config.LAW_SNAPSHOT_PATH
+        corpus_version = self.db.get_corpus_version()
+        payload = bytearray()
+        laws = {}
+
+        for law_type, rows in self._load_articles().items():
+            records = array('I')
+            for article in rows:
+                for value in (article['article_number'], article['title'] or '', article['content'] or ''):
+                    encoded = value.encode('utf-8')
+                    records.extend((len(payload), len(encoded)))
+                    payload += encoded
+
+            # текст закона для промпта и границы фрагментов статей в нем (байты от начала текста)
+            formatted = bytearray(format_law_header(law_type).encode('utf-8'))
+            fragments = array('I')
+            for row in rows:
+                fragments.append(len(formatted))
+                formatted += format_article(row['article_number'], row['title'], row['content']).encode('utf-8')
+            fragments.append(len(formatted))
+            formatted_off = len(payload)
+            payload += formatted
+
+            table_off = self._append_aligned(payload, self._pack(records))
+            fragments_off = self._append_aligned(payload, self._pack(fragments))
+            terms, postings = self._build_index(rows)
+            postings_off = self._append_aligned(payload, postings.tobytes())
+            terms_json = json.dumps(terms, ensure_ascii=False).encode('utf-8')
+            terms_off = len(payload)
+            payload += terms_json
+
+            laws[law_type] = {
+                'count': len(rows),
+                'formatted': [formatted_off, len(formatted)],
+                'articles': [table_off, len(rows)],
+                'fragments': [fragments_off, len(fragments)],
+                'postings': [postings_off, len(postings)],
+                'terms': [terms_off, len(terms_json)]
+            }
+
+        header = json.dumps({
+            'corpus_version': corpus_version,
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'laws': laws
+        }, ensure_ascii=False).encode('utf-8')
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+
+        with open(tmp_path, 'wb') as file:
+            file.write(PREAMBLE.pack(MAGIC, len(header)))
+            file.write(header)
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(tmp_path, path)
+        logger.info(f"📦 Снимок корпуса v{corpus_version} записан в {path} ({len(payload)} байт)")
+        return path
+
+    def _load_articles(self) -> Dict[str, List[dict]]:
+        from services.law_corpus_cache import article_sort_key
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                SELECT law_type, article_number, title, content
+                FROM law_articles
+                ORDER BY law_type
+            ''')
+            laws: Dict[str, List[dict]] = {}
+            for row in cursor.fetchall():
+                laws.setdefault(row['law_type'], []).append(dict(row))
+            for rows in laws.values():
+                rows.sort(key=lambda row: article_sort_key(row['article_number']))
+            return laws
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def _build_index(rows: List[dict]):
+        """Инвертированный индекс: основа слова → номера статей в таблице снимка"""
+        documents = text_normalizer.normalize_documents(
+            f"{row['title'] or ''} {row['content'] or ''}" for row in rows
+        )
+        postings_by_term: Dict[str, List[int]] = {}
+        for index, stems in enumerate(documents):
+            for term in set(stems):
+                postings_by_term.setdefault(term, []).append(index)
+
+        terms = {}
+        postings = array('I')
+        for term, indices in postings_by_term.items():
+            terms[term] = [len(postings), len(indices)]
+            postings.extend(indices)
+
+        return terms, postings
+
+    @staticmethod
+    def _pack(records: array) -> bytes:
+        if sys.byteorder != 'little':
+            records.byteswap()
+        return records.tobytes()
+
+    @staticmethod
+    def _append_aligned(payload: bytearray, data: bytes) -> int:
+        payload += b'\0' * (-len(payload) % 4)
+        offset = len(payload)
+        payload += data
+        return offset
+
+
+class LawSnapshot:
+    """Read-only доступ к снимку через mmap: страницы файла общие для всех процессов"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        stat = os.fstat(self._file.fileno())
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, header_len = PREAMBLE.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Неверный формат снимка корпуса: {path}")
+
+        header = json.loads(self._mm[PREAMBLE.size:PREAMBLE.size + header_len].decode('utf-8'))
+        self._base = PREAMBLE.size + header_len
+        self.corpus_version = header['corpus_version']
+        self.created_at = header['created_at']
+        self._laws = header['laws']
+        self._numbers: Dict[str, Dict[str, int]] = {}
+        self._terms: Dict[str, dict] = {}
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def law_types(self) -> List[str]:
+        return list(self._laws)
+
+    def formatted(self, law_type: str) -> Optional[str]:
+        """Готовый текст закона для промпта"""
+        law = self._laws.get(law_type)
+        if not law:
+            return None
+        return str(self._slice(*law['formatted']), 'utf-8')
+
+    def count(self, law_type: str) -> int:
+        law = self._laws.get(law_type)
+        return law['count'] if law else 0
+
+    def render(self, law_type: str, numbers: Iterable[str]) -> str:
+        """Текст закона только из выбранных статей, в порядке снимка: фрагменты берутся срезами готового текста"""
+        from services.law_corpus_cache import format_article, format_law_header
+
+        law = self._laws.get(law_type)
+        number_map = self._number_map(law_type)
+        indices = sorted({number_map[number] for number in numbers if number in number_map})
+        if not law or 'fragments' not in law:
+            # снимок прежнего формата, без границ фрагментов
+            return format_law_header(law_type) + ''.join(
+                format_article(*self._article(law_type, index).values()) for index in indices)
+
+        offsets = self._slice(law['fragments'][0], law['fragments'][1] * 4).cast('I')
+        formatted = self._slice(*law['formatted'])
+        return b''.join([formatted[:offsets[0]]] + [formatted[offsets[index]:offsets[index + 1]]
+                                                    for index in indices]).decode('utf-8')
+
+    def articles(self, law_type: str) -> List[dict]:
+        """Все статьи закона в порядке снимка"""
+        law = self._laws.get(law_type)
+        return [self._article(law_type, index) for index in range(law['count'] if law else 0)]
+
+    def article_bytes(self, law_type: str, article_number: str) -> Optional[memoryview]:
+        """Текст статьи без копирования (срез mmap)"""
+        index = self._number_map(law_type).get(article_number)
+        if index is None:
+            return None
+        record = self._record(law_type, index)
+        return self._slice(record[4], record[5])
+
+    def get_article(self, law_type: str, article_number: str) -> Optional[dict]:
+        index = self._number_map(law_type).get(article_number)
+        return None if index is None else self._article(law_type, index)
+
+    def get_articles(self, law_type: str, numbers: List[str]) -> Dict[str, dict]:
+        """Пакетный поиск статей по номерам"""
+        number_map = self._number_map(law_type)
+        return {number: self._article(law_type, number_map[number]) for number in numbers if number in number_map}
+
+    def search(self, law_type: str, query: str, limit: int = 5) -> List[dict]:
+        """Статьи, содержащие больше всего основ слов запроса"""
+        law = self._laws.get(law_type)
+        if not law:
+            return []
+
+        terms = self._term_map(law_type)
+        postings = self._slice(law['postings'][0], law['postings'][1] * 4).cast('I')
+        scores = Counter()
+
+        for term in set(text_normalizer.normalize(query)):
+            entry = terms.get(term)
+            if entry:
+                start, count = entry
+                scores.update(postings[start:start + count])
+
+        return [self._article(law_type, index) for index, _ in scores.most_common(limit)]
+
+    def _article(self, law_type: str, index: int) -> dict:
+        record = self._record(law_type, index)
+        return {
+            'article_number': self._text(record[0], record[1]),
+            'title': self._text(record[2], record[3]),
+            'content': self._text(record[4], record[5])
+        }
+
+    def _record(self, law_type: str, index: int):
+        table_off = self._laws[law_type]['articles'][0]
+        return ARTICLE_RECORD.unpack_from(self._mm, self._base + table_off + index * ARTICLE_RECORD.size)
+
+    def _number_map(self, law_type: str) -> Dict[str, int]:
+        if law_type not in self._numbers:
+            law = self._laws.get(law_type)
+            count = law['count'] if law else 0
+            self._numbers[law_type] = {
+                self._text(*self._record(law_type, index)[:2]): index for index in range(count)
+            }
+        return self._numbers[law_type]
+
+    def _term_map(self, law_type: str) -> dict:
+        if law_type not in self._terms:
+            self._terms[law_type] = json.loads(str(self._slice(*self._laws[law_type]['terms']), 'utf-8'))
+        return self._terms[law_type]
+
+    def _slice(self, offset: int, length: int) -> memoryview:
+        start = self._base + offset
+        return memoryview(self._mm)[start:start + length]
+
+    def _text(self, offset: int, length: int) -> str:
+        start = self._base + offset
+        return self._mm[start:start + length].decode('utf-8')
+
+
+_snapshot: Optional[LawSnapshot] = None
+_snapshot_lock = threading.Lock()
+# замененные снимки, еще не закрытые
+_retired: List[LawSnapshot] = []
+
+
+def _retire(snapshot: Optional[LawSnapshot]):
+    """Закрывает снимки, замененные раньше, и откладывает закрытие snapshot до следующей замены.
+
+    Только что замененный снимок остается открытым: текущие запросы дочитывают его срезы.
+    Снимок, на mmap которого еще есть memoryview (article_bytes), закрывается при следующей попытке.
+    """
+    still_open = []
+    for old in _retired:
+        try:
+            old.close()
+        except BufferError:
+            still_open.append(old)
+    _retired[:] = still_open
+    if snapshot is not None:
+        _retired.append(snapshot)
+
+
+def get_snapshot(path: str = None) -> Optional[LawSnapshot]:
+    """Общий для процесса снимок; переоткрывается, если файл атомарно заменили"""
+    global _snapshot
+    path = path or Config.LAW_SNAPSHOT_PATH
+
+    if not path:
+        return None
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    current = _snapshot
+    if current is not None and current.path == path and current.identity == identity:
+        return current
+
+    with _snapshot_lock:
+        if _snapshot is not None and _snapshot.path == path and _snapshot.identity == identity:
+            return _snapshot
+        try:
+            snapshot = LawSnapshot(path)
+            logger.info(f"📦 Открыт снимок корпуса v{snapshot.corpus_version}")
+        except Exception as e:
+            logger.error(f"❌ Не удалось открыть снимок корпуса: {e}")
+            return None
+        _retire(_snapshot)
+        _snapshot = snapshot
+        return _snapshot
+
+
+def ensure_snapshot(db: Optional[Database] = None) -> Optional[LawSnapshot]:
+    """Пересобирает снимок, если его нет или он отстает от версии корпуса в БД"""
+    if not Config.LAW_SNAPSHOT_PATH:
+        return None
+
+    db = db or Database()
+    snapshot = get_snapshot()
+    if snapshot is None or snapshot.corpus_version != db.get_corpus_version():
+        LawSnapshotCompiler(db).compile()
+        snapshot = get_snapshot()
+    return snapshot
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != 'compile':
+        print("Использование: python -m services.law_snapshot compile [путь]")
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.INFO)
+    target = LawSnapshotCompiler().compile(sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"✅ Снимок корпуса записан: {target}")
@@ -0,0 +1,222 @@
+import argparse
+import hashlib
+import logging
+import os
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from database.db_connection import Database
+from services.law_snapshot import ensure_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class LawCorpusUpdater:
+    """Инкрементальное обновление корпуса законов с версионированием статей"""
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or Database()
+
+    def update_from_pdf(self, file_path: str, law_type: str, effective_date: str = None,
+                        edition: str = None) -> Dict[str, Any]:
+        """Разбирает новую редакцию закона и записывает только изменившиеся статьи"""
+        from services.pdf_parser import LawParser
+
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Файл не найден: {file_path}")
+
+        articles = LawParser().extract_articles(file_path, law_type)
+        logger.info(f"📖 {law_type}: в редакции {os.path.basename(file_path)} найдено {len(articles)} статей")
+
+        return self.apply(law_type, articles, effective_date=effective_date, edition=edition,
+                          source_file=os.path.basename(file_path))
+
+    def apply(self, law_type: str, articles: List[Dict[str, Any]], effective_date: str = None,
+              edition: str = None, source_file: str = None) -> Dict[str, Any]:
+        """Сравнивает статьи с текущими по хэшу и пишет новую версию корпуса"""
+        effective_date = effective_date or date.today().isoformat()
+        incoming = {article['article_number']: dict(article, content_hash=self.content_hash(article))
+                    for article in articles}
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            self._ensure_baseline(cursor, law_type)
+
+            cursor.execute('''
+                SELECT article_number, content_hash
+                FROM law_articles
+                WHERE law_type = ?
+            ''', (law_type,))
+            current = {row['article_number']: row['content_hash'] for row in cursor.fetchall()}
+
+            added = sorted(set(incoming) - set(current))
+            removed = sorted(set(current) - set(incoming))
+            changed = sorted(number for number in set(incoming) & set(current)
+                             if incoming[number]['content_hash'] != current[number])
+
+            if not (added or removed or changed):
+                conn.commit()
+                logger.info(f"✅ {law_type}: изменений нет")
+                return {'law_type': law_type, 'version': self._current_version(cursor),
+                        'added': 0, 'changed': 0, 'removed': 0}
+
+            cursor.execute('''
+                INSERT INTO law_corpus_versions
+                (law_type, edition, source_file, effective_date, articles_added, articles_changed, articles_removed)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                RETURNING version
+            ''', (law_type, edition, source_file, effective_date, len(added), len(changed), len(removed)))
+            version = cursor.fetchone()[0]
+
+            cursor.executemany('''
+                UPDATE law_article_versions
+                SET valid_to_version = ?, effective_to = ?
+                WHERE law_type = ? AND article_number = ? AND valid_to_version IS NULL
+            ''', [(version, effective_date, law_type, number) for number in changed + removed])
+
+            self._insert_versions(cursor, law_type, [incoming[number] for number in added + changed],
+                                  version, effective_date)
+
+            cursor.executemany('''
+                INSERT INTO law_articles (law_type, article_number, title, content, keywords, content_hash, corpus_version)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(law_type, article_number) DO UPDATE SET
+                    title = excluded.title,
+                    content = excluded.content,
+                    keywords = excluded.keywords,
+                    content_hash = excluded.content_hash,
+                    corpus_version = excluded.corpus_version
+            ''', [(law_type, number, incoming[number].get('title'), incoming[number].get('content'),
+                   incoming[number].get('keywords'), incoming[number]['content_hash'], version)
+                  for number in added + changed])
+
+            cursor.executemany('DELETE FROM law_articles WHERE law_type = ? AND article_number = ?',
+                               [(law_type, number) for number in removed])
+
+            conn.commit()
+            logger.info(f"✅ {law_type}: версия {version} — добавлено {len(added)}, "
+                        f"изменено {len(changed)}, удалено {len(removed)}")
+
+            return {'law_type': law_type, 'version': version,
+                    'added': len(added), 'changed': len(changed), 'removed': len(removed)}
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления корпуса {law_type}: {e}")
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def articles_as_of(self, law_type: str, version: int) -> List[Dict[str, Any]]:
+        """Статьи закона в том виде, в каком они были в указанной версии корпуса"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                SELECT article_number, title, content, valid_from_version, effective_from
+                FROM law_article_versions
+                WHERE law_type = ? AND valid_from_version <= ?
+                  AND (valid_to_version IS NULL OR valid_to_version > ?)
+            ''', (law_type, version, version))
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+
+    def list_versions(self, law_type: str = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """История версий корпуса, от новых к старым"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            if law_type:
+                cursor.execute('''
+                    SELECT * FROM law_corpus_versions WHERE law_type = ? ORDER BY version DESC LIMIT ?
+                ''', (law_type, limit))
+            else:
+                cursor.execute('SELECT * FROM law_corpus_versions ORDER BY version DESC LIMIT ?', (limit,))
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def content_hash(article: Dict[str, Any]) -> str:
+        payload = f"{article.get('title') or ''}\x1f{article.get('content') or ''}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _ensure_baseline(self, cursor, law_type: str):
+        """Фиксирует уже загруженные статьи как исходную версию, если версий еще нет"""
+        cursor.execute('SELECT 1 FROM law_article_versions WHERE law_type = ? LIMIT 1', (law_type,))
+        if cursor.fetchone():
+            return
+
+        cursor.execute('''
+            SELECT article_number, title, content
+            FROM law_articles
+            WHERE law_type = ?
+        ''', (law_type,))
+        existing = [dict(row) for row in cursor.fetchall()]
+        if not existing:
+            return
+
+        cursor.execute('''
+            INSERT INTO law_corpus_versions (law_type, edition, articles_added)
+            VALUES (?, 'baseline', ?)
+            RETURNING version
+        ''', (law_type, len(existing)))
+        version = cursor.fetchone()[0]
+
+        for article in existing:
+            article['content_hash'] = self.content_hash(article)
+
+        self._insert_versions(cursor, law_type, existing, version, None)
+        cursor.executemany('''
+            UPDATE law_articles SET content_hash = ?, corpus_version = ?
+            WHERE law_type = ? AND article_number = ?
+        ''', [(article['content_hash'], version, law_type, article['article_number']) for article in existing])
+
+        logger.info(f"📌 {law_type}: текущие {len(existing)} статей зафиксированы как версия {version}")
+
+    @staticmethod
+    def _insert_versions(cursor, law_type: str, articles: List[Dict[str, Any]], version: int,
+                         effective_date: Optional[str]):
+        cursor.executemany('''
+            INSERT INTO law_article_versions
+            (law_type, article_number, title, content, content_hash, valid_from_version, effective_from)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [(law_type, article['article_number'], article.get('title'), article.get('content'),
+               article['content_hash'], version, effective_date) for article in articles])
+
+    @staticmethod
+    def _current_version(cursor) -> int:
+        cursor.execute('SELECT COALESCE(MAX(version), 0) FROM law_corpus_versions')
+        return cursor.fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Инкрементальное обновление корпуса законов из новой редакции PDF')
+    parser.add_argument('pdf', help='PDF-файл новой редакции закона')
+    parser.add_argument('--law', required=True, choices=['44_fz', '223_fz'], help='Тип закона')
+    parser.add_argument('--effective-date', help='Дата вступления редакции в силу (YYYY-MM-DD)')
+    parser.add_argument('--edition', help='Описание редакции, например "ред. от 01.01.2026"')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    Database().init_db()
+
+    result = LawCorpusUpdater().update_from_pdf(args.pdf, args.law, args.effective_date, args.edition)
+    print(f"✅ {result['law_type']}: версия корпуса {result['version']} "
+          f"(+{result['added']} ~{result['changed']} -{result['removed']})")
+
+    if ensure_snapshot() is not None:
+        print(f"📦 Снимок корпуса обновлен: {Config.LAW_SNAPSHOT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import Config
+from database.db_connection import Database
+from services.admission import AdmissionRejected
+
+logger = logging.getLogger(__name__)
+
+TOKEN_FIELDS = ('prompt_tokens', 'completion_tokens', 'cached_tokens', 'total_tokens')
+
+
+class TokenBudgetExceeded(AdmissionRejected):
+    """Дневной лимит токенов модели исчерпан: запрос отклоняется до полуночи UTC"""
+
+
+class LlmUsage:
+    """Учет токенов GigaChat: итог по анализу, сводка по дням, законам и моделям, дневные лимиты"""
+
+    MAX_DAYS = 366
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or Database()
+
+    @staticmethod
+    def budgets() -> Dict[str, int]:
+        """Дневной лимит токенов по уровню модели (0 — без лимита)"""
+        return {'full': Config.LLM_DAILY_TOKEN_BUDGET, 'screen': Config.LLM_SCREEN_DAILY_TOKEN_BUDGET}
+
+    @staticmethod
+    def prices() -> Dict[str, float]:
+        """Цена 1000 токенов по уровню модели"""
+        return {'full': Config.LLM_TOKEN_PRICE, 'screen': Config.LLM_SCREEN_TOKEN_PRICE}
+
+    @staticmethod
+    def summarize(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Итог вызовов LLM одного анализа: токены и стоимость всего и по моделям"""
+        prices = LlmUsage.prices()
+        summary = {'calls': 0, **dict.fromkeys(TOKEN_FIELDS, 0), 'cost': 0.0, 'models': {}}
+
+        for call in calls:
+            model = summary['models'].setdefault(
+                call['model'], {'calls': 0, **dict.fromkeys(TOKEN_FIELDS, 0), 'cost': 0.0})
+            cost = call['total_tokens'] / 1000 * prices.get(call['tier'], 0)
+            for target in (summary, model):
+                target['calls'] += 1
+                target['cost'] += cost
+                for field in TOKEN_FIELDS:
+                    target[field] += call[field]
+
+        for target in (summary, *summary['models'].values()):
+            target['cost'] = round(target['cost'], 4)
+        return summary
+
+    @staticmethod
+    def combine(summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Сумма итогов нескольких анализов (проверка по нескольким законам)"""
+        combined = {'calls': 0, **dict.fromkeys(TOKEN_FIELDS, 0), 'cost': 0.0, 'models': {}}
+        for summary in summaries:
+            for model, totals in summary.get('models', {}).items():
+                target = combined['models'].setdefault(
+                    model, {'calls': 0, **dict.fromkeys(TOKEN_FIELDS, 0), 'cost': 0.0})
+                for field in ('calls', 'cost', *TOKEN_FIELDS):
+                    target[field] += totals[field]
+                    combined[field] += totals[field]
+
+        for target in (combined, *combined['models'].values()):
+            target['cost'] = round(target['cost'], 4)
+        return combined
+
+    @staticmethod
+    def record(cursor, law_type: str, usage: Dict[str, Any], analyzed_at: str):
+        """Учитывает токены анализа в дневной сводке (в транзакции вызывающего кода)"""
+        if not usage or not usage.get('models'):
+            return
+
+        cursor.executemany('''
+            INSERT INTO llm_usage_daily
+            (day, law_type, model, analyses, calls, prompt_tokens, completion_tokens, cached_tokens, total_tokens, cost)
+            VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(day, law_type, model) DO UPDATE SET
+                analyses = llm_usage_daily.analyses + 1,
+                calls = llm_usage_daily.calls + excluded.calls,
+                prompt_tokens = llm_usage_daily.prompt_tokens + excluded.prompt_tokens,
+                completion_tokens = llm_usage_daily.completion_tokens + excluded.completion_tokens,
+                cached_tokens = llm_usage_daily.cached_tokens + excluded.cached_tokens,
+                total_tokens = llm_usage_daily.total_tokens + excluded.total_tokens,
+                cost = llm_usage_daily.cost + excluded.cost
+        ''', [
+            (analyzed_at[:10], law_type, model, totals['calls'], totals['prompt_tokens'],
+             totals['completion_tokens'], totals['cached_tokens'], totals['total_tokens'], totals['cost'])
+            for model, totals in usage['models'].items()
+        ])
+
+    def check_budget(self, tiers: Iterable[str]):
+        """Отклоняет анализ, если у одной из моделей исчерпан дневной лимит.
+
+        Лимит мягкий: проверяется до вызова модели, поэтому одновременные анализы
+        могут превысить его на размер последних запросов.
+        """
+        budgets = {tier: budget for tier, budget in self.budgets().items() if tier in tiers and budget > 0}
+        if not budgets:
+            return
+
+        used = self.used_today()
+        models = self._tier_models()
+        for tier, budget in budgets.items():
+            if used.get(models[tier], 0) >= budget:
+                logger.warning(f"💸 Дневной лимит токенов {models[tier]} исчерпан: {used[models[tier]]} из {budget}")
+                raise TokenBudgetExceeded(f"Дневной лимит токенов модели {models[tier]} исчерпан",
+                                          self._seconds_until_reset())
+
+    def used_today(self) -> Dict[str, int]:
+        """Токены, израсходованные сегодня (UTC), по моделям"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                SELECT model, SUM(total_tokens) AS total_tokens
+                FROM llm_usage_daily
+                WHERE day = ?
+                GROUP BY model
+            ''', (datetime.utcnow().strftime('%Y-%m-%d'),))
+            return {row['model']: row['total_tokens'] for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+            conn.close()
+
+    def budget_status(self) -> List[Dict[str, Any]]:
+        """Расход и остаток дневного лимита по уровням моделей"""
+        used = self.used_today()
+        models = self._tier_models()
+        return [{
+            'tier': tier,
+            'model': models[tier],
+            'budget': budget or None,
+            'used': used.get(models[tier], 0),
+            'remaining': max(budget - used.get(models[tier], 0), 0) if budget else None
+        } for tier, budget in self.budgets().items()]
+
+    def daily(self, days: int = 30, law_type: str = None, model: str = None) -> List[Dict[str, Any]]:
+        """Расход токенов по дням, законам и моделям за последние days дней"""
+        days = max(1, min(int(days), self.MAX_DAYS))
+        sql = '''
+            SELECT day, law_type, model, analyses, calls, prompt_tokens, completion_tokens,
+                   cached_tokens, total_tokens, cost
+            FROM llm_usage_daily
+            WHERE day >= ?
+        '''
+        params: List[Any] = [(datetime.utcnow() - timedelta(days=days - 1)).strftime('%Y-%m-%d')]
+        if law_type:
+            sql += ' AND law_type = ?'
+            params.append(law_type)
+        if model:
+            sql += ' AND model = ?'
+            params.append(model)
+        sql += ' ORDER BY day DESC, law_type, model'
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(sql, params)
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def _tier_models() -> Dict[str, str]:
+        from services.gigachat_service import GigaChatService
+        return GigaChatService.model_tiers()
+
+    @staticmethod
+    def _seconds_until_reset() -> int:
+        now = datetime.utcnow()
+        midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return int((midnight - now).total_seconds()) + 1
@@ -0,0 +1,176 @@
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from services.admission import get_llm_admission
+from services.law_snapshot import get_snapshot
+
+logger = logging.getLogger(__name__)
+
+STATUS_SEVERITY = ['соответствует', 'частично соответствует', 'не соответствует']
+
+
+class ModelCascade:
+    """Каскад моделей: быстрая модель оценивает разделы, основная разбирает только подозрительные"""
+
+    SECTION_HEADING = re.compile(r'\n(?=\s*(?:\d{1,2}\.\s+[А-ЯЁA-Z]|раздел\s+\d|статья\s+\d))', re.IGNORECASE)
+
+    def __init__(self, gigachat, threshold: float = None, section_chars: int = None,
+                 max_escalations: int = None):
+        self.gigachat = gigachat
+        self.threshold = Config.CASCADE_RISK_THRESHOLD if threshold is None else threshold
+        self.section_chars = section_chars or Config.CASCADE_SECTION_CHARS
+        self.max_escalations = Config.CASCADE_MAX_ESCALATIONS if max_escalations is None else max_escalations
+        self.screen_admission = get_llm_admission('screen')
+        self.full_admission = get_llm_admission('full')
+
+    def split_sections(self, text: str) -> List[str]:
+        """Делит контракт по заголовкам разделов и укрупняет мелкие части до section_chars"""
+        sections = []
+        current = ''
+
+        for part in self.SECTION_HEADING.split(text or ''):
+            part = part.strip()
+            if not part:
+                continue
+            while len(part) > self.section_chars:
+                sections.append(part[:self.section_chars])
+                part = part[self.section_chars:]
+            if current and len(current) + len(part) + 1 > self.section_chars:
+                sections.append(current)
+                current = part
+            else:
+                current = f"{current}\n{part}" if current else part
+
+        if current:
+            sections.append(current)
+        return sections
+
+    def analyze(self, contract_text: str, law_type: str, law_articles: str,
+                skip_areas: List[str] = None, priority: int = 0, user: Optional[str] = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        sections = self.split_sections(contract_text)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(len(sections), self.screen_admission.max_concurrent))) as pool:
+            screens = list(pool.map(lambda section: self._screen(section, law_type, priority, user), sections))
+
+        if screens and all(screen.get('failed') for screen in screens):
+            logger.warning("⚠️ Быстрая модель недоступна: контракт целиком передается основной модели")
+            return self._full_analysis(contract_text, law_type, law_articles, skip_areas, priority, user,
+                                       len(sections), started)
+
+        ranked = sorted(range(len(sections)), key=lambda index: screens[index]['risk'], reverse=True)
+        flagged = [index for index in ranked if screens[index]['risk'] >= self.threshold]
+        escalated = sorted(flagged[:self.max_escalations])
+        # подозрительные разделы сверх CASCADE_MAX_ESCALATIONS основная модель не видела
+        unreviewed = sorted(flagged[self.max_escalations:])
+
+        issues = []
+        for index, screen in enumerate(screens):
+            if index not in escalated:
+                for issue in screen['issues']:
+                    issue['model_tier'] = 'screen'
+                    issues.append(issue)
+
+        llm_calls = [call for screen in screens for call in screen.get('llm_calls', [])]
+        statuses = []
+        summaries = []
+        if escalated:
+            with ThreadPoolExecutor(max_workers=max(1, min(len(escalated), self.full_admission.max_concurrent))) as pool:
+                results = list(pool.map(
+                    lambda index: self._escalate(sections[index], screens[index]['topics'], law_type,
+                                                 law_articles, skip_areas, priority, user),
+                    escalated
+                ))
+            for result in results:
+                llm_calls.extend(result.get('llm_calls', []))
+                issues.extend(result.get('issues', []))
+                statuses.append(result.get('compliance_status'))
+                if result.get('summary'):
+                    summaries.append(result['summary'])
+
+        compliance_status = self._combine_statuses(statuses, bool(issues))
+        summary = " ".join(summaries) if summaries else "Быстрая проверка не выявила существенных нарушений"
+        if unreviewed:
+            compliance_status = "требует ручной проверки"
+            summary += (f" Подозрительные разделы {', '.join(str(index + 1) for index in unreviewed)} "
+                        f"не проверены основной моделью (лимит {self.max_escalations}).")
+        elapsed = round(time.perf_counter() - started, 2)
+        logger.info(f"🪜 Каскад: разделов {len(sections)}, подозрительных {len(flagged)}, "
+                    f"передано основной модели {len(escalated)} за {elapsed} с")
+
+        return {
+            "compliance_status": compliance_status,
+            "issues": issues,
+            "summary": summary,
+            "llm_calls": llm_calls,
+            "cascade": {
+                "sections": len(sections),
+                "flagged": len(flagged),
+                "escalated": len(escalated),
+                "unreviewed": unreviewed,
+                "risks": [round(screen['risk'], 2) for screen in screens],
+                "models": self.gigachat.model_tiers(),
+                "elapsed_seconds": elapsed
+            }
+        }
+
+    def _screen(self, section: str, law_type: str, priority: int, user: Optional[str]) -> Dict[str, Any]:
+        with self.screen_admission.slot(priority=priority, user=user):
+            return self.gigachat.screen_section(section, law_type)
+
+    def _escalate(self, section: str, topics: str, law_type: str, law_articles: str,
+                  skip_areas: List[str], priority: int, user: Optional[str]) -> Dict[str, Any]:
+        context = self.law_context(law_type, f"{topics} {section}") or law_articles
+        with self.full_admission.slot(priority=priority, user=user):
+            return self.gigachat.analyze_contract(section, context, law_type,
+                                                  skip_areas=skip_areas, model_tier='full')
+
+    def _full_analysis(self, contract_text: str, law_type: str, law_articles: str, skip_areas: List[str],
+                       priority: int, user: Optional[str], sections: int, started: float) -> Dict[str, Any]:
+        """Один вызов основной модели по всему контракту, когда быстрая модель не ответила ни по одному разделу"""
+        with self.full_admission.slot(priority=priority, user=user):
+            result = self.gigachat.analyze_contract(contract_text, law_articles, law_type,
+                                                    skip_areas=skip_areas, model_tier='full')
+        result['cascade'] = {
+            "sections": sections,
+            "flagged": sections,
+            "escalated": 0,
+            "unreviewed": [],
+            "fallback": "full",
+            "models": self.gigachat.model_tiers(),
+            "elapsed_seconds": round(time.perf_counter() - started, 2)
+        }
+        return result
+
+    @staticmethod
+    def law_context(law_type: str, query: str) -> Optional[str]:
+        """Статьи закона, наиболее близкие к разделу, вместо начала полного текста"""
+        from services.contract_analyzer import ContractAnalyzer
+
+        from database.db_connection import Database
+
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            articles = snapshot.search(law_type, query, limit=Config.CASCADE_CONTEXT_ARTICLES)
+        else:
+            # без снимка — полнотекстовый индекс PostgreSQL (в SQLite пусто: берется полный текст)
+            articles = Database().search_law_articles(law_type, query, limit=Config.CASCADE_CONTEXT_ARTICLES)
+        if not articles:
+            return None
+        return ContractAnalyzer.format_law_articles(
+            law_type, [(article['article_number'], article['title'], article['content']) for article in articles]
+        )
+
+    @staticmethod
+    def _combine_statuses(statuses: List[str], has_issues: bool) -> str:
+        known = [STATUS_SEVERITY.index(status) for status in statuses if status in STATUS_SEVERITY]
+        if len(known) != len(statuses):
+            return "требует ручной проверки"
+        severity = max(known) if known else 0
+        if has_issues:
+            severity = max(severity, 1)
+        return STATUS_SEVERITY[severity]
@@ -1,6 +1,7 @@
 import PyPDF2
 import re
 from database.db_connection import Database
+from utils import text_normalizer
 
 
 class LawParser:
@@ -43,6 +44,36 @@ class LawParser:
 
         return articles
 
+    def extract_articles(self, file_path, law_type):
+        """Извлекает статьи из PDF без записи в БД (при повторе номера побеждает последнее вхождение)"""
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            full_text = "".join(page.extract_text() for page in pdf_reader.pages)
+
+        patterns = [
+            r'Статья\s+(\d+(?:\.\d+)*)\.?\s*(.*?)(?=Статья\s+\d+|$)',
+            r'СТАТЬЯ\s+(\d+(?:\.\d+)*)\.?\s*(.*?)(?=СТАТЬЯ\s+\d+|$)',
+            r'ст\.\s*(\d+(?:\.\d+)*)\.?\s*(.*?)(?=ст\.\s*\d+|$)',
+        ]
+
+        articles = {}
+        for pattern in patterns:
+            for match in re.finditer(pattern, full_text, re.DOTALL | re.IGNORECASE):
+                article_number = match.group(1).strip()
+                article_content = match.group(2).strip()
+
+                if 30 < len(article_content) < 5000:
+                    content = article_content[:2000]
+                    articles[article_number] = {
+                        'law_type': law_type,
+                        'article_number': article_number,
+                        'title': self._extract_title(content),
+                        'content': content,
+                        'keywords': self._extract_keywords(content)
+                    }
+
+        return list(articles.values())
+
     def _extract_title(self, content):
 
         sentences = re.split(r'[.!?]', content)
@@ -50,25 +81,7 @@ class LawParser:
 
     def _extract_keywords(self, content):
 
-
-        stop_words = {'и', 'в', 'во', 'не', 'что', 'он', 'на', 'я', 'с', 'со', 'как', 'а', 'то', 'все', 'она', 'так',
-                      'его', 'но', 'да', 'ты', 'к', 'у', 'же', 'вы', 'за', 'бы', 'по', 'только', 'ее', 'мне', 'было',
-                      'вот', 'от', 'меня', 'еще', 'нет', 'о', 'из', 'ему', 'теперь', 'когда', 'даже', 'ну', 'вдруг',
-                      'ли', 'если', 'уже', 'или', 'ни', 'быть', 'был', 'него', 'до', 'вас', 'нибудь', 'опять', 'уж',
-                      'вам', 'ведь', 'там', 'потом', 'себя', 'ничего', 'ей', 'может', 'они', 'тут', 'где', 'есть',
-                      'надо', 'ней', 'для', 'мы', 'тебя', 'их', 'чем', 'была', 'сам', 'чтоб', 'без', 'будто', 'чего',
-                      'раз', 'тоже', 'себе', 'под', 'будет', 'ж', 'тогда', 'кто', 'этот', 'того', 'потому', 'этого',
-                      'какой', 'совсем', 'ним', 'здесь', 'этом', 'один', 'почти', 'мой', 'тем', 'чтобы', 'нее',
-                      'сейчас', 'были', 'куда', 'зачем', 'всех', 'никогда', 'можно', 'при', 'наконец', 'два', 'об',
-                      'другой', 'хоть', 'после', 'над', 'больше', 'тот', 'через', 'эти', 'нас', 'про', 'всего', 'них',
-                      'какая', 'много', 'разве', 'три', 'эту', 'моя', 'впрочем', 'хорошо', 'свою', 'этой', 'перед',
-                      'иногда', 'лучше', 'чуть', 'том', 'нельзя', 'такой', 'им', 'более', 'всегда', 'конечно', 'всю',
-                      'между'}
-
-        words = re.findall(r'\b[а-яё]{4,}\b', content.lower())
-        keywords = [word for word in words if word not in stop_words]
-
-        return ','.join(list(set(keywords))[:10])  # Максимум 10 ключевых слов
+        return ','.join(text_normalizer.keywords(content, limit=10))  # Максимум 10 ключевых слов
 
     def _save_article_to_db(self, article):
 
@@ -78,11 +91,11 @@ class LawParser:
         try:
             cursor.execute('''
                 INSERT INTO law_articles (law_type, article_number, title, content, keywords)
-                VALUES (%s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE 
-                title = VALUES(title), 
-                content = VALUES(content), 
-                keywords = VALUES(keywords)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(law_type, article_number) DO UPDATE SET
+                    title = excluded.title,
+                    content = excluded.content,
+                    keywords = excluded.keywords
             ''', (article['law_type'], article['article_number'],
                   article['title'], article['content'], article['keywords']))
 
@@ -0,0 +1,190 @@
+import logging
+import re
+import time
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# правила, проверяющие содержание условия: их области LLM не анализирует.
+# required проверяет только наличие условия — законность его содержания оценивает модель
+COVERING_KINDS = ('max_days', 'digits')
+
+# Декларативные наборы правил.
+# kind: required — фрагмент обязан присутствовать;
+#       max_days — срок (группа days, единица unit) не больше limit рабочих дней;
+#       digits   — значение (группа value) должно состоять ровно из length цифр;
+#                  значение не переходит на следующую строку (за ним часто идет нумерованный пункт).
+# Шаблоны пишутся через «е»: текст контракта сравнивается после замены «ё» на «е».
+RULE_SETS = {
+    '44_fz': [
+        {
+            'id': 'penalty',
+            'area': 'ответственность сторон (неустойка, штрафы, пени)',
+            'article': 'Статья 34, часть 4',
+            'kind': 'required',
+            'pattern': r'неустойк|штраф|пен(?:я|и|ей)\b',
+            'issue': 'В контракте не найдено условие об ответственности сторон (неустойка, штрафы, пени)',
+            'recommendation': 'Включите обязательное условие об ответственности заказчика и поставщика '
+                              'за неисполнение обязательств в виде неустойки (штрафа, пени)'
+        },
+        {
+            'id': 'contract_security',
+            'area': 'обеспечение исполнения контракта',
+            'article': 'Статья 96',
+            'kind': 'required',
+            'pattern': r'обеспечени\w*\s+исполнения\s+(?:контракта|обязательств)',
+            'issue': 'В контракте не найдено условие об обеспечении исполнения контракта',
+            'recommendation': 'Укажите размер, способ и срок предоставления обеспечения исполнения контракта '
+                              'либо основание, по которому оно не требуется'
+        },
+        {
+            'id': 'firm_price',
+            'area': 'твердая цена контракта',
+            'article': 'Статья 34, часть 2',
+            'kind': 'required',
+            'pattern': r'цена\s+(?:контракта\s+)?является\s+твердой',
+            'issue': 'Не указано, что цена контракта является твердой и определяется на весь срок исполнения',
+            'recommendation': 'Добавьте условие о том, что цена контракта является твердой '
+                              'и определяется на весь срок исполнения контракта'
+        },
+        {
+            'id': 'payment_term',
+            'area': 'срок оплаты',
+            'article': 'Статья 34, часть 13.1',
+            'kind': 'max_days',
+            'limit': 7,
+            'pattern': r'(?:срок\w*\s+оплат\w*|оплат\w*\s+(?:осуществляется|производится))[^.;]{0,150}?'
+                       r'(?:не\s+более|в\s+течение|не\s+позднее)\s+(?P<days>\d+)\s*(?:\([^)]*\)\s*)?'
+                       r'(?P<unit>рабоч\w*|календарн\w*)?\s*дн',
+            'issue': 'Срок оплаты {days} {unit} дней превышает установленный законом (не более 7 рабочих дней)',
+            'recommendation': 'Установите срок оплаты не более 7 рабочих дней с даты подписания документа о приемке'
+        },
+        {
+            'id': 'ikz',
+            'area': 'идентификационный код закупки',
+            'article': 'Статья 23',
+            'kind': 'digits',
+            'length': 36,
+            'pattern': r'(?:идентификационн\w*\s+код\w*\s+закупки|икз)\s*(?:№|n)?\s*:?\s*(?P<value>\d[\d \t\u00a0]{8,58}\d)',
+            'issue': 'Идентификационный код закупки указан в неверном формате ({length_found} цифр вместо 36)',
+            'missing_issue': 'В контракте не указан идентификационный код закупки',
+            'recommendation': 'Укажите 36-значный идентификационный код закупки'
+        },
+    ],
+    '223_fz': [
+        {
+            'id': 'payment_term',
+            'area': 'срок оплаты',
+            'article': 'Статья 3.4, часть 28',
+            'kind': 'max_days',
+            'limit': 7,
+            'pattern': r'(?:срок\w*\s+оплат\w*|оплат\w*\s+(?:осуществляется|производится))[^.;]{0,150}?'
+                       r'(?:не\s+более|в\s+течение|не\s+позднее)\s+(?P<days>\d+)\s*(?:\([^)]*\)\s*)?'
+                       r'(?P<unit>рабоч\w*|календарн\w*)?\s*дн',
+            'issue': 'Срок оплаты {days} {unit} дней превышает 7 рабочих дней, установленных для договоров '
+                     'с субъектами МСП',
+            'recommendation': 'Если поставщик — субъект МСП, установите срок оплаты не более 7 рабочих дней'
+        },
+    ],
+}
+
+
+class RuleEngine:
+    """Детерминированная предварительная проверка контракта без обращения к LLM"""
+
+    # 7 рабочих дней занимают не более 9 календарных (без учета праздников)
+    CALENDAR_PER_WORKING_DAY = 9 / 7
+
+    def __init__(self, rule_sets: Dict[str, List[Dict[str, Any]]] = None):
+        self.rule_sets = rule_sets or RULE_SETS
+        self._compiled = {law_type: self._compile(rules) for law_type, rules in self.rule_sets.items()}
+
+    @staticmethod
+    def _compile(rules: List[Dict[str, Any]]):
+        """Объединяет шаблоны всех правил закона в одно регулярное выражение"""
+        alternatives = []
+        for index, rule in enumerate(rules):
+            pattern = re.sub(r'\(\?P<(\w+)>', lambda m: f'(?P<r{index}_{m.group(1)}>',
+                             RuleEngine.fold(rule['pattern']))
+            alternatives.append(f'(?P<r{index}>{pattern})')
+        return re.compile('|'.join(alternatives), re.IGNORECASE)
+
+    @staticmethod
+    def fold(text: str) -> str:
+        """ё → е: «твёрдой» и «твердой» совпадают; длина текста не меняется"""
+        return text.replace('ё', 'е').replace('Ё', 'Е')
+
+    def check(self, contract_text: str, law_type: str) -> Dict[str, Any]:
+        """Один проход по тексту: замечания со ссылками на статьи и список проверенных областей"""
+        started = time.perf_counter()
+        rules = self.rule_sets.get(law_type, [])
+        pattern = self._compiled.get(law_type)
+        matches: Dict[int, List[Dict[str, str]]] = {}
+
+        if pattern is not None:
+            for match in pattern.finditer(self.fold(contract_text or '')):
+                index = int(match.lastgroup[1:])
+                prefix = f'r{index}_'
+                groups = {name[len(prefix):]: value for name, value in match.groupdict().items()
+                          if name.startswith(prefix) and value is not None}
+                matches.setdefault(index, []).append(groups)
+
+        issues = []
+        checks = []
+        covered_areas = []
+        for index, rule in enumerate(rules):
+            rule_matches = matches.get(index, [])
+            # срок, не найденный в тексте, правилом не проверен — его оценивает LLM
+            if rule['kind'] == 'max_days' and not rule_matches:
+                continue
+            found = self._evaluate(rule, rule_matches)
+            checks.append({'rule': rule['id'], 'area': rule['area'], 'passed': not found})
+            if rule['kind'] in COVERING_KINDS:
+                covered_areas.append(rule['area'])
+            issues.extend(found)
+
+        return {
+            'issues': issues,
+            'covered_areas': covered_areas,
+            'checks': checks,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def _evaluate(self, rule: Dict[str, Any], matches: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        kind = rule['kind']
+
+        if kind == 'required':
+            return [] if matches else [self._issue(rule, rule['issue'])]
+
+        if kind == 'max_days':
+            issues = []
+            for groups in matches:
+                days = int(groups['days'])
+                unit = (groups.get('unit') or 'рабочих').lower()
+                calendar = unit.startswith('календарн')
+                limit = rule['limit'] * self.CALENDAR_PER_WORKING_DAY if calendar else rule['limit']
+                if days > limit:
+                    issues.append(self._issue(rule, rule['issue'].format(
+                        days=days, unit='календарных' if calendar else 'рабочих')))
+            return issues
+
+        if kind == 'digits':
+            if not matches:
+                return [self._issue(rule, rule['missing_issue'])]
+            digits = [re.sub(r'\D', '', groups['value']) for groups in matches]
+            if any(len(value) == rule['length'] for value in digits):
+                return []
+            return [self._issue(rule, rule['issue'].format(length_found=len(digits[0])))]
+
+        logger.warning(f"⚠️ Неизвестный тип правила: {kind}")
+        return []
+
+    @staticmethod
+    def _issue(rule: Dict[str, Any], text: str) -> Dict[str, str]:
+        return {
+            'article': rule['article'],
+            'issue': text,
+            'recommendation': rule['recommendation'],
+            'source': 'rules',
+            'rule': rule['id']
+        }
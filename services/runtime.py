@@ -0,0 +1,117 @@
+import importlib
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceRegistry:
+    """Ресурсы воркера (HTTP-сессии, клиент GigaChat, подключения к БД).
+
+    Создаются лениво в том процессе, который их использует: при запуске под
+    pre-fork сервером всё, что было создано в мастере до fork, сбрасывается
+    в дочернем процессе и пересоздается при первом запросе.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._instances = {}
+        self._pid = os.getpid()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._instances = {}
+        self._pid = os.getpid()
+
+    def _get(self, name, factory):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if name not in self._instances:
+                try:
+                    self._instances[name] = factory()
+                    logger.info(f"✅ [{self._pid}] {name} инициализирован")
+                except Exception as e:
+                    logger.error(f"❌ [{self._pid}] Ошибка инициализации {name}: {e}")
+                    self._instances[name] = None
+            return self._instances[name]
+
+    @property
+    def contract_analyzer(self):
+        from services.contract_analyzer import ContractAnalyzer
+        return self._get('contract_analyzer', ContractAnalyzer)
+
+    @property
+    def supplier_selector(self):
+        from services.supplier_selector import SupplierSelector
+        return self._get('supplier_selector', SupplierSelector)
+
+    @property
+    def supplier_prefetch(self):
+        from services.supplier_prefetch import SupplierPrefetch
+        supplier_selector = self.supplier_selector
+        return self._get('supplier_prefetch', lambda: SupplierPrefetch(supplier_selector))
+
+    @property
+    def analysis_history(self):
+        from services.analysis_history import AnalysisHistory
+        return self._get('analysis_history', AnalysisHistory)
+
+    @property
+    def bulk_exporter(self):
+        from services.bulk_export import BulkExporter
+        return self._get('bulk_exporter', BulkExporter)
+
+    @property
+    def compliance_analytics(self):
+        from services.compliance_analytics import ComplianceAnalytics
+        return self._get('compliance_analytics', ComplianceAnalytics)
+
+    @property
+    def llm_usage(self):
+        from services.llm_usage import LlmUsage
+        return self._get('llm_usage', LlmUsage)
+
+    @property
+    def supplier_history(self):
+        from services.supplier_history import SupplierHistory
+        return self._get('supplier_history', SupplierHistory)
+
+    @property
+    def supplier_search(self):
+        from services.supplier_search import SupplierSearch
+        return self._get('supplier_search', SupplierSearch)
+
+    @property
+    def chunked_uploads(self):
+        from services.chunked_upload import ChunkedUploads
+        return self._get('chunked_uploads', ChunkedUploads)
+
+    async def aclose(self):
+        """Закрывает пулы соединений async-клиентов (завершение ASGI-приложения)"""
+        supplier_selector = self._instances.get('supplier_selector')
+        if supplier_selector is not None:
+            await supplier_selector.parser.aclose()
+
+    def warm_up(self):
+        """Инициализирует сервисы текущего процесса и возвращает флаг доступности"""
+        return self.contract_analyzer is not None and self.supplier_selector is not None
+
+
+def preload_shared_state():
+    """Загружает в мастер-процессе то, что воркеры разделяют после fork"""
+    from services.law_corpus_cache import get_corpus_cache
+    from services.law_snapshot import get_snapshot
+
+    get_snapshot()
+    get_corpus_cache().warm()
+
+    for module in ('langchain_gigachat.chat_models', 'langchain_core.prompts', 'bs4', 'PyPDF2'):
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
@@ -0,0 +1,211 @@
+import logging
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from database.db_connection import Database
+
+logger = logging.getLogger(__name__)
+
+# показатели, история которых хранится в supplier_snapshots
+FACT_COLUMNS = ('rank', 'contracts_count', 'total_sum')
+
+
+class SupplierHistory:
+    """История показателей поставщиков: append-only срезы по датам"""
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or Database()
+
+    @staticmethod
+    def name_key(name: str) -> str:
+        """Ключ поставщика в измерении: регистр, кавычки и пробелы не различаются"""
+        key = (name or '').lower().replace('ё', 'е')
+        key = re.sub(r'[«»"“”„\'`]', '', key)
+        return re.sub(r'\s+', ' ', key).strip()
+
+    @staticmethod
+    def date_key(day: date = None) -> int:
+        day = day or date.today()
+        return day.year * 10000 + day.month * 100 + day.day
+
+    @staticmethod
+    def resolve_supplier(cursor, supplier: Dict[str, Any], snapshot_date: int) -> int:
+        """id поставщика в измерении: по БИН, иначе по названию; новые записи индексируются для поиска"""
+        from services.supplier_search import SupplierSearch
+
+        bin_value = supplier.get('bin')
+        name_key = SupplierHistory.name_key(supplier['name'])
+        row = None
+
+        if bin_value:
+            cursor.execute('SELECT id, name, search_name FROM supplier_dim WHERE bin = ?', (bin_value,))
+            row = cursor.fetchone()
+        if row is None:
+            # запись, сохраненная до появления БИН, получает его при следующем парсинге
+            cursor.execute('SELECT id, name, search_name FROM supplier_dim WHERE name_key = ? AND bin IS NULL LIMIT 1',
+                           (name_key,))
+            row = cursor.fetchone()
+
+        if row is None:
+            cursor.execute('''
+                INSERT INTO supplier_dim (bin, name_key, name, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)
+                RETURNING id
+            ''', (bin_value, name_key, supplier['name'], snapshot_date, snapshot_date))
+            supplier_id = cursor.fetchone()[0]
+            SupplierSearch.index(cursor, supplier_id, supplier['name'])
+            return supplier_id
+
+        supplier_id = row['id']
+        cursor.execute('''
+            UPDATE supplier_dim SET
+                bin = COALESCE(bin, ?),
+                name_key = ?,
+                name = ?,
+                last_seen = CASE WHEN last_seen > ? THEN last_seen ELSE ? END
+            WHERE id = ?
+        ''', (bin_value, name_key, supplier['name'], snapshot_date, snapshot_date, supplier_id))
+        if row['name'] != supplier['name'] or row['search_name'] is None:
+            SupplierSearch.index(cursor, supplier_id, supplier['name'])
+        return supplier_id
+
+    @staticmethod
+    def record(cursor, suppliers: List[Dict[str, Any]], snapshot_date: int) -> int:
+        """Записывает срез парсинга в транзакции вызывающего кода.
+
+        Поставщику проставляется supplier_id (по БИН или названию); строка среза пишется, только если
+        показатели отличаются от последних записанных в истории, а неизменившиеся колонки остаются NULL.
+        Первый срез поставщика в сегменте содержит все показатели.
+        Возвращает число записанных строк среза.
+        """
+        segments = {}
+        written = 0
+
+        for supplier in suppliers:
+            segment = (supplier['purchase_method'], supplier['category'])
+            if segment not in segments:
+                cursor.execute('''
+                    INSERT INTO supplier_segments (purchase_method, category) VALUES (?, ?)
+                    ON CONFLICT(purchase_method, category) DO UPDATE SET category = excluded.category
+                    RETURNING id
+                ''', segment)
+                segments[segment] = cursor.fetchone()[0]
+            segment_id = segments[segment]
+
+            supplier_id = SupplierHistory.resolve_supplier(cursor, supplier, snapshot_date)
+            supplier['supplier_id'] = supplier_id
+
+            latest = SupplierHistory.latest_facts(cursor, supplier_id, segment_id)
+            values = [None if supplier.get(column) == latest[column] else supplier.get(column)
+                      for column in FACT_COLUMNS]
+            if all(value is None for value in values):
+                continue
+
+            cursor.execute('''
+                INSERT INTO supplier_snapshots (supplier_id, segment_id, snapshot_date, rank, contracts_count, total_sum)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(supplier_id, segment_id, snapshot_date) DO UPDATE SET
+                    rank = COALESCE(excluded.rank, supplier_snapshots.rank),
+                    contracts_count = COALESCE(excluded.contracts_count, supplier_snapshots.contracts_count),
+                    total_sum = COALESCE(excluded.total_sum, supplier_snapshots.total_sum)
+            ''', (supplier_id, segment_id, snapshot_date, *values))
+            written += 1
+
+        return written
+
+    @staticmethod
+    def latest_facts(cursor, supplier_id: int, segment_id: int) -> Dict[str, Any]:
+        """Последние записанные значения показателей (NULL в срезе — без изменений, берется более раннее)"""
+        cursor.execute('''
+            SELECT
+                (SELECT rank FROM supplier_snapshots
+                 WHERE supplier_id = ? AND segment_id = ? AND rank IS NOT NULL
+                 ORDER BY snapshot_date DESC LIMIT 1) AS rank,
+                (SELECT contracts_count FROM supplier_snapshots
+                 WHERE supplier_id = ? AND segment_id = ? AND contracts_count IS NOT NULL
+                 ORDER BY snapshot_date DESC LIMIT 1) AS contracts_count,
+                (SELECT total_sum FROM supplier_snapshots
+                 WHERE supplier_id = ? AND segment_id = ? AND total_sum IS NOT NULL
+                 ORDER BY snapshot_date DESC LIMIT 1) AS total_sum
+        ''', (supplier_id, segment_id) * len(FACT_COLUMNS))
+        row = cursor.fetchone()
+        return {column: row[column] for column in FACT_COLUMNS}
+
+    def history(self, supplier_id: int, purchase_method: str = None, category: str = None,
+                date_from: str = None, date_to: str = None) -> Optional[Dict[str, Any]]:
+        """Динамика показателей поставщика по сегментам (способ закупки, категория).
+
+        Читается по первичному ключу (supplier_id, segment_id, snapshot_date);
+        пропуски (NULL) заполняются предыдущим значением.
+        """
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('SELECT id, name, first_seen, last_seen FROM supplier_dim WHERE id = ?', (supplier_id,))
+            supplier = cursor.fetchone()
+            if supplier is None:
+                return None
+
+            sql = '''
+                SELECT seg.purchase_method, seg.category, s.snapshot_date, s.rank, s.contracts_count, s.total_sum
+                FROM supplier_snapshots s
+                JOIN supplier_segments seg ON seg.id = s.segment_id
+                WHERE s.supplier_id = ?
+            '''
+            params: List[Any] = [supplier_id]
+            if purchase_method:
+                sql += ' AND seg.purchase_method = ?'
+                params.append(purchase_method)
+            if category:
+                sql += ' AND seg.category = ?'
+                params.append(category)
+            if date_to:
+                sql += ' AND s.snapshot_date <= ?'
+                params.append(self._parse_date(date_to))
+            sql += ' ORDER BY s.segment_id, s.snapshot_date'
+
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+        start = self._parse_date(date_from) if date_from else None
+        series: Dict[tuple, Dict[str, Any]] = {}
+        for row in rows:
+            segment = (row['purchase_method'], row['category'])
+            entry = series.setdefault(segment, {
+                'purchase_method': row['purchase_method'],
+                'category': row['category'],
+                'points': [],
+                '_last': dict.fromkeys(FACT_COLUMNS)
+            })
+            last = entry['_last']
+            for column in FACT_COLUMNS:
+                if row[column] is not None:
+                    last[column] = row[column]
+            if start is None or row['snapshot_date'] >= start:
+                entry['points'].append({'date': self._format_date(row['snapshot_date']), **last})
+
+        for entry in series.values():
+            del entry['_last']
+
+        return {
+            'supplier': {
+                'id': supplier['id'],
+                'name': supplier['name'],
+                'first_seen': self._format_date(supplier['first_seen']),
+                'last_seen': self._format_date(supplier['last_seen'])
+            },
+            'series': list(series.values())
+        }
+
+    @staticmethod
+    def _parse_date(value: str) -> int:
+        """YYYY-MM-DD → YYYYMMDD"""
+        return int(date.fromisoformat(value).strftime('%Y%m%d'))
+
+    @staticmethod
+    def _format_date(value: int) -> str:
+        return f"{value // 10000:04d}-{value // 100 % 100:02d}-{value % 100:02d}"
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Признаки способа закупки и предмета (Товар/Работа/Услуга) в тексте контракта.
+# Совпадение в начале документа (преамбула, предмет договора) весит больше.
+PROCUREMENT_SIGNALS = {
+    'purchase_method': {
+        'Из одного источника путем прямого заключения договора':
+            r'из\s+одного\s+источника|прям\w*\s+заключени\w*\s+договор|единственн\w+\s+поставщик',
+        'Через товарные биржи': r'товарн\w+\s+бирж|биржев\w+\s+(?:торг|сделк)',
+        'Открытый конкурс': r'открыт\w+\s+конкурс|итог\w*\s+конкурса|конкурсн\w+\s+(?:документац|заявк|комисс)',
+    },
+    'category': {
+        'Товар': r'поставк\w*\s+товар|обязуется\s+поставить|товарн\w+\s+накладн|(?:договор|контракт)\w*\s+поставки',
+        'Работа': r'выполнени\w*\s+работ|обязуется\s+выполнить|подрядчик|акт\w*\s+(?:о\s+приемке\s+)?выполненных\s+работ',
+        'Услуга': r'оказани\w*\s+услуг|обязуется\s+оказать|оказанных\s+услуг',
+    },
+}
+
+
+class ProcurementClassifier:
+    """Способ закупки и предмет контракта по ключевым фразам, без обращения к LLM"""
+
+    HEAD_CHARS = 3000
+    HEAD_WEIGHT = 3
+
+    def __init__(self, signals: Dict[str, Dict[str, str]] = None):
+        self.signals = signals or PROCUREMENT_SIGNALS
+        self._labels: List[Tuple[str, str]] = []
+        alternatives = []
+        for field, labels in self.signals.items():
+            for label, pattern in labels.items():
+                alternatives.append(f'(?P<s{len(self._labels)}>{pattern})')
+                self._labels.append((field, label))
+        self._pattern = re.compile('|'.join(alternatives), re.IGNORECASE)
+
+    def classify(self, contract_text: str) -> Dict:
+        """{'purchase_method', 'category', 'confidence': {...}}; None — признаки не найдены"""
+        scores: Dict[str, Dict[str, int]] = {field: {} for field in self.signals}
+        for match in self._pattern.finditer(contract_text or ''):
+            field, label = self._labels[int(match.lastgroup[1:])]
+            weight = self.HEAD_WEIGHT if match.start() < self.HEAD_CHARS else 1
+            scores[field][label] = scores[field].get(label, 0) + weight
+
+        result = {field: None for field in self.signals}
+        result['confidence'] = {}
+        for field, field_scores in scores.items():
+            if field_scores:
+                label, best = max(field_scores.items(), key=lambda item: item[1])
+                result[field] = label
+                result['confidence'][field] = round(best / sum(field_scores.values()), 2)
+        return result
+
+
+class SupplierPrefetch:
+    """Подбор поставщиков параллельно с анализом контракта.
+
+    Предмет и способ закупки определяются по тексту, запрос к goszakup.gov.kz
+    идет, пока модель анализирует контракт; ответ /analyze содержит оба результата.
+    """
+
+    def __init__(self, supplier_selector):
+        self.supplier_selector = supplier_selector
+        self.classifier = ProcurementClassifier()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def infer(self, contract_text: str) -> Optional[Dict]:
+        """Ключ подбора (способ, категория) или None, если предмет контракта не определен"""
+        if not Config.SUPPLIER_PREFETCH_ENABLED or self.supplier_selector is None:
+            return None
+
+        started = time.perf_counter()
+        inferred = self.classifier.classify(contract_text)
+        if inferred['category'] is None:
+            logger.info("🤷 Предмет контракта не определен, поставщики не подбираются")
+            return None
+
+        inferred['method_inferred'] = inferred['purchase_method'] is not None
+        if not inferred['method_inferred']:
+            inferred['purchase_method'] = Config.SUPPLIER_PREFETCH_DEFAULT_METHOD
+        inferred['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"🔮 Подбор поставщиков: {inferred['purchase_method']} / {inferred['category']}")
+        return inferred
+
+    def start(self, contract_text: str) -> Optional[Tuple[Dict, Future]]:
+        """Запускает get_top_suppliers в фоновом потоке; результат забирается collect()"""
+        inferred = self.infer(contract_text)
+        if inferred is None:
+            return None
+
+        future = self._pool().submit(self.supplier_selector.get_top_suppliers, inferred['purchase_method'],
+                                     inferred['category'], Config.SUPPLIER_PREFETCH_LIMIT)
+        return inferred, future
+
+    def collect(self, pending: Optional[Tuple[Dict, Future]]) -> Optional[Dict]:
+        if pending is None:
+            return None
+
+        inferred, future = pending
+        try:
+            suppliers = future.result(timeout=Config.SUPPLIER_PREFETCH_WAIT)
+        except FutureTimeout:
+            # запрос продолжается: результат попадет в кэш поставщиков
+            logger.warning("⏳ Поставщики не получены к окончанию анализа")
+            return self._block(inferred, None)
+        except Exception as e:
+            logger.error(f"❌ Ошибка подбора поставщиков: {e}")
+            return self._block(inferred, None)
+        return self._block(inferred, suppliers)
+
+    async def astart(self, contract_text: str) -> Optional[Tuple[Dict, asyncio.Task]]:
+        """start() для async-обработчиков: запрос к сайту не занимает поток"""
+        inferred = await asyncio.to_thread(self.infer, contract_text)
+        if inferred is None:
+            return None
+
+        task = asyncio.create_task(self.supplier_selector.aget_top_suppliers(
+            inferred['purchase_method'], inferred['category'], Config.SUPPLIER_PREFETCH_LIMIT))
+        # ошибка забирается, даже если результат не ждут (анализ завершился 429/500, таймаут acollect)
+        task.add_done_callback(self._log_failure)
+        return inferred, task
+
+    async def acollect(self, pending: Optional[Tuple[Dict, asyncio.Task]]) -> Optional[Dict]:
+        if pending is None:
+            return None
+
+        inferred, task = pending
+        try:
+            # shield: по таймауту запрос не отменяется и результат попадет в кэш поставщиков
+            suppliers = await asyncio.wait_for(asyncio.shield(task), Config.SUPPLIER_PREFETCH_WAIT)
+        except asyncio.TimeoutError:
+            logger.warning("⏳ Поставщики не получены к окончанию анализа")
+            return self._block(inferred, None)
+        except Exception:
+            # записана в журнал _log_failure
+            return self._block(inferred, None)
+        return self._block(inferred, suppliers)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"❌ Ошибка подбора поставщиков: {task.exception()}")
+
+    @staticmethod
+    def _block(inferred: Dict, suppliers: Optional[List[Dict]]) -> Dict:
+        return {
+            'status': 'success' if suppliers is not None else 'unavailable',
+            'purchase_method': inferred['purchase_method'],
+            'category': inferred['category'],
+            'method_inferred': inferred['method_inferred'],
+            'confidence': inferred['confidence'],
+            'count': len(suppliers or []),
+            'suppliers': suppliers or []
+        }
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # создается в процессе воркера (реестр сервисов пересоздается после fork)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=Config.SUPPLIER_PREFETCH_THREADS,
+                                                    thread_name_prefix='supplier-prefetch')
+            return self._executor
@@ -0,0 +1,176 @@
+import logging
+import re
+import sys
+from typing import Any, Dict, List, Optional
+
+from database.db_connection import Database
+
+logger = logging.getLogger(__name__)
+
+# организационно-правовые формы (Казахстан и РФ), не влияющие на сравнение названий
+LEGAL_FORMS = re.compile(
+    r'\b(?:товарищество\s+с\s+ограниченной\s+ответственностью|акционерное\s+общество|'
+    r'общество\s+с\s+ограниченной\s+ответственностью|индивидуальный\s+предприниматель|'
+    r'государственное\s+коммунальное\s+предприятие|республиканское\s+государственное\s+предприятие|'
+    r'государственное\s+учреждение|крестьянское\s+хозяйство|'
+    r'тоо|ао|ооо|оао|зао|пао|нао|ип|кх|гкп|ркп|ргп|гу|llp|jsc|llc|ltd)\b'
+)
+BIN_PATTERN = re.compile(r'^\d{12}$')
+
+
+class SupplierSearch:
+    """Поиск поставщиков по БИН и по похожему названию (триграммный индекс)"""
+
+    MAX_LIMIT = 50
+    CANDIDATES = 200
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or Database()
+
+    @staticmethod
+    def search_name(name: str) -> str:
+        """Название без кавычек, пунктуации и организационно-правовой формы"""
+        text = (name or '').lower().replace('ё', 'е')
+        text = re.sub(r'[^\w\s]', ' ', text)
+        text = LEGAL_FORMS.sub(' ', text)
+        return re.sub(r'\s+', ' ', text).strip()
+
+    @staticmethod
+    def trigrams(search_name: str) -> set:
+        """Триграммы слов с дополнением пробелами, как в pg_trgm"""
+        result = set()
+        for word in search_name.split():
+            padded = f"  {word} "
+            result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        return result
+
+    @staticmethod
+    def index(cursor, supplier_id: int, name: str):
+        """Переиндексирует название поставщика (в транзакции вызывающего кода)"""
+        search_name = SupplierSearch.search_name(name)
+        grams = SupplierSearch.trigrams(search_name)
+
+        cursor.execute('DELETE FROM supplier_trigrams WHERE supplier_id = ?', (supplier_id,))
+        cursor.executemany('INSERT INTO supplier_trigrams (trigram, supplier_id) VALUES (?, ?)',
+                           [(gram, supplier_id) for gram in grams])
+        cursor.execute('UPDATE supplier_dim SET search_name = ?, trigram_count = ? WHERE id = ?',
+                       (search_name, len(grams), supplier_id))
+
+    def find_by_bin(self, bin_value: str) -> Optional[Dict[str, Any]]:
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(f'''
+                SELECT {self._columns()}
+                FROM supplier_dim d
+                WHERE d.bin = ?
+            ''', (bin_value,))
+            row = cursor.fetchone()
+            return dict(row, similarity=1.0) if row else None
+        finally:
+            cursor.close()
+            conn.close()
+
+    def search(self, query: str, limit: int = 10, min_similarity: float = 0.3) -> List[Dict[str, Any]]:
+        """Поставщики с похожим названием; при равной похожести выше — с большим рейтингом"""
+        query = (query or '').strip()
+        limit = max(1, min(int(limit), self.MAX_LIMIT))
+
+        if BIN_PATTERN.match(query):
+            found = self.find_by_bin(query)
+            return [found] if found else []
+
+        grams = self.trigrams(self.search_name(query))
+        if not grams:
+            return []
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            # сходство по Жаккару: общие / (в запросе + в названии - общие)
+            placeholders = ', '.join('?' for _ in grams)
+            cursor.execute(f'''
+                SELECT {self._columns()}, c.similarity
+                FROM (
+                    SELECT m.supplier_id,
+                           CAST(m.shared AS REAL) / (? + t.trigram_count - m.shared) AS similarity
+                    FROM (
+                        SELECT supplier_id, COUNT(*) AS shared
+                        FROM supplier_trigrams
+                        WHERE trigram IN ({placeholders})
+                        GROUP BY supplier_id
+                        HAVING COUNT(*) >= ?
+                    ) m
+                    JOIN supplier_dim t ON t.id = m.supplier_id
+                    ORDER BY similarity DESC
+                    LIMIT ?
+                ) c
+                JOIN supplier_dim d ON d.id = c.supplier_id
+            ''', [len(grams), *grams, max(1, int(len(grams) * min_similarity)), self.CANDIDATES])
+            candidates = [dict(row) for row in cursor.fetchall() if row['similarity'] >= min_similarity]
+        finally:
+            cursor.close()
+            conn.close()
+
+        candidates.sort(key=lambda row: (round(row['similarity'], 2), row['rating'] or 0), reverse=True)
+        for row in candidates:
+            row['similarity'] = round(row['similarity'], 3)
+        return candidates[:limit]
+
+    def rebuild(self) -> int:
+        """Заполняет измерение из кэша поставщиков и заново строит триграммный индекс"""
+        from services.supplier_history import SupplierHistory
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                SELECT purchase_method, category, name, rank, contracts_count, total_sum
+                FROM suppliers WHERE supplier_id IS NULL
+            ''')
+            orphans = [dict(row) for row in cursor.fetchall()]
+            today = SupplierHistory.date_key()
+            for supplier in orphans:
+                supplier_id = SupplierHistory.resolve_supplier(cursor, supplier, today)
+                cursor.execute('''
+                    UPDATE suppliers SET supplier_id = ?
+                    WHERE purchase_method = ? AND category = ? AND name = ?
+                ''', (supplier_id, supplier['purchase_method'], supplier['category'], supplier['name']))
+
+            cursor.execute('DELETE FROM supplier_trigrams')
+            cursor.execute('SELECT id, name FROM supplier_dim')
+            rows = cursor.fetchall()
+            for row in rows:
+                self.index(cursor, row['id'], row['name'])
+
+            conn.commit()
+            logger.info(f"✅ Индекс поставщиков перестроен: {len(rows)} (новых в измерении: {len(orphans)})")
+            return len(rows)
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка перестроения индекса поставщиков: {e}")
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def _columns() -> str:
+        return '''d.id, d.bin, d.name,
+                  (SELECT MAX(s.rating) FROM suppliers s WHERE s.supplier_id = d.id) AS rating,
+                  (SELECT SUM(s.contracts_count) FROM suppliers s WHERE s.supplier_id = d.id) AS contracts_count'''
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != 'rebuild':
+        print("Использование: python -m services.supplier_search rebuild")
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.INFO)
+    Database().init_db()
+    count = SupplierSearch().rebuild()
+    print(f"✅ Проиндексировано поставщиков: {count}")
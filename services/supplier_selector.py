@@ -1,8 +1,11 @@
 # services/supplier_selector.py
+import asyncio
 from database.db_connection import Database
 import logging
 from services.data_parser import GosZakupParser
+from services.supplier_history import SupplierHistory
 from typing import List, Dict
+from utils import text_normalizer
 
 logger = logging.getLogger(__name__)
 
@@ -17,22 +20,12 @@ class SupplierSelector:
         conn = self.db.get_connection()
         cursor = conn.cursor()
 
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS suppliers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                category TEXT NOT NULL,
-                purchase_method TEXT NOT NULL,
-                rating REAL NOT NULL,
-                contracts_count INTEGER NOT NULL,
-                total_sum REAL NOT NULL,
-                is_real_time BOOLEAN DEFAULT 0,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        cursor.close()
-        conn.close()
+        try:
+            Database.create_supplier_tables(cursor)
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
 
     def get_real_time_suppliers(self, purchase_method: str, category: str, limit: int = 20) -> List[Dict]:
         """Получает актуальных поставщиков в реальном времени"""
@@ -58,10 +51,12 @@ class SupplierSelector:
         cursor = conn.cursor()
 
         cursor.execute('''
-            SELECT name, category, purchase_method, rating, contracts_count, total_sum
-            FROM suppliers 
-            WHERE purchase_method = ? AND category = ?
-            ORDER BY rating DESC, contracts_count DESC
+            SELECT s.name, s.category, s.purchase_method, s.rating, s.contracts_count, s.total_sum,
+                   s.supplier_id, d.bin
+            FROM suppliers s
+            LEFT JOIN supplier_dim d ON d.id = s.supplier_id
+            WHERE s.purchase_method = ? AND s.category = ?
+            ORDER BY s.rating DESC, s.contracts_count DESC
             LIMIT ?
         ''', (purchase_method, category, limit))
 
@@ -78,6 +73,8 @@ class SupplierSelector:
                 'rating': row[3],
                 'contracts_count': row[4],
                 'total_sum': row[5],
+                'supplier_id': row[6],
+                'bin': row[7],
                 'is_real_time': False
             })
 
@@ -92,23 +89,37 @@ class SupplierSelector:
         cursor = conn.cursor()
 
         try:
-            for supplier in suppliers:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO suppliers 
-                    (name, category, purchase_method, rating, contracts_count, total_sum, is_real_time, last_updated)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                ''', (
-                    supplier['name'],
-                    supplier['category'],
-                    supplier['purchase_method'],
-                    supplier['rating'],
-                    supplier['contracts_count'],
-                    supplier['total_sum'],
-                    supplier.get('is_real_time', False)
-                ))
+            # срез сравнивается с последними известными значениями в supplier_snapshots (не со строкой suppliers);
+            # record заполняет supplier['supplier_id'], поэтому вызывается до записи в suppliers
+            written = SupplierHistory.record(cursor, suppliers, SupplierHistory.date_key())
+
+            cursor.executemany('''
+                INSERT INTO suppliers
+                (name, category, purchase_method, rating, contracts_count, total_sum, is_real_time, last_updated,
+                 supplier_id, rank)
+                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?)
+                ON CONFLICT(purchase_method, category, name) DO UPDATE SET
+                    rating = excluded.rating,
+                    contracts_count = excluded.contracts_count,
+                    total_sum = excluded.total_sum,
+                    is_real_time = excluded.is_real_time,
+                    last_updated = excluded.last_updated,
+                    supplier_id = excluded.supplier_id,
+                    rank = excluded.rank
+            ''', [(
+                supplier['name'],
+                supplier['category'],
+                supplier['purchase_method'],
+                supplier['rating'],
+                supplier['contracts_count'],
+                supplier['total_sum'],
+                supplier.get('is_real_time', False),
+                supplier['supplier_id'],
+                supplier.get('rank')
+            ) for supplier in suppliers])
 
             conn.commit()
-            logger.info(f"💾 Сохранено {len(suppliers)} поставщиков в кэш")
+            logger.info(f"💾 Сохранено {len(suppliers)} поставщиков в кэш, изменений в истории: {written}")
 
         except Exception as e:
             logger.error(f"❌ Ошибка сохранения в кэш: {e}")
@@ -134,6 +145,27 @@ class SupplierSelector:
                 logger.warning("📭 Нет данных в кэше")
                 return []
 
+    async def aget_top_suppliers(self, purchase_method: str, category: str, limit: int = 20,
+                                 use_cache: bool = True) -> List[Dict]:
+        """get_top_suppliers для async-обработчиков: запрос к сайту не занимает поток"""
+        try:
+            real_suppliers = await self.parser.aparse_real_time_suppliers(purchase_method, category, limit)
+        except Exception as e:
+            logger.error(f"❌ Ошибка получения реальных поставщиков: {e}")
+            real_suppliers = []
+
+        if real_suppliers:
+            if use_cache:
+                await asyncio.to_thread(self.cache_suppliers, real_suppliers)
+            return real_suppliers
+
+        cached_suppliers = await asyncio.to_thread(self.get_cached_suppliers, purchase_method, category, limit)
+        if cached_suppliers:
+            logger.info("📦 Используем кэшированных поставщиков")
+        else:
+            logger.warning("📭 Нет данных в кэше")
+        return cached_suppliers
+
     def get_all_purchase_methods(self):
         """Возвращает все способы закупок"""
         return self.parser.get_available_purchase_methods()
@@ -145,12 +177,14 @@ class SupplierSelector:
     def search_categories(self, query: str):
         """Поиск категорий"""
         all_categories = self.get_all_categories()
-        return [cat for cat in all_categories if query.lower() in cat.lower()][:10]
+        return [cat for cat in all_categories
+                if query.lower() in cat.lower() or text_normalizer.stems_match(query, cat)][:10]
 
     def search_purchase_methods(self, query: str):
         """Поиск способов закупки"""
         all_methods = self.get_all_purchase_methods()
-        return [method for method in all_methods if query.lower() in method.lower()][:10]
+        return [method for method in all_methods
+                if query.lower() in method.lower() or text_normalizer.stems_match(query, method)][:10]
 
     def get_suppliers_stats(self):
         """Статистика поставщиков"""
@@ -0,0 +1,56 @@
+# Тесты потоковой выгрузки (services/bulk_export.py) на SQLite.
+#   python -m unittest tests.test_bulk_export
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from config import Config
+from database.db_connection import Database
+from services.bulk_export import BulkExporter
+
+
+class SqliteStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = (Config.DATABASE_TYPE, Config.SQLITE_DATABASE, Config.EXPORT_BATCH_ROWS)
+        self.tmp = tempfile.TemporaryDirectory()
+        Config.DATABASE_TYPE = 'sqlite'
+        Config.SQLITE_DATABASE = os.path.join(self.tmp.name, 'laws.db')
+        Config.EXPORT_BATCH_ROWS = 2
+
+        self.db = Database()
+        self.db.init_db()
+        conn = self.db.get_connection()
+        conn.executemany('''
+            INSERT INTO suppliers (name, purchase_method, category, rating, rank, contracts_count, total_sum)
+            VALUES (?, 'Открытый конкурс', 'Товар', 4.5, ?, 10, 1000.0)
+        ''', [(f'ТОО «Поставщик {i}»', i) for i in range(1, 8)])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        Config.DATABASE_TYPE, Config.SQLITE_DATABASE, Config.EXPORT_BATCH_ROWS = self.saved
+        self.tmp.cleanup()
+
+    def test_writes_not_blocked_during_export(self):
+        exporter = BulkExporter(self.db)
+        stats = {}
+        stream = exporter.stream(exporter.prepare('suppliers', 'csv'), stats)
+        first = next(stream)
+
+        # выгрузка остановлена между пачками: курсор чтения открыт
+        writer = sqlite3.connect(Config.SQLITE_DATABASE, timeout=0.1)
+        try:
+            writer.execute("INSERT INTO law_articles (law_type, article_number) VALUES ('44_fz', '1')")
+            writer.commit()
+        finally:
+            writer.close()
+
+        body = first + b''.join(stream)
+        self.assertEqual(stats['rows'], 7)
+        self.assertEqual(body.decode('utf-8').count('Поставщик'), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+# Тесты потокового чтения DOCX (utils/docx_stream.py): автонумерация и надписи.
+#   python -m unittest tests.test_docx_stream
+import os
+import tempfile
+import unittest
+import zipfile
+
+from utils.docx_stream import extract_docx_text, format_number
+
+NS = ('xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+      'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"')
+
+NUMBERING = f'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:numbering {NS}>
+  <w:abstractNum w:abstractNumId="1">
+    <w:lvl w:ilvl="0"><w:start w:val="1"/><w:numFmt w:val="decimal"/><w:lvlText w:val="%1."/></w:lvl>
+    <w:lvl w:ilvl="1"><w:start w:val="1"/><w:numFmt w:val="decimal"/><w:lvlText w:val="%1.%2."/></w:lvl>
+  </w:abstractNum>
+  <w:abstractNum w:abstractNumId="2">
+    <w:lvl w:ilvl="0"><w:start w:val="5"/><w:numFmt w:val="russianLower"/><w:lvlText w:val="%1)"/></w:lvl>
+  </w:abstractNum>
+  <w:abstractNum w:abstractNumId="3">
+    <w:lvl w:ilvl="0"><w:start w:val="1"/><w:numFmt w:val="decimal"/><w:lvlText w:val="Раздел %1."/>
+      <w:pStyle w:val="Heading1"/></w:lvl>
+    <w:lvl w:ilvl="1"><w:start w:val="1"/><w:numFmt w:val="decimal"/><w:lvlText w:val="%1.%2."/>
+      <w:pStyle w:val="Heading2"/></w:lvl>
+  </w:abstractNum>
+  <w:num w:numId="1"><w:abstractNumId w:val="1"/></w:num>
+  <w:num w:numId="2"><w:abstractNumId w:val="1"/></w:num>
+  <w:num w:numId="3"><w:abstractNumId w:val="2"/></w:num>
+  <w:num w:numId="4"><w:abstractNumId w:val="1"/>
+    <w:lvlOverride w:ilvl="0"><w:startOverride w:val="1"/></w:lvlOverride></w:num>
+  <w:num w:numId="5"><w:abstractNumId w:val="3"/></w:num>
+</w:numbering>'''
+
+STYLES = f'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:styles {NS}>
+  <w:style w:type="paragraph" w:styleId="ListNumber"><w:pPr><w:numPr><w:numId w:val="1"/></w:numPr></w:pPr></w:style>
+  <w:style w:type="paragraph" w:styleId="Clause"><w:basedOn w:val="ListNumber"/></w:style>
+  <w:style w:type="paragraph" w:styleId="Heading1"><w:pPr><w:numPr><w:numId w:val="5"/></w:numPr></w:pPr></w:style>
+  <w:style w:type="paragraph" w:styleId="Heading2"><w:basedOn w:val="Heading1"/></w:style>
+</w:styles>'''
+
+
+def paragraph(text, style=None, num_id=None, level=None):
+    props = f'<w:pStyle w:val="{style}"/>' if style else ''
+    if num_id is not None or level is not None:
+        props += '<w:numPr>'
+        props += f'<w:ilvl w:val="{level}"/>' if level is not None else ''
+        props += f'<w:numId w:val="{num_id}"/>' if num_id is not None else ''
+        props += '</w:numPr>'
+    return f'<w:p><w:pPr>{props}</w:pPr><w:r><w:t>{text}</w:t></w:r></w:p>'
+
+
+def text_box(text):
+    content = f'<w:txbxContent>{paragraph(text)}</w:txbxContent>'
+    return (f'<w:p><w:r><mc:AlternateContent><mc:Choice Requires="wps"><w:drawing>{content}</w:drawing></mc:Choice>'
+            f'<mc:Fallback><w:pict>{content}</w:pict></mc:Fallback></mc:AlternateContent></w:r></w:p>')
+
+
+class DocxNumberingTest(unittest.TestCase):
+
+    def extract(self, *blocks, numbering=True):
+        document = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    f'<w:document {NS}><w:body>{"".join(blocks)}</w:body></w:document>')
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'contract.docx')
+            with zipfile.ZipFile(path, 'w') as archive:
+                archive.writestr('word/document.xml', document)
+                if numbering:
+                    archive.writestr('word/numbering.xml', NUMBERING)
+                    archive.writestr('word/styles.xml', STYLES)
+            return extract_docx_text(path).split('\n')
+
+    def test_numbering_from_paragraph_style(self):
+        lines = self.extract(paragraph('Предмет контракта', style='ListNumber'),
+                             paragraph('Цена контракта', style='Clause'),
+                             paragraph('Цена является твердой', style='ListNumber', level=1))
+        self.assertEqual(lines, ['1. Предмет контракта', '2. Цена контракта', '2.1. Цена является твердой'])
+
+    def test_numbering_continues_across_num_ids(self):
+        lines = self.extract(paragraph('Первый', num_id=1, level=0),
+                             paragraph('Второй', num_id=2, level=0),
+                             paragraph('Заново', num_id=4, level=0),
+                             paragraph('Дальше', num_id=1, level=0))
+        self.assertEqual(lines, ['1. Первый', '2. Второй', '1. Заново', '2. Дальше'])
+
+    def test_start_and_level_text(self):
+        lines = self.extract(paragraph('пункт', num_id=3, level=0), paragraph('пункт', num_id=3, level=0))
+        self.assertEqual(lines, ['д) пункт', 'е) пункт'])
+
+    def test_numbered_heading_styles(self):
+        lines = self.extract(paragraph('Общие положения', style='Heading1'),
+                             paragraph('Термины', style='Heading2'),
+                             paragraph('Предмет', style='Heading1'))
+        self.assertEqual([line for line in lines if line],
+                         ['Раздел 1. Общие положения', '1.1. Термины', 'Раздел 2. Предмет'])
+
+    def test_inline_num_id_zero_disables_style_numbering(self):
+        self.assertEqual(self.extract(paragraph('Без номера', style='ListNumber', num_id=0)), ['Без номера'])
+
+    def test_text_box_read_once(self):
+        lines = self.extract(text_box('Текст надписи'), paragraph('После надписи'))
+        self.assertEqual(lines, ['Текст надписи', 'После надписи'])
+
+    def test_without_numbering_part(self):
+        self.assertEqual(self.extract(paragraph('Пункт', num_id=1, level=0), numbering=False), ['1. Пункт'])
+
+    def test_format_number(self):
+        self.assertEqual([format_number(value, 'lowerLetter') for value in (1, 26, 27)], ['a', 'z', 'aa'])
+        self.assertEqual(format_number(14, 'upperRoman'), 'XIV')
+        self.assertEqual(format_number(3, 'decimalZero'), '03')
+
+
+if __name__ == '__main__':
+    unittest.main()
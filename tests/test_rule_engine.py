@@ -0,0 +1,44 @@
+# Тесты предварительной проверки правилами (services/rule_engine.py).
+#   python -m unittest tests.test_rule_engine
+import unittest
+
+from services.rule_engine import RuleEngine
+
+IKZ = '2 4 7 7 7 0 1 2 3 4 5 6 7 7 7 0 1 0 0 1 0 0 1 0 0 0 1 0 0 0 0 2 4 4 1 2'.replace(' ', '')
+
+
+class IkzRuleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = RuleEngine()
+
+    def ikz_issues(self, text):
+        result = self.engine.check(text, '44_fz')
+        return [issue for issue in result['issues'] if issue['rule'] == 'ikz'], result['covered_areas']
+
+    def test_correct_ikz_followed_by_numbered_clause(self):
+        issues, covered = self.ikz_issues(f'Идентификационный код закупки: {IKZ}\n1. Предмет контракта\n')
+        self.assertEqual(issues, [])
+        self.assertIn('идентификационный код закупки', covered)
+
+    def test_grouped_ikz_on_one_line(self):
+        grouped = ' '.join(IKZ[i:i + 6] for i in range(0, 36, 6))
+        issues, _ = self.ikz_issues(f'ИКЗ № {grouped}\n2. Цена контракта')
+        self.assertEqual(issues, [])
+
+    def test_short_ikz_reported(self):
+        issues, _ = self.ikz_issues(f'ИКЗ: {IKZ[:35]}\n1. Предмет контракта')
+        self.assertEqual(len(issues), 1)
+        self.assertIn('35 цифр', issues[0]['issue'])
+
+    def test_missing_ikz_reported(self):
+        issues, _ = self.ikz_issues('1. Предмет контракта')
+        self.assertEqual(issues[0]['issue'], 'В контракте не указан идентификационный код закупки')
+
+    def test_yo_folded(self):
+        result = self.engine.check('Цена контракта является твёрдой', '44_fz')
+        self.assertNotIn('firm_price', [issue['rule'] for issue in result['issues']])
+
+
+if __name__ == '__main__':
+    unittest.main()
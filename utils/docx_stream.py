@@ -0,0 +1,288 @@
+import logging
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+MC = '{http://schemas.openxmlformats.org/markup-compatibility/2006}'
+HEADING_STYLE = re.compile(r'heading|title|заголовок|название', re.IGNORECASE)
+LATIN = 'abcdefghijklmnopqrstuvwxyz'
+# буквенная нумерация Word по-русски: без ё, й, ъ, ы, ь
+RUSSIAN = 'абвгдежзиклмнопрстуфхцчшщэюя'
+
+
+def _attr(element, name):
+    return element.get(W + name) if element is not None else None
+
+
+def read_numbering(archive: zipfile.ZipFile) -> Dict[str, Dict[str, Any]]:
+    """Автонумерация из word/numbering.xml.
+
+    abstract: abstractNumId → {уровень: {fmt, start, text (lvlText), style (pStyle уровня)}};
+    nums: numId → {abstract: abstractNumId, starts: {уровень: startOverride}}.
+    """
+    try:
+        root = ET.fromstring(archive.read('word/numbering.xml'))
+    except KeyError:
+        return {'abstract': {}, 'nums': {}}
+
+    abstract = {}
+    for abstract_num in root.iter(W + 'abstractNum'):
+        abstract[_attr(abstract_num, 'abstractNumId')] = {
+            int(_attr(level, 'ilvl') or 0): {
+                'fmt': _attr(level.find(W + 'numFmt'), 'val') or 'decimal',
+                'start': int(_attr(level.find(W + 'start'), 'val') or 1),
+                'text': _attr(level.find(W + 'lvlText'), 'val'),
+                'style': _attr(level.find(W + 'pStyle'), 'val')
+            }
+            for level in abstract_num.iter(W + 'lvl')
+        }
+
+    nums = {}
+    for num in root.iter(W + 'num'):
+        nums[_attr(num, 'numId')] = {
+            'abstract': _attr(num.find(W + 'abstractNumId'), 'val'),
+            'starts': {int(_attr(override, 'ilvl') or 0): int(_attr(override.find(W + 'startOverride'), 'val'))
+                       for override in num.iter(W + 'lvlOverride')
+                       if override.find(W + 'startOverride') is not None}
+        }
+    return {'abstract': abstract, 'nums': nums}
+
+
+def read_styles(archive: zipfile.ZipFile) -> Dict[str, Tuple[Optional[str], Optional[int]]]:
+    """Нумерация, заданная стилями абзацев (word/styles.xml): styleId → (numId, уровень) с учетом basedOn"""
+    try:
+        root = ET.fromstring(archive.read('word/styles.xml'))
+    except KeyError:
+        return {}
+
+    declared = {}
+    based_on = {}
+    for style in root.iter(W + 'style'):
+        style_id = _attr(style, 'styleId')
+        num_pr = style.find(W + 'pPr/' + W + 'numPr')
+        if num_pr is not None:
+            level = _attr(num_pr.find(W + 'ilvl'), 'val')
+            declared[style_id] = (_attr(num_pr.find(W + 'numId'), 'val'), int(level) if level else None)
+        parent = _attr(style.find(W + 'basedOn'), 'val')
+        if parent:
+            based_on[style_id] = parent
+
+    styles = {}
+    for style_id in set(declared) | set(based_on):
+        current, seen = style_id, set()
+        while current is not None and current not in declared and current not in seen:
+            seen.add(current)
+            current = based_on.get(current)
+        if current in declared and declared[current][0] not in (None, '0'):
+            styles[style_id] = declared[current]
+    return styles
+
+
+def _roman(value: int) -> str:
+    result = ''
+    for number, letters in ((1000, 'm'), (900, 'cm'), (500, 'd'), (400, 'cd'), (100, 'c'), (90, 'xc'),
+                            (50, 'l'), (40, 'xl'), (10, 'x'), (9, 'ix'), (5, 'v'), (4, 'iv'), (1, 'i')):
+        count, value = divmod(value, number)
+        result += letters * count
+    return result
+
+
+def format_number(value: int, fmt: Optional[str]) -> str:
+    """Номер уровня в формате numFmt: a, b, …, aa (буквы Word повторяются), i, ii, …; прочие — цифрами"""
+    alphabet = {'lowerLetter': LATIN, 'upperLetter': LATIN.upper(),
+                'russianLower': RUSSIAN, 'russianUpper': RUSSIAN.upper()}.get(fmt)
+    if alphabet and value > 0:
+        return alphabet[(value - 1) % len(alphabet)] * ((value - 1) // len(alphabet) + 1)
+    if fmt in ('lowerRoman', 'upperRoman') and value > 0:
+        return _roman(value) if fmt == 'lowerRoman' else _roman(value).upper()
+    if fmt == 'decimalZero':
+        return f'{value:02d}'
+    return str(value)
+
+
+class _Numbering:
+    """Счетчики автонумерации Word: восстанавливает номера пунктов вида 1.2.3.
+
+    Счетчики ведутся по abstractNum: экземпляры списка (numId) с общим abstractNum продолжают
+    нумерацию друг друга, startOverride начинает ее заново. Номер выводится по lvlText уровня.
+    """
+
+    def __init__(self, numbering: Dict[str, Dict[str, Any]], styles: Dict[str, Tuple[Optional[str], Optional[int]]]):
+        self.abstract = numbering['abstract']
+        self.nums = numbering['nums']
+        self.styles = styles
+        self.counters: Dict[str, List[Optional[int]]] = {}
+        self.started = set()
+
+    def resolve(self, style: str, num_id: Optional[str], level: Optional[int]) -> Optional[Tuple[str, int]]:
+        """numPr абзаца, дополненный нумерацией его стиля: (numId, уровень) или None"""
+        style_num_id, style_level = self.styles.get(style, (None, None))
+        num_id = num_id if num_id is not None else style_num_id
+        if not num_id or num_id == '0':
+            return None
+        if level is None:
+            level = style_level
+        if level is None:
+            # уровень многоуровневого списка, привязанный к стилю (нумерованные заголовки)
+            levels = self._levels(num_id)
+            level = next((index for index, spec in levels.items() if style and spec['style'] == style), 0)
+        return num_id, level
+
+    def _levels(self, num_id: str) -> Dict[int, Dict[str, Any]]:
+        return self.abstract.get(self.nums.get(num_id, {}).get('abstract'), {})
+
+    def marker(self, num_id: str, level: int) -> str:
+        if not num_id or num_id == '0':
+            return ''
+        levels = self._levels(num_id)
+        spec = levels.get(level, {})
+        if spec.get('fmt') == 'bullet':
+            return '- '
+        if spec.get('fmt') == 'none':
+            return ''
+
+        num = self.nums.get(num_id, {})
+        counters = self.counters.setdefault(num.get('abstract') or f'num:{num_id}', [])
+        if num_id not in self.started:
+            self.started.add(num_id)
+            for override_level, start in sorted(num.get('starts', {}).items()):
+                del counters[override_level:]
+                counters.extend([None] * (override_level - len(counters)))
+                counters.append(start - 1)
+
+        start = [levels.get(index, {}).get('start', 1) for index in range(level + 1)]
+        del counters[level + 1:]
+        while len(counters) <= level:
+            counters.append(None)
+        counters[level] = (start[level] - 1 if counters[level] is None else counters[level]) + 1
+        values = [start[index] if value is None else value for index, value in enumerate(counters)]
+
+        text = spec.get('text')
+        if text is None:
+            return '.'.join(str(value) for value in values if value) + '. '
+
+        def number(match):
+            index = int(match.group(1)) - 1
+            if index >= len(values):
+                return ''
+            return format_number(values[index], levels.get(index, {}).get('fmt'))
+
+        text = re.sub(r'%(\d)', number, text).strip()
+        return text + ' ' if text else ''
+
+
+def iter_docx_blocks(file_path: str) -> Iterator[str]:
+    """Абзацы и строки таблиц DOCX в порядке документа.
+
+    word/document.xml читается из архива потоково (iterparse), обработанные
+    элементы сразу очищаются, поэтому память не зависит от размера документа.
+    Строки таблиц выводятся как ячейки через « | », заголовки отделяются
+    пустой строкой, к пунктам с автонумерацией (в том числе заданной стилем) добавляется их номер.
+    Из mc:AlternateContent берется только mc:Choice: mc:Fallback повторяет тот же текст.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        numbering = _Numbering(read_numbering(archive), read_styles(archive))
+
+        with archive.open('word/document.xml') as stream:
+            paragraphs: List[List[str]] = []
+            cells: List[List[str]] = []
+            rows: List[List[str]] = []
+            body = None
+            in_revision = False
+            fallback = 0
+
+            for event, element in ET.iterparse(stream, events=('start', 'end')):
+                tag = element.tag
+
+                if tag == MC + 'Fallback':
+                    fallback += 1 if event == 'start' else -1
+                    if event == 'end':
+                        element.clear()
+                    continue
+                if fallback:
+                    continue
+
+                if event == 'start':
+                    if tag == W + 'body':
+                        body = element
+                    elif tag == W + 'p':
+                        paragraphs.append([])
+                    elif tag == W + 'tc':
+                        cells.append([])
+                    elif tag == W + 'tr':
+                        rows.append([])
+                    elif tag == W + 'pPrChange':
+                        in_revision = True
+                    continue
+
+                if tag == W + 't':
+                    if paragraphs and element.text:
+                        paragraphs[-1].append(element.text)
+                elif tag == W + 'tab':
+                    if paragraphs:
+                        paragraphs[-1].append('\t')
+                elif tag in (W + 'br', W + 'cr'):
+                    if paragraphs:
+                        paragraphs[-1].append('\n')
+
+                elif tag == W + 'pPrChange':
+                    in_revision = False
+
+                elif tag == W + 'pPr':
+                    # прежние свойства абзаца из режима правок не учитываем
+                    if paragraphs and not in_revision:
+                        style = _attr(element.find(W + 'pStyle'), 'val') or ''
+                        num_pr = element.find(W + 'numPr')
+                        level = _attr(num_pr.find(W + 'ilvl'), 'val') if num_pr is not None else None
+                        resolved = numbering.resolve(
+                            style, _attr(num_pr.find(W + 'numId'), 'val') if num_pr is not None else None,
+                            int(level) if level else None)
+                        prefix = numbering.marker(*resolved) if resolved else ''
+                        if HEADING_STYLE.search(style) or element.find(W + 'outlineLvl') is not None:
+                            prefix = '\n' + prefix
+                        if prefix:
+                            paragraphs[-1].insert(0, prefix)
+
+                elif tag == W + 'p':
+                    text = ''.join(paragraphs.pop()) if paragraphs else ''
+                    if paragraphs:
+                        # абзац внутри надписи: текст остается в объемлющем абзаце
+                        paragraphs[-1].append(text)
+                    elif cells:
+                        if text.strip():
+                            cells[-1].append(text.strip())
+                    elif text.strip():
+                        yield text.rstrip()
+                    element.clear()
+
+                elif tag == W + 'tc':
+                    cell = ' '.join(cells.pop()) if cells else ''
+                    if rows:
+                        rows[-1].append(cell)
+
+                elif tag == W + 'tr':
+                    row = rows.pop() if rows else []
+                    line = ' | '.join(cell for cell in row if cell)
+                    if cells:
+                        # вложенная таблица попадает в текст ячейки
+                        if line:
+                            cells[-1].append(line)
+                    elif line:
+                        yield line
+                    element.clear()
+
+                elif tag == W + 'tbl' and not cells:
+                    yield ''
+                    element.clear()
+
+                if body is not None and not paragraphs and not cells and not rows and tag in (W + 'p', W + 'tbl'):
+                    body.clear()
+
+
+def extract_docx_text(file_path: str) -> str:
+    """Текст DOCX одной строкой; части собираются в список и склеиваются один раз"""
+    return '\n'.join(iter_docx_blocks(file_path)).strip('\n')
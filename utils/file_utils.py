@@ -1,7 +1,11 @@
 import PyPDF2
-from docx import Document
 import os
 import logging
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.docx_stream import extract_docx_text
 
 logger = logging.getLogger(__name__)
 
@@ -44,22 +48,9 @@ class FileProcessor:
 
     @staticmethod
     def _extract_from_docx(file_path):
-        """Извлекает текст из DOC/DOCX"""
+        """Извлекает текст из DOCX потоковым разбором word/document.xml"""
         try:
-            doc = Document(file_path)
-            text = ""
-
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text += paragraph.text + "\n"
-
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            text += cell.text + " | "
-                    text += "\n"
-                text += "\n"
+            text = extract_docx_text(file_path)
 
             if not text.strip():
                 raise Exception("DOCX файл не содержит текста")
@@ -67,6 +58,24 @@ class FileProcessor:
             logger.info(f"Извлечено {len(text)} символов из DOCX")
             return text
 
+        except zipfile.BadZipFile:
+            logger.error("Файл не является документом DOCX")
+            raise Exception("Формат DOC не поддерживается, сохраните файл в формате DOCX")
         except Exception as e:
             logger.error(f"Ошибка при чтении DOCX: {str(e)}")
-            raise Exception(f"Ошибка при чтении DOCX: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Ошибка при чтении DOCX: {str(e)}")
+
+
+def extract_text(path: str) -> str:
+    """Извлечение текста в процессе пула (разбор PDF нагружает CPU)"""
+    return FileProcessor.extract_text_from_file(path, os.path.basename(path))
+
+
+def extraction_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Пул процессов для extract_text.
+
+    Процессы создаются через forkserver (где его нет — spawn), а не fork: fork процесса с работающими потоками
+    (HTTP-клиенты, SQLite, блокировки logging) может оставить в дочернем процессе навсегда занятую блокировку.
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
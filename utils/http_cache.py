@@ -0,0 +1,140 @@
+import gzip
+import hashlib
+import logging
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Callable, Optional, Tuple
+
+from flask import make_response, request
+
+from config import Config
+from database.db_connection import Database
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+
+def supplier_data_version() -> Tuple[str, Optional[str]]:
+    versions = Database().get_data_versions()
+    return versions['suppliers_version'], versions['suppliers_updated']
+
+
+def corpus_data_version() -> Tuple[str, Optional[str]]:
+    versions = Database().get_data_versions()
+    return str(versions['corpus_version']), versions['corpus_updated']
+
+
+def http_cached(cache_control: str, data_version: Callable[[], Tuple[str, Optional[str]]] = None):
+    """ETag, Last-Modified и ответ 304 для GET-обработчика.
+
+    С data_version ETag строится из версии данных и адреса запроса до вызова
+    обработчика, и при совпадении ответ не пересчитывается. Без нее ETag —
+    хэш тела ответа: экономится только трафик.
+    """
+    def decorator(func):
+        if not Config.HTTP_CACHE_ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            last_modified = None
+            etag = None
+
+            if data_version is not None:
+                version, updated = data_version()
+                etag = _digest(f"{request.endpoint}|{request.full_path}|{version}")
+                last_modified = _parse_timestamp(updated)
+                if _not_modified(etag, last_modified):
+                    return _not_modified_response(etag, last_modified, cache_control)
+
+            response = make_response(func(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            if etag is None:
+                etag = _digest(response.get_data())
+                if _not_modified(etag, None):
+                    return _not_modified_response(etag, None, cache_control)
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = cache_control
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def compress_response(response):
+    """gzip/brotli для текстовых ответов больше COMPRESSION_MIN_SIZE (after_request)"""
+    if (response.direct_passthrough or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if response.content_length is None or response.content_length < Config.COMPRESSION_MIN_SIZE:
+        return response
+
+    encoding = _choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=Config.COMPRESSION_BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(data, compresslevel=Config.COMPRESSION_GZIP_LEVEL)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def _choose_encoding(accept_encodings) -> Optional[str]:
+    if brotli is not None and accept_encodings['br'] > 0:
+        return 'br'
+    if accept_encodings['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def _digest(value) -> str:
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    return hashlib.sha1(value).hexdigest()[:20]
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """CURRENT_TIMESTAMP SQLite (UTC) → datetime"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value)[:19], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def _not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    # If-None-Match приоритетнее If-Modified-Since (RFC 9110, 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def _not_modified_response(etag: str, last_modified: Optional[datetime], cache_control: str):
+    response = make_response('', 304)
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,131 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+import uuid
+from datetime import datetime
+from functools import wraps
+from typing import Any, Dict, List
+
+from flask import make_response, request
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = '.pstats'
+
+# одновременно профилируется только один запрос процесса
+_profile_lock = threading.Lock()
+
+
+def profiling_requested() -> bool:
+    return request.headers.get('X-Profile') == '1' or request.args.get('profile') == '1'
+
+
+def profiled(name: str):
+    """Профилирует обработчик cProfile, если PROFILING_ENABLED и запрос содержит
+    заголовок X-Profile: 1 или параметр ?profile=1.
+
+    При выключенной настройке возвращает обработчик без обертки.
+    """
+    def decorator(func):
+        if not Config.PROFILING_ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiling_requested():
+                return func(*args, **kwargs)
+
+            if not _profile_lock.acquire(blocking=False):
+                response = make_response(func(*args, **kwargs))
+                response.headers['X-Profile'] = 'busy'
+                return response
+
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            try:
+                profiler.enable()
+                try:
+                    result = func(*args, **kwargs)
+                finally:
+                    profiler.disable()
+                duration_ms = int((time.perf_counter() - started) * 1000)
+                profile_id = save_profile(profiler, name, duration_ms)
+            finally:
+                _profile_lock.release()
+
+            response = make_response(result)
+            response.headers['X-Profile-Id'] = profile_id
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def save_profile(profiler: cProfile.Profile, name: str, duration_ms: int) -> str:
+    """Пишет pstats-файл запроса и удаляет самые старые сверх PROFILING_MAX_FILES"""
+    os.makedirs(Config.PROFILING_DIR, exist_ok=True)
+    profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}_{name}_{duration_ms}ms_{uuid.uuid4().hex[:8]}"
+    profiler.dump_stats(os.path.join(Config.PROFILING_DIR, profile_id + PROFILE_SUFFIX))
+    logger.info(f"⏱️ Профиль {name} ({duration_ms} мс) сохранен: {profile_id}")
+
+    for stale in _profile_files()[Config.PROFILING_MAX_FILES:]:
+        try:
+            os.remove(os.path.join(Config.PROFILING_DIR, stale))
+        except FileNotFoundError:
+            pass
+
+    return profile_id
+
+
+def list_profiles(limit: int = 50) -> List[Dict[str, Any]]:
+    """Последние профили, от новых к старым"""
+    profiles = []
+    for filename in _profile_files()[:limit]:
+        path = os.path.join(Config.PROFILING_DIR, filename)
+        profile_id = filename[:-len(PROFILE_SUFFIX)]
+        parts = profile_id.split('_')
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        profiles.append({
+            'id': profile_id,
+            'endpoint': '_'.join(parts[1:-2]),
+            'duration_ms': int(parts[-2].rstrip('ms')) if len(parts) >= 4 else None,
+            'size': stat.st_size,
+            'created_at': datetime.utcfromtimestamp(stat.st_mtime).isoformat(timespec='seconds')
+        })
+    return profiles
+
+
+def profile_path(profile_id: str):
+    """Путь к файлу профиля; None для неизвестного или небезопасного идентификатора"""
+    filename = os.path.basename(profile_id) + PROFILE_SUFFIX
+    path = os.path.join(Config.PROFILING_DIR, filename)
+    return path if os.path.isfile(path) else None
+
+
+def profile_summary(profile_id: str, limit: int = 40):
+    """Текстовая сводка профиля: функции по суммарному времени"""
+    path = profile_path(profile_id)
+    if path is None:
+        return None
+
+    stream = io.StringIO()
+    pstats.Stats(path, stream=stream).sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue()
+
+
+def _profile_files() -> List[str]:
+    try:
+        names = [name for name in os.listdir(Config.PROFILING_DIR) if name.endswith(PROFILE_SUFFIX)]
+    except FileNotFoundError:
+        return []
+    return sorted(names, reverse=True)
@@ -0,0 +1,140 @@
+import re
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from config import Config
+
+PAGE_MARKER = re.compile(r'^\s*---\s*Страница\s+\d+\s*---\s*$', re.MULTILINE)
+PAGE_NUMBER = re.compile(r'^\s*(?:[-–—]\s*)?(?:стр(?:аница)?\.?\s*)?\d{1,4}(?:\s*(?:из|/)\s*\d{1,4})?(?:\s*[-–—])?\s*$',
+                         re.IGNORECASE)
+HYPHEN_BREAK = re.compile(r'([а-яёa-z])[-­]\n\s*([а-яёa-z])')
+SOFT_HYPHEN = re.compile('­')
+SPACES = re.compile(r'[ \t ]+')
+BLANK_LINES = re.compile(r'\n{3,}')
+SIGNATURE_LINE = re.compile(r'_{3,}\s*/[^/\n]{0,60}/?\s*$|^\s*м\.\s*п\.?\s*$|^\s*\(?подпись\)?\s*$', re.IGNORECASE)
+REQUISITES_HEADING = re.compile(
+    r'^\s*(?:\d{1,2}\.\s*)?(?:юридические\s+)?(?:адреса|реквизиты|место\s+нахождения)[\w\s,]*(?:реквизиты|сторон)?\s*\.?\s*$',
+    re.IGNORECASE
+)
+ANNEX_HEADING = re.compile(r'^\s*приложение\s*(?:№\s*)?\d*\s*(?:к\s+(?:контракту|договору).*)?$', re.IGNORECASE)
+TOKEN_ESTIMATE = re.compile(r'\w+|[^\w\s]')
+
+# сколько строк с начала и конца страницы проверяется на колонтитулы
+EDGE_LINES = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """Оценка числа токенов: слова и знаки препинания"""
+    return len(TOKEN_ESTIMATE.findall(text or ''))
+
+
+def clean_contract_text(text: str, drop_requisites: bool = None,
+                        drop_annexes: bool = None) -> Tuple[str, Dict[str, Any]]:
+    """Убирает из текста контракта разметку страниц, колонтитулы, номера страниц,
+    переносы и лишние пробелы; по настройке — реквизиты сторон и приложения.
+
+    Возвращает очищенный текст и статистику сэкономленных символов и токенов.
+    """
+    drop_requisites = Config.TEXT_CLEANER_DROP_REQUISITES if drop_requisites is None else drop_requisites
+    drop_annexes = Config.TEXT_CLEANER_DROP_ANNEXES if drop_annexes is None else drop_annexes
+    text = text or ''
+    removed = Counter()
+
+    pages = _split_pages(text)
+    removed['page_markers'] = len(PAGE_MARKER.findall(text))
+    lines = _strip_page_furniture(pages, removed)
+
+    if drop_requisites:
+        lines = _drop_requisites(lines, removed)
+    if drop_annexes:
+        lines = _drop_annexes(lines, removed)
+
+    cleaned = '\n'.join(lines)
+    cleaned = SOFT_HYPHEN.sub('', cleaned)
+    cleaned, removed['hyphenations'] = HYPHEN_BREAK.subn(r'\1\2', cleaned)
+    cleaned = _join_wrapped_lines(cleaned)
+    cleaned = BLANK_LINES.sub('\n\n', cleaned).strip()
+
+    tokens_before = estimate_tokens(text)
+    tokens_after = estimate_tokens(cleaned)
+    return cleaned, {
+        'chars_before': len(text),
+        'chars_after': len(cleaned),
+        'chars_saved': len(text) - len(cleaned),
+        'tokens_before': tokens_before,
+        'tokens_after': tokens_after,
+        'tokens_saved': tokens_before - tokens_after,
+        'removed': dict(removed)
+    }
+
+
+def _split_pages(text: str) -> List[List[str]]:
+    if PAGE_MARKER.search(text):
+        chunks = PAGE_MARKER.split(text)
+    else:
+        chunks = text.split('\f')
+    return [[SPACES.sub(' ', line).strip() for line in chunk.split('\n')] for chunk in chunks if chunk.strip()]
+
+
+def _line_key(line: str) -> str:
+    """Ключ для сравнения колонтитулов: номера страниц и даты не мешают совпадению"""
+    return re.sub(r'\d+', '#', line.lower())
+
+
+def _strip_page_furniture(pages: List[List[str]], removed: Counter) -> List[str]:
+    """Удаляет строки, повторяющиеся в начале/конце большинства страниц, и номера страниц"""
+    running = set()
+    if len(pages) >= 3:
+        seen = Counter()
+        for page in pages:
+            content = [line for line in page if line]
+            edges = content[:EDGE_LINES] + content[-EDGE_LINES:]
+            seen.update({_line_key(line) for line in edges})
+        min_pages = max(2, len(pages) // 2)
+        running = {key for key, count in seen.items() if count >= min_pages}
+
+    lines = []
+    for page in pages:
+        content_indices = [index for index, line in enumerate(page) if line]
+        edge_indices = set(content_indices[:EDGE_LINES] + content_indices[-EDGE_LINES:])
+        for index, line in enumerate(page):
+            if index in edge_indices:
+                if PAGE_NUMBER.match(line):
+                    removed['page_numbers'] += 1
+                    continue
+                if _line_key(line) in running:
+                    removed['running_lines'] += 1
+                    continue
+            lines.append(line)
+    return lines
+
+
+def _drop_requisites(lines: List[str], removed: Counter) -> List[str]:
+    """Реквизиты сторон: от заголовка раздела до следующего раздела; строки подписей и М.П."""
+    result = []
+    skipping = False
+    for line in lines:
+        if REQUISITES_HEADING.match(line):
+            skipping = True
+        elif skipping and (ANNEX_HEADING.match(line) or re.match(r'^\s*\d{1,2}\.\s+[А-ЯЁ]', line)):
+            skipping = False
+
+        if skipping or (line and SIGNATURE_LINE.search(line)):
+            removed['requisites_chars'] += len(line) + 1
+            continue
+        result.append(line)
+    return result
+
+
+def _drop_annexes(lines: List[str], removed: Counter) -> List[str]:
+    """Приложения в конце документа (формы актов, спецификации) после основного текста"""
+    for index in range(len(lines) // 2, len(lines)):
+        if ANNEX_HEADING.match(lines[index]):
+            removed['annexes_chars'] += sum(len(line) + 1 for line in lines[index:])
+            return lines[:index]
+    return lines
+
+
+def _join_wrapped_lines(text: str) -> str:
+    """Склеивает строки, разорванные версткой PDF посреди предложения"""
+    return re.sub(r'(?<=[^\s.:;!?])\n(?=[а-яёa-z(«"])', ' ', text)
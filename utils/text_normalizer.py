@@ -0,0 +1,188 @@
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+from config import Config
+
+STOP_WORDS = frozenset({
+    'и', 'в', 'во', 'не', 'что', 'он', 'на', 'я', 'с', 'со', 'как', 'а', 'то', 'все', 'она', 'так',
+    'его', 'но', 'да', 'ты', 'к', 'у', 'же', 'вы', 'за', 'бы', 'по', 'только', 'ее', 'мне', 'было',
+    'вот', 'от', 'меня', 'еще', 'нет', 'о', 'из', 'ему', 'теперь', 'когда', 'даже', 'ну', 'вдруг',
+    'ли', 'если', 'уже', 'или', 'ни', 'быть', 'был', 'него', 'до', 'вас', 'нибудь', 'опять', 'уж',
+    'вам', 'ведь', 'там', 'потом', 'себя', 'ничего', 'ей', 'может', 'они', 'тут', 'где', 'есть',
+    'надо', 'ней', 'для', 'мы', 'тебя', 'их', 'чем', 'была', 'сам', 'чтоб', 'без', 'будто', 'чего',
+    'раз', 'тоже', 'себе', 'под', 'будет', 'ж', 'тогда', 'кто', 'этот', 'того', 'потому', 'этого',
+    'какой', 'совсем', 'ним', 'здесь', 'этом', 'один', 'почти', 'мой', 'тем', 'чтобы', 'нее',
+    'сейчас', 'были', 'куда', 'зачем', 'всех', 'никогда', 'можно', 'при', 'наконец', 'два', 'об',
+    'другой', 'хоть', 'после', 'над', 'больше', 'тот', 'через', 'эти', 'нас', 'про', 'всего', 'них',
+    'какая', 'много', 'разве', 'три', 'эту', 'моя', 'впрочем', 'хорошо', 'свою', 'этой', 'перед',
+    'иногда', 'лучше', 'чуть', 'том', 'нельзя', 'такой', 'им', 'более', 'всегда', 'конечно', 'всю',
+    'между'
+})
+
+TOKEN_PATTERN = re.compile(r'[а-яa-z0-9]+')
+
+_VOWELS = frozenset('аеиоуыэюя')
+
+
+def _longest_first(*suffixes):
+    return tuple(sorted(suffixes, key=len, reverse=True))
+
+
+# Окончания алгоритма Snowball для русского языка
+_PERFECTIVE_GERUND_1 = _longest_first('в', 'вши', 'вшись')
+_PERFECTIVE_GERUND_2 = _longest_first('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись')
+_REFLEXIVE = _longest_first('ся', 'сь')
+_ADJECTIVE = _longest_first('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым',
+                            'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею')
+_PARTICIPLE_1 = _longest_first('ем', 'нн', 'вш', 'ющ', 'щ')
+_PARTICIPLE_2 = _longest_first('ивш', 'ывш', 'ующ')
+_VERB_1 = _longest_first('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет', 'ют', 'ны',
+                         'ть', 'ешь', 'нно')
+_VERB_2 = _longest_first('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй', 'ил', 'ыл',
+                         'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют', 'ит', 'ыт', 'ены', 'ить',
+                         'ыть', 'ишь', 'ую', 'ю')
+_NOUN = _longest_first('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и', 'ией', 'ей',
+                       'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы',
+                       'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я')
+_SUPERLATIVE = _longest_first('ейш', 'ейше')
+_DERIVATIONAL = _longest_first('ост', 'ость')
+
+
+def _strip(part: str, suffixes, after_a: bool = False):
+    """Отрезает самое длинное подходящее окончание; None, если ни одно не подошло"""
+    for suffix in suffixes:
+        if part.endswith(suffix) and len(part) > len(suffix) - (0 if after_a else 1):
+            if after_a and part[-len(suffix) - 1] not in 'ая':
+                continue
+            return part[:-len(suffix)]
+    return None
+
+
+def _strip_group(part: str, with_a, plain):
+    """Окончания первой группы допустимы только после 'а'/'я'"""
+    candidates = [(s, True) for s in with_a] + [(s, False) for s in plain]
+    for suffix, after_a in sorted(candidates, key=lambda item: len(item[0]), reverse=True):
+        stripped = _strip(part, (suffix,), after_a)
+        if stripped is not None:
+            return stripped
+    return None
+
+
+def _regions(word: str):
+    """Границы областей RV и R2 алгоритма Snowball"""
+    rv = r1 = r2 = len(word)
+
+    for i, char in enumerate(word):
+        if char in _VOWELS:
+            rv = i + 1
+            break
+
+    for i in range(1, len(word)):
+        if word[i - 1] in _VOWELS and word[i] not in _VOWELS:
+            r1 = i + 1
+            break
+
+    for i in range(r1 + 1, len(word)):
+        if word[i - 1] in _VOWELS and word[i] not in _VOWELS:
+            r2 = i + 1
+            break
+
+    return rv, r2
+
+
+@lru_cache(maxsize=Config.NORMALIZER_CACHE_SIZE)
+def stem(word: str) -> str:
+    """Основа слова по алгоритму Snowball (результат мемоизируется)"""
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    prefix, part = word[:rv], word[rv:]
+
+    # Шаг 1: деепричастия, либо возвратность + прилагательные/глаголы/существительные
+    stripped = _strip_group(part, _PERFECTIVE_GERUND_1, _PERFECTIVE_GERUND_2)
+    if stripped is not None:
+        part = stripped
+    else:
+        stripped = _strip(part, _REFLEXIVE)
+        if stripped is not None:
+            part = stripped
+
+        stripped = _strip(part, _ADJECTIVE)
+        if stripped is not None:
+            participle = _strip_group(stripped, _PARTICIPLE_1, _PARTICIPLE_2)
+            part = participle if participle is not None else stripped
+        else:
+            stripped = _strip_group(part, _VERB_1, _VERB_2)
+            if stripped is None:
+                stripped = _strip(part, _NOUN)
+            if stripped is not None:
+                part = stripped
+
+    # Шаг 2
+    if part.endswith('и'):
+        part = part[:-1]
+
+    # Шаг 3: словообразовательные окончания в R2
+    for suffix in _DERIVATIONAL:
+        if part.endswith(suffix) and len(prefix) + len(part) - len(suffix) >= r2:
+            part = part[:-len(suffix)]
+            break
+
+    # Шаг 4
+    stripped = _strip(part, _SUPERLATIVE)
+    if stripped is not None:
+        part = stripped
+    if part.endswith('нн'):
+        part = part[:-1]
+    elif stripped is None and part.endswith('ь'):
+        part = part[:-1]
+
+    return prefix + part
+
+
+def tokenize(text: str, min_length: int = 1) -> List[str]:
+    """Разбивает текст на слова в нижнем регистре со свёрткой ё→е"""
+    tokens = TOKEN_PATTERN.findall(text.lower().replace('ё', 'е'))
+    if min_length > 1:
+        return [token for token in tokens if len(token) >= min_length]
+    return tokens
+
+
+def normalize(text: str, min_length: int = 1, drop_stop_words: bool = True) -> List[str]:
+    """Токенизирует текст и приводит слова к основам"""
+    return normalize_documents([text], min_length, drop_stop_words)[0]
+
+
+def normalize_documents(texts: Iterable[str], min_length: int = 1, drop_stop_words: bool = True) -> List[List[str]]:
+    """Нормализует набор документов за один проход: каждое уникальное слово стеммится один раз"""
+    documents = [tokenize(text or '', min_length) for text in texts]
+    if drop_stop_words:
+        documents = [[token for token in tokens if token not in STOP_WORDS] for tokens in documents]
+
+    vocabulary: Dict[str, str] = {}
+    for tokens in documents:
+        for token in tokens:
+            if token not in vocabulary:
+                vocabulary[token] = stem(token)
+
+    return [[vocabulary[token] for token in tokens] for tokens in documents]
+
+
+def keywords(text: str, limit: int = 10, min_length: int = 4) -> List[str]:
+    """Самые частотные основы текста без стоп-слов"""
+    words = Counter(word for word in normalize(text, min_length) if not word.isdigit())
+    return [word for word, _ in words.most_common(limit)]
+
+
+def stems_match(query: str, text: str) -> bool:
+    """Каждая основа запроса является префиксом какой-либо основы текста"""
+    query_stems, text_stems = normalize_documents([query, text], drop_stop_words=False)
+    if not query_stems:
+        return False
+    return all(any(candidate.startswith(q) for candidate in text_stems) for q in query_stems)
+
+
+def cache_info():
+    """Статистика LRU-кэша основ"""
+    return stem.cache_info()